@@ -1,29 +1,17 @@
-from flask import Flask, jsonify, redirect, url_for, flash
+from flask import Flask, jsonify, redirect, url_for, flash, request
 from flask_jwt_extended import JWTManager
 from config import Config
 from database import db
 from sqlalchemy import text
 import os
 import logging
+from logging_config import configure_logging
 from utils import datetimeformat, register_filters, transaction_type_ua
-import schedule
-import time
-import threading
-from import_csv import import_csv_data
-
-# Створення папки logs
-log_dir = os.path.join(os.path.dirname(__file__), 'logs')
-os.makedirs(log_dir, exist_ok=True)
-
-# Налаштування логування
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler(os.path.join(log_dir, 'app.log'))
-    ]
-)
+from scheduler import scheduler
+from services.auth_service import is_token_revoked
+
+# Налаштування логування (асинхронний запис через чергу, ротація за розміром)
+configure_logging(Config)
 logger = logging.getLogger(__name__)
 
 # Ініціалізація програми
@@ -38,25 +26,64 @@ app.config['JWT_COOKIE_SECURE'] = False
 app.config['JWT_ACCESS_COOKIE_PATH'] = '/'
 app.config['JWT_COOKIE_SAMESITE'] = 'Lax'
 app.config['JWT_ACCESS_TOKEN_EXPIRES'] = 1800  # Токен дійсний 30 хвилин
+app.config['JWT_REFRESH_COOKIE_NAME'] = 'refresh_token'
+app.config['JWT_REFRESH_COOKIE_PATH'] = '/'
+app.config['JWT_REFRESH_TOKEN_EXPIRES'] = app.config['REFRESH_TOKEN_EXPIRES']
 jwt = JWTManager(app)
 
-# Обробник прострочених токенів
-@jwt.expired_token_loader
-def expired_token_callback(jwt_header, jwt_payload):
-    logger.info("JWT token has expired, redirecting to login")
-    flash('Ваша сесія закінчилася. Будь ласка, увійдіть знову.', 'error')
+def _silent_refresh_response():
+    """
+    Якщо браузер має refresh-куку, перенаправляє на /token/refresh з поверненням
+    на поточну сторінку (307 зберігає метод і тіло форми). Для API-запитів із
+    заголовком Authorization і для самого оновлення повертає None.
+    """
+    if (
+        request.cookies.get(app.config['JWT_REFRESH_COOKIE_NAME'])
+        and request.endpoint != 'web.refresh_token'
+        and 'Authorization' not in request.headers
+    ):
+        return redirect(url_for('web.refresh_token', next=request.full_path.rstrip('?')), code=307)
+    return None
+
+def _login_redirect(message):
+    flash(message, 'error')
     response = redirect(url_for('web.login'))
     response.delete_cookie('access_token')
+    response.delete_cookie('js_access_token')
+    response.delete_cookie(app.config['JWT_REFRESH_COOKIE_NAME'])
     return response
 
-# Обробник відсутності токена
+# Обробник прострочених токенів: access-токен оновлюємо через refresh-куку
+@jwt.expired_token_loader
+def expired_token_callback(jwt_header, jwt_payload):
+    if jwt_payload.get('type') == 'access':
+        response = _silent_refresh_response()
+        if response is not None:
+            logger.debug("JWT token has expired, refreshing via refresh token")
+            return response
+    logger.info("JWT token has expired, redirecting to login")
+    return _login_redirect('Ваша сесія закінчилася. Будь ласка, увійдіть знову.')
+
+# Обробник відсутності токена (кука access_token уже видалена браузером після max_age)
 @jwt.unauthorized_loader
 def unauthorized_callback(error):
+    response = _silent_refresh_response()
+    if response is not None:
+        logger.debug("No JWT access token, refreshing via refresh token")
+        return response
     logger.info("No JWT token provided, redirecting to login")
-    flash('Будь ласка, увійдіть для доступу до цієї сторінки.', 'error')
-    response = redirect(url_for('web.login'))
-    response.delete_cookie('access_token')
-    return response
+    return _login_redirect('Будь ласка, увійдіть для доступу до цієї сторінки.')
+
+# Перевірка відкликання: версія токена має збігатися з поточною версією користувача
+@jwt.token_in_blocklist_loader
+def check_if_token_revoked(jwt_header, jwt_payload):
+    return is_token_revoked(jwt_payload)
+
+# Обробник відкликаних токенів (пароль змінено або користувача видалено)
+@jwt.revoked_token_loader
+def revoked_token_callback(jwt_header, jwt_payload):
+    logger.info("JWT token has been revoked, redirecting to login")
+    return _login_redirect('Ваша сесія більше не дійсна. Будь ласка, увійдіть знову.')
 
 # Реєстрація фільтрів Jinja2 із utils.py
 app.jinja_env.filters['datetimeformat'] = datetimeformat
@@ -68,12 +95,26 @@ logger.debug("Ініціалізація Flask з SECRET_KEY і JWT_SECRET_KEY")
 logger.debug("Ініціалізація JWTManager з токенами в cookies (access_token) і headers")
 db.init_app(app)
 
+# Лічильник SQL-запитів на запит (Server-Timing) і журнал повільних запитів
+from db_instrumentation import init_db_instrumentation
+init_db_instrumentation(app)
+
+# Метрики Prometheus (/metrics), агреговані між воркерами через METRICS_DIR
+from metrics import registry as metrics_registry
+metrics_registry.init_app(app)
+
+# JSON-відповіді через orjson, якщо встановлено; Decimal, datetime і dataclass без ручних перетворень
+from json_provider import init_json
+init_json(app)
+
 # Імпорти blueprints після ініціалізації
 from routes.users import users_bp
 from routes.web import web_bp
 from routes.shifts import shifts_bp
 from routes.flights import flights_bp
 from routes.tickets import tickets_bp
+from routes.profiler import profiler_bp
+from routes.metrics import metrics_bp
 
 # Реєстрація blueprints
 app.register_blueprint(users_bp)
@@ -81,8 +122,39 @@ app.register_blueprint(web_bp)
 app.register_blueprint(shifts_bp)
 app.register_blueprint(flights_bp)
 app.register_blueprint(tickets_bp)
+app.register_blueprint(profiler_bp)
+app.register_blueprint(metrics_bp)
+
+# Таблиця прав доступу endpoint → ролі (будується після реєстрації всіх blueprints)
+from permissions import init_permissions
+init_permissions(app)
+
+# Вартість bcrypt: з конфігурації або калібрування під цільовий час хешу
+from passwords import init_password_hashing
+init_password_hashing(app)
+
+# Профілювальник вибраних запитів (керується з /admin/profiler без перезапуску)
+from profiler import profiler
+profiler.init_app(app)
 
 register_filters(app)
+
+# Кеш фрагментів шаблонів: тег {% cache %} має бути зареєстрований до компіляції
+from fragment_cache import init_fragment_cache
+init_fragment_cache(app)
+
+# Байткод-кеш і попередня компіляція шаблонів (після реєстрації фільтрів)
+from templates_cache import init_templates
+init_templates(app)
+
+# Статика з хешем у назві, стиснуті варіанти і довічне кешування
+from assets import init_assets
+init_assets(app)
+
+# Стиснення відповідей на рівні WSGI (стиснута заздалегідь статика пропускається)
+from compression import init_compression
+init_compression(app)
+
 # Базові маршрути
 @app.route('/')
 def index():
@@ -96,23 +168,15 @@ def test_db():
         logger.debug("Тест підключення до бази даних успішний")
         return jsonify({'message': 'Database connection successful'})
     except Exception as e:
-        logger.error(f"Помилка підключення до бази даних: {e}")
+        logger.error("Помилка підключення до бази даних: %s", e)
         return jsonify({'error': 'Database connection failed'}), 500
 
-# Налаштування періодичної задачі для імпорту CSV
-def run_schedule():
-    """Запускає планувальник у окремому потоці."""
-    def import_task():
-        import_csv_data(app, db)
-    
-    schedule.every().minute.do(import_task)
-    logger.info("Планувальник імпорту CSV запущено")
-    while True:
-        schedule.run_pending()
-        time.sleep(60)
+# Планувальник фонових задач (імпорт CSV тощо).
+# Потік стартує в кожному воркері на першому запиті, а lease-блокування
+# в БД гарантує, що кожну задачу одночасно виконує лише один процес.
+from jobs import register_jobs
+scheduler.init_app(app)
+register_jobs(app)
 
 if __name__ == '__main__':
-    # Запускаємо планувальник у окремому потоці
-    scheduler_thread = threading.Thread(target=run_schedule, daemon=True)
-    scheduler_thread.start()
-    app.run(host='0.0.0.0', port=8000, debug=True)
\ No newline at end of file
+    app.run(host='0.0.0.0', port=8000, debug=app.config['DEBUG'])
\ No newline at end of file
@@ -0,0 +1,138 @@
+"""
+Статичні ресурси: адреси з хешем вмісту, стиснуті заздалегідь варіанти і
+довічне кешування в браузері.
+
+url_for('static', filename='css/style.css') повертає /static/css/style.<хеш>.css.
+Змінений файл отримує нову адресу, тож відповідь за адресою з хешем ніколи
+не змінюється і віддається з Cache-Control: immutable на рік — повторні
+завантаження сторінок не роблять жодного запиту за ресурсами.
+
+Під час старту для текстових ресурсів будуються .gz і, якщо встановлено
+brotli, .br у ASSETS_BUILD_DIR; запит отримує найкращий варіант, який
+дозволяє Accept-Encoding.
+"""
+import os
+import gzip
+import hashlib
+import logging
+import mimetypes
+from flask import request, send_file, abort
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Розширення, які має сенс стискати (зображення і шрифти вже стиснуті)
+COMPRESSIBLE_EXTENSIONS = {'.css', '.js', '.svg', '.json', '.txt', '.html', '.map'}
+
+class AssetManifest:
+    """
+    Відповідність файлів статики адресам з хешем вмісту.
+
+    Args:
+        static_folder (str): Каталог статики
+        build_dir (str): Каталог стиснутих варіантів
+    """
+    def __init__(self, static_folder, build_dir):
+        self.static_folder = static_folder
+        self.build_dir = build_dir
+        self.fingerprinted = {}   # css/style.css → css/style.<хеш>.css
+        self.sources = {}         # css/style.<хеш>.css → css/style.css
+
+    def build(self, precompress=True, min_size=0):
+        """
+        Хешує всі файли статики і, за потреби, готує стиснуті варіанти.
+        Варіанти вже зібраної версії файлу (та сама назва з хешем) не
+        перебудовуються.
+
+        Returns:
+            int: Кількість файлів статики
+        """
+        for root, _, files in os.walk(self.static_folder):
+            for name in files:
+                path = os.path.join(root, name)
+                filename = os.path.relpath(path, self.static_folder).replace(os.sep, '/')
+                with open(path, 'rb') as f:
+                    data = f.read()
+                digest = hashlib.sha256(data).hexdigest()[:12]
+                base, ext = os.path.splitext(filename)
+                hashed = f"{base}.{digest}{ext}"
+                self.fingerprinted[filename] = hashed
+                self.sources[hashed] = filename
+                if precompress and ext in COMPRESSIBLE_EXTENSIONS and len(data) >= min_size:
+                    self._precompress(hashed, data)
+        return len(self.fingerprinted)
+
+    def _precompress(self, hashed, data):
+        target = os.path.join(self.build_dir, hashed)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        variants = [('.gz', lambda: gzip.compress(data, compresslevel=9, mtime=0))]
+        if brotli is not None:
+            variants.append(('.br', lambda: brotli.compress(data, quality=11)))
+        for suffix, compress in variants:
+            path = target + suffix
+            if os.path.exists(path):
+                continue
+            compressed = compress()
+            if len(compressed) >= len(data):
+                continue
+            # Запис через тимчасовий файл: воркери стартують паралельно
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(compressed)
+            os.replace(tmp_path, path)
+
+    def variant(self, hashed):
+        """
+        Найкращий варіант файлу з хешем для поточного Accept-Encoding.
+
+        Returns:
+            tuple: (шлях до файлу, Content-Encoding або None)
+        """
+        target = os.path.join(self.build_dir, hashed)
+        for encoding, suffix in (('br', '.br'), ('gzip', '.gz')):
+            if request.accept_encodings[encoding] and os.path.isfile(target + suffix):
+                return target + suffix, encoding
+        return os.path.join(self.static_folder, self.sources[hashed]), None
+
+def init_assets(app):
+    """
+    Вмикає адреси з хешем для url_for('static', ...) і підміняє view статики.
+    У режимі розробки (ASSETS_FINGERPRINT=false) статика працює як раніше,
+    щоб зміни CSS і JS було видно без перезапуску.
+    """
+    if not app.config['ASSETS_FINGERPRINT'] or not app.static_folder:
+        return
+    manifest = AssetManifest(app.static_folder, os.path.join(app.root_path, app.config['ASSETS_BUILD_DIR']))
+    count = manifest.build(app.config['ASSETS_PRECOMPRESS'], app.config['ASSETS_MIN_COMPRESS_SIZE'])
+    app.extensions['assets'] = manifest
+    logger.info("Статика: %s файлів, brotli: %s", count, 'так' if brotli is not None else 'ні')
+
+    @app.url_defaults
+    def fingerprint_static_url(endpoint, values):
+        if endpoint == 'static' and 'filename' in values:
+            values['filename'] = manifest.fingerprinted.get(values['filename'], values['filename'])
+
+    default_view = app.view_functions['static']
+    max_age = app.config['ASSETS_MAX_AGE']
+
+    def static(filename):
+        if filename not in manifest.sources:
+            # Адреса без хешу (старі сторінки, прямі посилання) — звичайна статика
+            return default_view(filename=filename)
+        path, encoding = manifest.variant(filename)
+        if not os.path.isfile(path):
+            abort(404)
+        mimetype = mimetypes.guess_type(manifest.sources[filename])[0] or 'application/octet-stream'
+        response = send_file(path, mimetype=mimetype, max_age=max_age, conditional=True)
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        response.vary.add('Accept-Encoding')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        return response
+
+    app.view_functions['static'] = static
@@ -0,0 +1 @@
+"""Бенчмарки сервісного шару та HTTP-навантаження (запускаються з папки app/)."""
@@ -0,0 +1,164 @@
+"""
+Бенчмарки гарячих функцій сервісного шару.
+
+Запуск з папки app/:
+    python -m benchmarks.bench_services --flights 2000 --tickets 200000
+    python -m benchmarks.bench_services --save data/baseline.json
+    python -m benchmarks.bench_services --compare data/baseline.json --max-regression 0.2
+
+За замовчуванням використовується SQLite-файл data/benchmark.db; для локального
+MSSQL передайте --database-url або BENCHMARK_DATABASE_URL.
+"""
+import sys
+import argparse
+import logging
+from datetime import datetime, timedelta
+from benchmarks.harness import prepare_environment, create_schema, BenchmarkRunner
+
+logger = logging.getLogger(__name__)
+
+def seed_if_empty(app, db, args):
+    """Генерує бенчмарк-набір, якщо в БД ще немає квитків."""
+    from models import Ticket
+    with app.app_context():
+        has_tickets = db.session.query(Ticket.id).first() is not None
+    if has_tickets and not args.reseed:
+        logger.info("Бенчмарк-набір уже є в БД, генерацію пропущено")
+        return
+    from generate_csv_data import generate_benchmark_data
+    generate_benchmark_data(
+        num_flights=args.flights,
+        num_tickets=args.tickets,
+        desks_per_airport=args.desks_per_airport,
+        days=args.days
+    )
+
+def create_sale_fixture(app, db, seats):
+    """
+    Створює окремий рейс із тарифом на `seats` місць для відкритої зміни,
+    щоб раунди продажу не конфліктували з уже проданими місцями.
+
+    Returns:
+        dict: shift_id, cashier_id, flight_id, flight_fare_id, airport_id
+    """
+    from models import Shift, ShiftStatus, CashDesk, Airport, Flight, FlightFare
+    with app.app_context():
+        shift = Shift.query.filter_by(status=ShiftStatus.OPEN).order_by(Shift.id).first()
+        if not shift:
+            raise RuntimeError("У бенчмарк-наборі немає відкритої зміни")
+        cash_desk = db.session.get(CashDesk, shift.cash_desk_id)
+        destination = Airport.query.filter(Airport.id != cash_desk.airport_id).first()
+        now = datetime.now()
+        flight = Flight(
+            flight_number=f"BENCH-{now:%Y%m%d%H%M%S%f}"[:20],
+            origin_airport_id=cash_desk.airport_id,
+            destination_airport_id=destination.id,
+            departure_time=now + timedelta(days=7),
+            arrival_time=now + timedelta(days=7, hours=2),
+            aircraft_model='Airbus A320',
+            seat_capacity=seats
+        )
+        db.session.add(flight)
+        db.session.flush()
+        fare = FlightFare(flight_id=flight.id, name='Economy', base_price=100, base_currency='USD', seat_limit=seats, seats_sold=0)
+        db.session.add(fare)
+        db.session.commit()
+        return {
+            'shift_id': shift.id,
+            'cashier_id': shift.cashier_id,
+            'flight_id': flight.id,
+            'flight_fare_id': fare.id,
+            'airport_id': cash_desk.airport_id
+        }
+
+def run_benchmarks(app, db, args):
+    from services.ticket_service import sell_ticket, refund_ticket, get_sold_tickets_by_criteria
+    from services.cash_desk_service import get_cash_desk_balances_by_date
+    from services.flight_service import get_all_flights
+    from generate_csv_data import seat_label
+    from services.auth_service import issue_access_token
+    from permissions import check_role
+    from models import User
+
+    runner = BenchmarkRunner(app, db, rounds=args.rounds, warmup=args.warmup)
+    fixture = create_sale_fixture(app, db, seats=(args.rounds + args.warmup) * 2)
+    sold_ids = []
+
+    def sell(seat_number):
+        ticket, success, error_msg = sell_ticket(
+            fixture['shift_id'], fixture['flight_id'], fixture['flight_fare_id'],
+            'Бенчмарк Пасажир', seat_number, 'UAH'
+        )
+        if not success:
+            raise RuntimeError(f"sell_ticket: {error_msg}")
+        sold_ids.append(ticket['id'])
+
+    def refund(ticket_id):
+        _, success, error_msg = refund_ticket(ticket_id)
+        if not success:
+            raise RuntimeError(f"refund_ticket: {error_msg}")
+
+    runner.bench('sell_ticket', sell, setup=lambda i: (seat_label(i),))
+    runner.bench('refund_ticket', refund, setup=lambda i: (sold_ids[i],))
+
+    today = datetime.now().date()
+    runner.bench(
+        'get_cash_desk_balances_by_date',
+        lambda: get_cash_desk_balances_by_date(fixture['airport_id'], None, today, today - timedelta(days=30))
+    )
+    runner.bench(
+        'get_sold_tickets_by_criteria[flight]',
+        lambda: get_sold_tickets_by_criteria({'airport_id': fixture['airport_id'], 'flight_id': fixture['flight_id']})
+    )
+    runner.bench(
+        'get_sold_tickets_by_criteria[day]',
+        lambda: get_sold_tickets_by_criteria({'day': today - timedelta(days=1)}),
+        rounds=max(3, args.rounds // 4)
+    )
+    runner.bench('get_all_flights', get_all_flights, rounds=max(3, args.rounds // 4))
+
+    # Накладні витрати перевірки ролі: касир звертається до адмінського /users
+    with app.app_context():
+        token = issue_access_token(db.session.get(User, fixture['cashier_id']))
+
+    def forbidden_request():
+        with app.test_request_context('/users', headers={'Authorization': f'Bearer {token}'}):
+            response = check_role(app.extensions['permissions']['users.users'])
+            if response is None:
+                raise RuntimeError("check_role пропустив касира до /users")
+
+    runner.bench('check_role[forbidden]', forbidden_request)
+    return runner
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Бенчмарки сервісного шару")
+    parser.add_argument('--database-url', help="URL БД (за замовчуванням SQLite data/benchmark.db)")
+    parser.add_argument('--flights', type=int, default=2000)
+    parser.add_argument('--tickets', type=int, default=200000)
+    parser.add_argument('--desks-per-airport', type=int, default=5)
+    parser.add_argument('--days', type=int, default=90)
+    parser.add_argument('--reseed', action='store_true', help="Догенерувати дані, навіть якщо БД не порожня")
+    parser.add_argument('--rounds', type=int, default=20)
+    parser.add_argument('--warmup', type=int, default=2)
+    parser.add_argument('--save', help="Зберегти результати в JSON")
+    parser.add_argument('--compare', help="JSON базової лінії для порівняння")
+    parser.add_argument('--max-regression', type=float, default=0.2, help="Допустиме погіршення медіани (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    app, db = prepare_environment(args.database_url)
+    create_schema(app, db)
+    seed_if_empty(app, db, args)
+    runner = run_benchmarks(app, db, args)
+    print(runner.report())
+    if args.save:
+        runner.save(args.save)
+    if args.compare:
+        regressions = runner.compare(args.compare, args.max_regression)
+        if regressions:
+            print("Виявлено регресії:")
+            print('\n'.join(regressions))
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
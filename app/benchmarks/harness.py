@@ -0,0 +1,140 @@
+import os
+import sys
+import json
+import time
+import statistics
+import logging
+
+logger = logging.getLogger(__name__)
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_DATABASE_URL = f"sqlite:///{os.path.join(APP_DIR, 'data', 'benchmark.db')}"
+
+def prepare_environment(database_url=None):
+    """
+    Готує оточення до імпорту програми: БД для бенчмарку, вимкнений планувальник.
+
+    Config читає змінні оточення під час імпорту, тому функцію треба викликати
+    до першого `from app import app`.
+
+    Returns:
+        tuple: (app, db)
+    """
+    database_url = database_url or os.getenv('BENCHMARK_DATABASE_URL') or DEFAULT_DATABASE_URL
+    os.environ['DATABASE_URL'] = database_url
+    os.environ['SCHEDULER_ENABLED'] = 'false'
+    os.chdir(APP_DIR)
+    os.makedirs(os.path.join(APP_DIR, 'data'), exist_ok=True)
+    os.makedirs(os.path.join(APP_DIR, 'logs'), exist_ok=True)
+    if APP_DIR not in sys.path:
+        sys.path.insert(0, APP_DIR)
+    from app import app, db
+    return app, db
+
+def create_schema(app, db):
+    """
+    Створює схему в БД-замінника (SQLite) або перевіряє наявність у MSSQL.
+
+    Enum-колонки зберігають імена членів ('OPEN'), а check_shift_status порівнює
+    з 'open': у MSSQL з Cyrillic_General_CI_AS це працює завдяки регістронезалежному
+    порівнянню. SQLite порівнює з урахуванням регістру, тому для нього умова
+    переписується через lower().
+    """
+    from models import Shift
+    with app.app_context():
+        if db.engine.dialect.name == 'sqlite':
+            for constraint in Shift.__table__.constraints:
+                if constraint.name == 'check_shift_status':
+                    constraint.sqltext = db.text("lower(status) = 'open' OR closed_at IS NOT NULL")
+        db.create_all()
+
+class BenchmarkResult:
+    """Статистика часу виконання одного бенчмарку (у секундах)."""
+    def __init__(self, name, timings):
+        self.name = name
+        self.timings = timings
+
+    def stats(self):
+        timings = self.timings
+        mean = statistics.fmean(timings)
+        return {
+            'rounds': len(timings),
+            'min': min(timings),
+            'max': max(timings),
+            'mean': mean,
+            'median': statistics.median(timings),
+            'stddev': statistics.stdev(timings) if len(timings) > 1 else 0.0,
+            'ops': 1 / mean if mean else None
+        }
+
+class BenchmarkRunner:
+    """
+    Мінімальний аналог pytest-benchmark: прогрів, кілька раундів,
+    статистика, збереження в JSON і порівняння з базовою лінією.
+    """
+    def __init__(self, app, db, rounds=20, warmup=2):
+        self.app = app
+        self.db = db
+        self.rounds = rounds
+        self.warmup = warmup
+        self.results = []
+
+    def bench(self, name, func, rounds=None, warmup=None, setup=None):
+        """
+        Вимірює func. Кожен раунд виконується в окремому контексті програми з
+        новою сесією БД, як окремий HTTP-запит. setup(round_index) повертає
+        аргументи для func і не враховується в часі.
+        """
+        rounds = rounds or self.rounds
+        warmup = self.warmup if warmup is None else warmup
+        timings = []
+        for index in range(warmup + rounds):
+            with self.app.app_context():
+                args = setup(index) if setup else ()
+                started = time.perf_counter()
+                func(*args)
+                elapsed = time.perf_counter() - started
+                self.db.session.remove()
+            if index >= warmup:
+                timings.append(elapsed)
+        result = BenchmarkResult(name, timings)
+        self.results.append(result)
+        stats = result.stats()
+        logger.info("%s: median %.2f мс, min %.2f мс", name, stats['median'] * 1000, stats['min'] * 1000)
+        return result
+
+    def report(self):
+        header = f"{'Бенчмарк':<40} {'rounds':>6} {'min, мс':>10} {'median, мс':>11} {'mean, мс':>10} {'max, мс':>10} {'ops/s':>9}"
+        lines = [header, '-' * len(header)]
+        for result in self.results:
+            stats = result.stats()
+            lines.append(
+                f"{result.name:<40} {stats['rounds']:>6} {stats['min'] * 1000:>10.2f} {stats['median'] * 1000:>11.2f} "
+                f"{stats['mean'] * 1000:>10.2f} {stats['max'] * 1000:>10.2f} {stats['ops']:>9.1f}"
+            )
+        return '\n'.join(lines)
+
+    def save(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({result.name: result.stats() for result in self.results}, f, indent=2)
+
+    def compare(self, baseline_path, max_regression=0.2):
+        """
+        Порівнює медіани з базовою лінією.
+
+        Returns:
+            list: Повідомлення про регресії (порожній список, якщо регресій немає)
+        """
+        with open(baseline_path, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = []
+        for result in self.results:
+            if result.name not in baseline:
+                continue
+            before = baseline[result.name]['median']
+            after = result.stats()['median']
+            if before and after > before * (1 + max_regression):
+                regressions.append(
+                    f"{result.name}: median {before * 1000:.2f} мс -> {after * 1000:.2f} мс (+{(after / before - 1) * 100:.0f}%)"
+                )
+        return regressions
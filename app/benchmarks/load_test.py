@@ -0,0 +1,299 @@
+"""
+Навантажувальний тест HTTP-сценаріїв касира, бухгалтера та менеджера з продажів.
+
+Усі запити проходять через справжні blueprints за допомогою тестового клієнта
+Flask у кількох потоках одного процесу, без зовнішніх сервісів. Касири
+входять через /login, відкривають зміну, продають і повертають квитки, а
+бухгалтери та менеджери паралельно запитують звіти.
+
+Запуск з папки app/:
+    python -m benchmarks.load_test --cashiers 8 --sales-per-cashier 50
+    python -m benchmarks.load_test --cashiers 16 --accountants 2 --managers 2 --save data/load.json
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+import logging
+from datetime import datetime, timedelta
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from benchmarks.harness import prepare_environment, create_schema
+
+logger = logging.getLogger(__name__)
+
+LOAD_TEST_PASSWORD = 'load-test-password'
+
+_query_counter = threading.local()
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    if getattr(_query_counter, 'active', False):
+        _query_counter.count += 1
+
+def percentile(sorted_values, fraction):
+    """Перцентиль методом найближчого рангу для відсортованого списку."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+class LoadStats:
+    """Потокобезпечний збір затримок і кількості запитів до БД за сценаріями."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = {}
+        self.errors = {}
+
+    def record(self, name, elapsed, queries, ok):
+        with self._lock:
+            self.samples.setdefault(name, []).append((elapsed, queries))
+            if not ok:
+                self.errors[name] = self.errors.get(name, 0) + 1
+
+    def summary(self, wall_time):
+        result = {}
+        with self._lock:
+            for name, samples in sorted(self.samples.items()):
+                latencies = sorted(elapsed for elapsed, _ in samples)
+                result[name] = {
+                    'requests': len(samples),
+                    'errors': self.errors.get(name, 0),
+                    'rps': len(samples) / wall_time if wall_time else 0.0,
+                    'p50': percentile(latencies, 0.50),
+                    'p90': percentile(latencies, 0.90),
+                    'p95': percentile(latencies, 0.95),
+                    'p99': percentile(latencies, 0.99),
+                    'max': latencies[-1],
+                    'queries_per_request': sum(queries for _, queries in samples) / len(samples)
+                }
+        return result
+
+class VirtualUser:
+    """Окремий тестовий клієнт із власними cookie (сесією JWT)."""
+    def __init__(self, app, stats, email):
+        self.client = app.test_client()
+        self.stats = stats
+        self.email = email
+
+    def request(self, name, method, path, data=None, expect_location=None, expect_status=None):
+        """
+        Виконує запит і записує затримку та кількість SQL-запитів.
+
+        Для редиректів успіх визначається за Location (наприклад, продаж
+        успішний, якщо нас перенаправили на панель, а не назад на форму).
+        Звіти при помилці теж перенаправляють на панель, тому для них
+        перевіряється expect_status.
+        """
+        _query_counter.count = 0
+        _query_counter.active = True
+        started = time.perf_counter()
+        try:
+            response = self.client.open(path, method=method, data=data)
+        finally:
+            elapsed = time.perf_counter() - started
+            _query_counter.active = False
+        ok = response.status_code < 400
+        if expect_status is not None:
+            ok = response.status_code == expect_status
+        if ok and expect_location is not None:
+            ok = response.headers.get('Location', '').endswith(expect_location)
+        self.stats.record(name, elapsed, _query_counter.count, ok)
+        return response, ok
+
+    def login(self):
+        _, ok = self.request('POST /login', 'POST', '/login', {
+            'email': self.email, 'password': LOAD_TEST_PASSWORD
+        }, expect_location='/dashboard')
+        if not ok:
+            raise RuntimeError(f"Не вдалося увійти як {self.email}")
+
+def create_fixture(app, db, run_id, cashiers, accountants, managers, seats):
+    """
+    Створює для прогону окремий аеропорт-відправлення з касами, касирами,
+    звітними користувачами та рейсом, на якому вистачає місць для всіх продажів.
+    """
+    from passwords import hash_password
+    from models import Airport, CashDesk, CashDeskAccount, User, Role, Flight, FlightFare, ExchangeRate
+    password_hash = hash_password(LOAD_TEST_PASSWORD)
+    now = datetime.now()
+    with app.app_context():
+        origin = Airport(code=f"L{run_id % 100000:05d}", name=f"Load test {run_id}", location='Load test')
+        destination = Airport(code=f"D{run_id % 100000:05d}", name=f"Load test {run_id} dest", location='Load test')
+        db.session.add_all([origin, destination])
+        db.session.flush()
+        for base, target, rate in [('USD', 'UAH', 41.5), ('EUR', 'UAH', 45.0), ('USD', 'EUR', 0.9222)]:
+            if not ExchangeRate.query.filter_by(base_currency=base, target_currency=target).first():
+                db.session.add(ExchangeRate(base_currency=base, target_currency=target, rate=rate, valid_at=now))
+
+        def add_user(email, role, airport_id=None):
+            db.session.add(User(
+                name=email.split('@')[0], email=email, password_hash=password_hash, role=role,
+                password_changed=True, airport_id=airport_id
+            ))
+            return email
+
+        cashier_emails = []
+        for index in range(cashiers):
+            desk = CashDesk(airport_id=origin.id, name=f"Load desk {index + 1}", is_active=True)
+            db.session.add(desk)
+            db.session.flush()
+            for code in ('USD', 'UAH', 'EUR'):
+                db.session.add(CashDeskAccount(cash_desk_id=desk.id, currency_code=code, balance=0, last_updated=now))
+            cashier_emails.append((add_user(f"load-{run_id}-cashier-{index}@example.com", Role.CASHIER, origin.id), desk.id))
+        accountant_emails = [add_user(f"load-{run_id}-accountant-{i}@example.com", Role.ACCOUNTANT) for i in range(accountants)]
+        manager_emails = [add_user(f"load-{run_id}-manager-{i}@example.com", Role.SALES_MANAGER) for i in range(managers)]
+
+        flight = Flight(
+            flight_number=f"LT{run_id}"[:20], origin_airport_id=origin.id, destination_airport_id=destination.id,
+            departure_time=now + timedelta(days=3), arrival_time=now + timedelta(days=3, hours=2),
+            aircraft_model='Airbus A320', seat_capacity=seats
+        )
+        db.session.add(flight)
+        db.session.flush()
+        fare = FlightFare(flight_id=flight.id, name='Economy', base_price=100, base_currency='USD', seat_limit=seats, seats_sold=0)
+        db.session.add(fare)
+        db.session.commit()
+        return {
+            'airport_id': origin.id,
+            'flight_id': flight.id,
+            'flight_fare_id': fare.id,
+            'cashiers': cashier_emails,
+            'accountants': accountant_emails,
+            'managers': manager_emails
+        }
+
+def cashier_scenario(app, db, stats, fixture, email, cash_desk_id, worker_index, args, rng):
+    from models import Ticket, TicketStatus, Shift, ShiftStatus, User
+    from generate_csv_data import seat_label
+    user = VirtualUser(app, stats, email)
+    user.login()
+    user.request('GET /dashboard', 'GET', '/dashboard')
+    user.request('POST /web/shifts/open', 'POST', '/web/shifts/open', {'cash_desk_id': cash_desk_id})
+    with app.app_context():
+        cashier_id = User.query.filter_by(email=email).first().id
+        shift_id = Shift.query.filter_by(cashier_id=cashier_id, status=ShiftStatus.OPEN).first().id
+    for index in range(args.sales_per_cashier):
+        seat_number = seat_label(worker_index * args.sales_per_cashier + index)
+        _, ok = user.request('POST /web/tickets/sell', 'POST', '/web/tickets/sell', {
+            'flight_id': fixture['flight_id'],
+            'flight_fare_id': fixture['flight_fare_id'],
+            'passenger_name': f"Пасажир {worker_index}-{index}",
+            'seat_number': seat_number,
+            'currency_code': rng.choice(['USD', 'UAH', 'EUR'])
+        }, expect_location='/dashboard')
+        if ok and rng.random() < args.refund_ratio:
+            with app.app_context():
+                ticket = Ticket.query.filter_by(
+                    shift_id=shift_id, seat_number=seat_number, status=TicketStatus.SOLD
+                ).first()
+                ticket_id = ticket.id if ticket else None
+                db.session.remove()
+            if ticket_id:
+                user.request('POST /web/tickets/refund', 'POST', '/web/tickets/refund', {'ticket_id': ticket_id}, expect_location='/dashboard')
+        if index % 10 == 0:
+            user.request('GET /dashboard', 'GET', '/dashboard')
+    user.request('POST /web/shifts/close', 'POST', '/web/shifts/close')
+
+def report_scenario(app, stats, email, role, fixture, stop_event, args):
+    user = VirtualUser(app, stats, email)
+    user.login()
+    today = datetime.now().date()
+    while not stop_event.is_set():
+        if role == 'accountant':
+            user.request('POST /accountant/balances', 'POST', '/accountant/balances', {
+                'airport_id': fixture['airport_id'],
+                'date1': today.isoformat(),
+                'date2': (today - timedelta(days=1)).isoformat()
+            }, expect_status=200)
+        else:
+            user.request('POST /sales_manager/tickets', 'POST', '/sales_manager/tickets', {
+                'airport_id': fixture['airport_id'],
+                'flight_id': fixture['flight_id']
+            }, expect_status=200)
+        user.request('GET /dashboard', 'GET', '/dashboard')
+        stop_event.wait(args.report_interval)
+
+def run_load_test(app, db, args):
+    run_id = int(time.time() * 1000) % 10**9
+    fixture = create_fixture(
+        app, db, run_id, args.cashiers, args.accountants, args.managers,
+        seats=max(6, args.cashiers * args.sales_per_cashier)
+    )
+    stats = LoadStats()
+    stop_event = threading.Event()
+    errors = []
+
+    def guarded(target, *target_args):
+        try:
+            target(*target_args)
+        except Exception as e:
+            logger.error("Помилка сценарію: %s", e)
+            errors.append(e)
+
+    cashier_threads = [
+        threading.Thread(target=guarded, args=(
+            cashier_scenario, app, db, stats, fixture, email, desk_id, index, args, random.Random(args.seed + index)
+        ))
+        for index, (email, desk_id) in enumerate(fixture['cashiers'])
+    ]
+    report_threads = [
+        threading.Thread(target=guarded, args=(report_scenario, app, stats, email, 'accountant', fixture, stop_event, args))
+        for email in fixture['accountants']
+    ] + [
+        threading.Thread(target=guarded, args=(report_scenario, app, stats, email, 'manager', fixture, stop_event, args))
+        for email in fixture['managers']
+    ]
+    started = time.perf_counter()
+    for thread in report_threads + cashier_threads:
+        thread.start()
+    for thread in cashier_threads:
+        thread.join()
+    stop_event.set()
+    for thread in report_threads:
+        thread.join()
+    wall_time = time.perf_counter() - started
+    return stats.summary(wall_time), wall_time, errors
+
+def format_report(summary, wall_time):
+    header = f"{'Запит':<32} {'n':>6} {'err':>5} {'rps':>7} {'p50, мс':>9} {'p90, мс':>9} {'p95, мс':>9} {'p99, мс':>9} {'max, мс':>9} {'SQL/запит':>10}"
+    lines = [header, '-' * len(header)]
+    for name, row in summary.items():
+        lines.append(
+            f"{name:<32} {row['requests']:>6} {row['errors']:>5} {row['rps']:>7.1f} {row['p50'] * 1000:>9.1f} "
+            f"{row['p90'] * 1000:>9.1f} {row['p95'] * 1000:>9.1f} {row['p99'] * 1000:>9.1f} {row['max'] * 1000:>9.1f} "
+            f"{row['queries_per_request']:>10.1f}"
+        )
+    total = sum(row['requests'] for row in summary.values())
+    lines.append(f"Усього {total} запитів за {wall_time:.2f} с ({total / wall_time:.1f} запитів/с)")
+    return '\n'.join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Навантажувальний тест HTTP-сценаріїв")
+    parser.add_argument('--database-url', help="URL БД (за замовчуванням SQLite data/benchmark.db)")
+    parser.add_argument('--cashiers', type=int, default=8, help="Кількість паралельних касирів")
+    parser.add_argument('--accountants', type=int, default=1)
+    parser.add_argument('--managers', type=int, default=1)
+    parser.add_argument('--sales-per-cashier', type=int, default=50)
+    parser.add_argument('--refund-ratio', type=float, default=0.1)
+    parser.add_argument('--report-interval', type=float, default=0.2, help="Пауза між звітами, с")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--save', help="Зберегти зведення в JSON")
+    args = parser.parse_args(argv)
+
+    # Усі віртуальні користувачі приходять з однієї IP-адреси
+    os.environ.setdefault('LOGIN_RATE_LIMIT_ENABLED', 'false')
+    app, db = prepare_environment(args.database_url)
+    create_schema(app, db)
+    summary, wall_time, errors = run_load_test(app, db, args)
+    print(format_report(summary, wall_time))
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump({'wall_time': wall_time, 'requests': summary}, f, indent=2)
+    return 1 if errors else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,64 @@
+"""
+Перевірка, що шарди метрик не накопичуються на сервері з потоком на запит.
+
+Запуск з папки app/:
+    python -m benchmarks.metrics_shards
+    python -m benchmarks.metrics_shards --threads 2000
+
+Кожен короткоживучий потік пише в лічильник і гістограму, як after_request
+на потоковому werkzeug, а значення ніхто не збирає (METRICS_TOKEN і
+METRICS_DIR не задані). Код виходу 1, якщо шардів більше, ніж потоків, живих
+одночасно, або якщо після злиття шардів втрачено спостереження.
+"""
+import sys
+import argparse
+import threading
+from metrics import Counter, Histogram
+
+def run_threads(counter, histogram, threads, concurrency):
+    """Запускає threads потоків групами по concurrency, кожен пише по одному значенню."""
+    for start in range(0, threads, concurrency):
+        batch = [
+            threading.Thread(target=lambda: (counter.labels('GET').inc(), histogram.labels('GET').observe(0.01)))
+            for _ in range(min(concurrency, threads - start))
+        ]
+        for thread in batch:
+            thread.start()
+        for thread in batch:
+            thread.join()
+
+def check_shards(threads, concurrency):
+    """
+    Returns:
+        tuple: (звіт: str, кількість невдалих перевірок: int)
+    """
+    counter = Counter('check_requests_total', 'Перевірка шардів', ('method',))
+    histogram = Histogram('check_duration_seconds', 'Перевірка шардів', ('method',))
+    run_threads(counter, histogram, threads, concurrency)
+
+    lines = []
+    failures = 0
+    for metric in (counter, histogram):
+        count = len(metric._shards)
+        ok = count <= concurrency
+        failures += not ok
+        lines.append(f"{'OK  ' if ok else 'FAIL'} {metric.name}: шардів {count} після {threads} потоків (межа {concurrency})")
+    total = counter.collect().get(('GET',), 0)
+    observed = histogram.collect().get(('GET',), [0])[-1]
+    ok = total == threads and observed == threads
+    failures += not ok
+    lines.append(f"{'OK  ' if ok else 'FAIL'} значення після злиття: лічильник {total}, спостережень {observed}, очікується {threads}")
+    return '\n'.join(lines), failures
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Перевірка кількості шардів метрик")
+    parser.add_argument('--threads', type=int, default=500, help="Кількість короткоживучих потоків")
+    parser.add_argument('--concurrency', type=int, default=8, help="Потоків одночасно")
+    args = parser.parse_args(argv)
+
+    report, failures = check_shards(args.threads, args.concurrency)
+    print(report)
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,229 @@
+"""
+Регресійна перевірка планів гарячих запитів: кожен має використовувати свій індекс.
+
+Запуск з папки app/:
+    python -m benchmarks.query_plans
+    python -m benchmarks.query_plans --database-url sqlite:///data/benchmark.db
+
+За замовчуванням схема створюється в SQLite у пам'яті, тож перевіряється саме
+набір індексів з моделей. Плани отримуються через EXPLAIN QUERY PLAN, тому
+підтримується лише SQLite; у MSSQL ті самі запити варто перевіряти через
+SET SHOWPLAN_XML. Код виходу 1, якщо хоча б один запит не використовує індекс.
+"""
+import sys
+import argparse
+import logging
+from datetime import datetime
+from benchmarks.harness import prepare_environment, create_schema
+
+logger = logging.getLogger(__name__)
+
+class PlanCheck:
+    """
+    Очікування щодо плану запиту.
+
+    Args:
+        name (str): Назва перевірки
+        build (callable): Повертає запит, викликаючи ту саму функцію-будівник, що й сервіс
+        index (str): Індекс, який має бути в плані
+        sorted_by_index (bool): ORDER BY має виконуватися без тимчасового B-дерева
+    """
+    def __init__(self, name, build, index, sorted_by_index=False):
+        self.name = name
+        self.build = build
+        self.index = index
+        self.sorted_by_index = sorted_by_index
+
+def hot_queries():
+    """
+    Гарячі запити сервісів з очікуваними індексами. Запити будуються тими
+    самими функціями, що й у сервісах, тож зміна запиту в сервісі одразу
+    перевіряється тут.
+    """
+    from models import Ticket, TicketArchive, Flight, User
+    from pagination import PageRequest, page_query
+    from services.seat_map_service import _sold_seats_query
+    from services.ticket_service import shift_tickets_query, _sold_tickets_query
+    from services.shift_service import shift_transactions_query
+    from services.cash_desk_service import _account_query
+    from services.quote_service import _latest_rate_query
+    from services.archive_service import _live_balances_query, _archived_balances_query, _archive_horizon_query
+    from services.flight_service import FLIGHT_SORT_KEYS, _flights_search, _flights_from_airport_query, _fares_query
+    from services.user_service import USER_SORT_KEYS, _users_query
+    now = datetime.now()
+    return [
+        PlanCheck(
+            'seat_map: продані місця рейсу',
+            lambda: _sold_seats_query(1),
+            'ix_ticket_flight_seat_status'
+        ),
+        PlanCheck(
+            'refund_ticket_web: квитки зміни',
+            lambda: shift_tickets_query(1),
+            'ix_ticket_shift_status'
+        ),
+        PlanCheck(
+            'dashboard: останні транзакції зміни',
+            lambda: shift_transactions_query(1),
+            'ix_transaction_shift_created',
+            sorted_by_index=True
+        ),
+        PlanCheck(
+            'sell_ticket: рахунок каси у валюті',
+            lambda: _account_query(1, 'UAH'),
+            'ix_cash_desk_account_desk_currency'
+        ),
+        PlanCheck(
+            'sell_ticket: актуальний курс',
+            lambda: _latest_rate_query('UAH', 'USD'),
+            'ix_exchange_rate_pair_valid',
+            sorted_by_index=True
+        ),
+        PlanCheck(
+            'balances_by_date: баланси рахунків на дату',
+            lambda: _live_balances_query([1, 2, 3], now),
+            'ix_transaction_account_created'
+        ),
+        PlanCheck(
+            'balances_by_date: архівні баланси до знімка',
+            lambda: _archived_balances_query([1, 2, 3], now),
+            'ix_transaction_archive_account_created'
+        ),
+        PlanCheck(
+            'sold_tickets: межа архіву квитків',
+            _archive_horizon_query,
+            'ix_ticket_archive_sold_at'
+        ),
+        PlanCheck(
+            'sold_tickets: квитки рейсу',
+            lambda: _sold_tickets_query(Ticket, {'flight_id': 1})[0],
+            'ix_ticket_flight_seat_sold'
+        ),
+        PlanCheck(
+            'sold_tickets: архівні квитки рейсу',
+            lambda: _sold_tickets_query(TicketArchive, {'flight_id': 1})[0],
+            'ix_ticket_archive_flight'
+        ),
+        PlanCheck(
+            'sold_tickets: архівні квитки за день',
+            lambda: _sold_tickets_query(TicketArchive, {'day': now.date()})[0],
+            'ix_ticket_archive_sold_at'
+        ),
+        PlanCheck(
+            'flights_by_airport: рейси з аеропорту',
+            lambda: _flights_from_airport_query(1),
+            'ix_flight_origin_airport'
+        ),
+        PlanCheck(
+            'list_users: сторінка за ім\'ям після курсора',
+            lambda: page_query(_users_query(''), User.id, USER_SORT_KEYS, PageRequest(sort='name', per_page=50, cursor=('M', 10))),
+            'ix_user_name',
+            sorted_by_index=True
+        ),
+        PlanCheck(
+            'list_flights: сторінка за часом відправлення',
+            lambda: page_query(_flights_search(''), Flight.id, FLIGHT_SORT_KEYS, PageRequest(sort='departure_time', descending=True, per_page=50)),
+            'ix_flight_departure',
+            sorted_by_index=True
+        ),
+        PlanCheck(
+            'list_flights: тарифи рейсів сторінки',
+            lambda: _fares_query([1, 2, 3]),
+            'ix_flight_fare_flight'
+        ),
+    ]
+
+def explain(db, statement):
+    """
+    Повертає рядки EXPLAIN QUERY PLAN для запиту.
+
+    Returns:
+        list: Описи кроків плану (стовпець detail)
+    """
+    compiled = statement.compile(dialect=db.engine.dialect, compile_kwargs={'literal_binds': True})
+    rows = db.session.execute(db.text(f"EXPLAIN QUERY PLAN {compiled}")).all()
+    return [row[-1] for row in rows]
+
+def check_seat_conflict(db):
+    """
+    Подвійний продаж місця: другий проданий квиток на те саме місце рейсу
+    має впасти на ix_ticket_flight_seat_sold, і sell_ticket має розпізнати
+    помилку як зайняте місце. Повернений квиток на тому ж місці не заважає.
+    Усі вставки відкочуються.
+
+    Returns:
+        list: Описи проблем (порожній, якщо все гаразд)
+    """
+    from sqlalchemy.exc import IntegrityError
+    from models import Ticket, TicketStatus
+    from services.ticket_service import _is_seat_conflict
+
+    def ticket(status):
+        # Неіснуючий рейс: SQLite не перевіряє зовнішні ключі, а рядок однаково відкочується
+        return Ticket(
+            flight_id=-1, flight_fare_id=-1, shift_id=-1, passenger_name='plan check', seat_number='1A',
+            price=0, currency_code='UAH', price_in_base=0, exchange_rate=1, status=status
+        )
+
+    problems = []
+    try:
+        db.session.add_all([ticket(TicketStatus.REFUNDED), ticket(TicketStatus.SOLD)])
+        try:
+            db.session.flush()
+        except IntegrityError as e:
+            problems.append(f"повернений квиток блокує продаж місця: {e.orig}")
+            return problems
+        db.session.add(ticket(TicketStatus.SOLD))
+        try:
+            db.session.flush()
+            problems.append("другий продаж того самого місця не відхилено")
+        except IntegrityError as e:
+            if not _is_seat_conflict(e):
+                problems.append(f"sell_ticket не розпізнає помилку як зайняте місце: {e.orig}")
+    finally:
+        db.session.rollback()
+    return problems
+
+def check_plans(app, db):
+    """
+    Перевіряє плани всіх гарячих запитів.
+
+    Returns:
+        tuple: (звіт: str, кількість невдалих перевірок: int)
+    """
+    lines = []
+    failures = 0
+    with app.app_context():
+        if db.engine.dialect.name != 'sqlite':
+            raise SystemExit("EXPLAIN QUERY PLAN підтримується лише для SQLite")
+        for check in hot_queries():
+            plan = explain(db, check.build())
+            problems = []
+            if not any(check.index in step for step in plan):
+                problems.append(f"не використано {check.index}")
+            if check.sorted_by_index and any('TEMP B-TREE' in step for step in plan):
+                problems.append("сортування через тимчасове B-дерево")
+            failures += bool(problems)
+            lines.append(f"{'FAIL' if problems else 'OK  '} {check.name}" + (f": {'; '.join(problems)}" if problems else ''))
+            lines.extend(f"       {step}" for step in plan)
+        problems = check_seat_conflict(db)
+        failures += bool(problems)
+        lines.append(f"{'FAIL' if problems else 'OK  '} sell_ticket: подвійний продаж місця (ix_ticket_flight_seat_sold)" + (f": {'; '.join(problems)}" if problems else ''))
+    return '\n'.join(lines), failures
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Перевірка використання індексів гарячими запитами")
+    parser.add_argument('--database-url', default='sqlite://', help="URL SQLite БД (за замовчуванням у пам'яті)")
+    args = parser.parse_args(argv)
+
+    app, db = prepare_environment(args.database_url)
+    create_schema(app, db)
+    report, failures = check_plans(app, db)
+    print(report)
+    if failures:
+        print(f"Запитів без очікуваного індексу: {failures}")
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
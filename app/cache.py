@@ -0,0 +1,65 @@
+import time
+import threading
+from collections import OrderedDict
+from metrics import cache_requests
+
+_missing = object()
+
+class TTLCache:
+    """
+    Невеликий потокобезпечний кеш у пам'яті процесу з часом життя записів.
+
+    Записи старші за ttl секунд вважаються відсутніми; при переповненні
+    витісняється найдавніше використаний запис. Звернення рахуються в
+    метриці cache_requests_total з міткою name.
+
+    Args:
+        name (str): Назва кешу для метрик
+        maxsize (int): Максимальна кількість записів
+        ttl (float): Час життя запису в секундах
+    """
+    def __init__(self, name, maxsize=1024, ttl=60):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = cache_requests.labels(name, 'hit')
+        self._misses = cache_requests.labels(name, 'miss')
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key, _missing)
+            if item is not _missing and item[1] > now:
+                self._data.move_to_end(key)
+                value = item[0]
+            else:
+                if item is not _missing:
+                    del self._data[key]
+                value = _missing
+        if value is _missing:
+            self._misses.inc()
+            return default
+        self._hits.inc()
+        return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            item = self._data.pop(key, None)
+        return item[0] if item is not None else None
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
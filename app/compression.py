@@ -0,0 +1,219 @@
+"""
+WSGI-проміжний шар стиснення відповідей (gzip або brotli).
+
+Стискаються лише текстові типи (COMPRESS_MIMETYPES) від COMPRESS_MIN_SIZE
+байт і лише якщо клієнт дозволяє кодування в Accept-Encoding. Відповіді з
+відомою довжиною стискаються цілком і отримують нову Content-Length;
+потокові (генератори без Content-Length) стискаються на льоту, з flush
+після кожного фрагмента, щоб клієнт отримував дані без затримки.
+
+Вже закодовані відповіді (Content-Encoding, наприклад стиснуті заздалегідь
+файли статики з assets) і двійкові типи (PDF, зображення, архіви)
+пропускаються без змін.
+"""
+import zlib
+import logging
+from werkzeug.datastructures import Headers
+from werkzeug.http import parse_accept_header, parse_cache_control_header
+from metrics import http_compressed_responses, http_compression_bytes
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+class _Gzip:
+    def __init__(self, level):
+        # wbits 16+MAX_WBITS — формат gzip із заголовком і CRC
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def process(self, chunk):
+        return self._compressor.compress(chunk)
+
+    def flush(self):
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush(zlib.Z_FINISH)
+
+class _Brotli:
+    def __init__(self, quality):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def process(self, chunk):
+        return self._compressor.process(chunk)
+
+    def flush(self):
+        return self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+class CompressionMiddleware:
+    """
+    Обгортка WSGI-застосунку, що стискає відповіді.
+
+    Args:
+        app: WSGI-застосунок (зазвичай flask_app.wsgi_app)
+        min_size (int): Мінімальний розмір тіла в байтах
+        mimetypes (iterable): Типи вмісту, які варто стискати
+        level (int): Рівень gzip (1–9)
+        brotli_quality (int): Якість brotli (0–11); brotli використовується, якщо встановлено
+    """
+    def __init__(self, app, min_size=1024, mimetypes=(), level=6, brotli_quality=4):
+        self.app = app
+        self.min_size = min_size
+        self.mimetypes = frozenset(mimetypes)
+        self.level = level
+        self.brotli_quality = brotli_quality
+
+    def _negotiate(self, environ):
+        if environ.get('REQUEST_METHOD') == 'HEAD':
+            return None
+        accept = parse_accept_header(environ.get('HTTP_ACCEPT_ENCODING'))
+        if brotli is not None and accept['br']:
+            return 'br'
+        if accept['gzip']:
+            return 'gzip'
+        return None
+
+    def _compressor(self, encoding):
+        return _Brotli(self.brotli_quality) if encoding == 'br' else _Gzip(self.level)
+
+    def _compressible(self, status, headers):
+        if not status.startswith('200') or 'Content-Encoding' in headers or 'Content-Range' in headers:
+            return False
+        mimetype = headers.get('Content-Type', '').split(';', 1)[0].strip().lower()
+        if mimetype not in self.mimetypes:
+            return False
+        if parse_cache_control_header(headers.get('Cache-Control')).no_transform:
+            return False
+        length = headers.get('Content-Length', type=int)
+        return length is None or length >= self.min_size
+
+    def __call__(self, environ, start_response):
+        encoding = self._negotiate(environ)
+        if encoding is None:
+            return self.app(environ, start_response)
+
+        captured = []
+
+        def capture(status, headers, exc_info=None):
+            captured[:] = [status, headers, exc_info]
+            # Застарілий write() WSGI Flask не використовує; тіло віддається ітератором
+            return self._write_unsupported
+
+        body = self.app(environ, capture)
+        chunks = iter(body)
+        buffered = []
+        if not captured:
+            # Застосунок-генератор викликає start_response під час першої ітерації
+            for chunk in chunks:
+                buffered.append(chunk)
+                if captured:
+                    break
+        status, response_headers, exc_info = captured
+        headers = Headers(response_headers)
+
+        if not self._compressible(status, headers):
+            start_response(status, response_headers, exc_info)
+            return body if not buffered else self._chain(buffered, chunks, body)
+
+        streamed = 'Content-Length' not in headers
+        if streamed:
+            # Довжина невідома: накопичуємо фрагменти до min_size, щоб вирішити, чи стискати
+            size = sum(len(chunk) for chunk in buffered)
+            while size < self.min_size:
+                chunk = next(chunks, None)
+                if chunk is None:
+                    start_response(status, response_headers, exc_info)
+                    return self._chain(buffered, chunks, body)
+                buffered.append(chunk)
+                size += len(chunk)
+
+        headers['Content-Encoding'] = encoding
+        headers['Vary'] = _add_vary(headers.get('Vary', ''))
+        etag = headers.get('ETag')
+        if etag and not etag.startswith('W/'):
+            # Стиснуте тіло — інше представлення, сильний ETag лишився б хибним
+            headers['ETag'] = 'W/' + etag
+        compressor = self._compressor(encoding)
+
+        if streamed:
+            headers.remove('Content-Length')
+            start_response(status, headers.to_wsgi_list(), exc_info)
+            return self._stream(compressor, encoding, buffered, chunks, body)
+
+        try:
+            data = b''.join(buffered) + b''.join(chunks)
+        finally:
+            _close(body)
+        compressed = compressor.process(data) + compressor.finish()
+        headers['Content-Length'] = str(len(compressed))
+        start_response(status, headers.to_wsgi_list(), exc_info)
+        self._count(encoding, len(data), len(compressed))
+        return [compressed]
+
+    def _stream(self, compressor, encoding, buffered, chunks, body):
+        original = compressed = 0
+        try:
+            for chunk in self._chain_chunks(buffered, chunks):
+                if not chunk:
+                    continue
+                original += len(chunk)
+                output = compressor.process(chunk) + compressor.flush()
+                compressed += len(output)
+                yield output
+            output = compressor.finish()
+            compressed += len(output)
+            yield output
+        finally:
+            _close(body)
+        self._count(encoding, original, compressed)
+
+    @staticmethod
+    def _chain_chunks(buffered, chunks):
+        yield from buffered
+        yield from chunks
+
+    def _chain(self, buffered, chunks, body):
+        try:
+            yield from self._chain_chunks(buffered, chunks)
+        finally:
+            _close(body)
+
+    @staticmethod
+    def _count(encoding, original, compressed):
+        http_compressed_responses.labels(encoding).inc()
+        http_compression_bytes.labels(encoding, 'original').inc(original)
+        http_compression_bytes.labels(encoding, 'compressed').inc(compressed)
+
+    @staticmethod
+    def _write_unsupported(data):
+        raise RuntimeError("CompressionMiddleware не підтримує write() з start_response")
+
+def _add_vary(vary):
+    values = [value.strip() for value in vary.split(',') if value.strip()]
+    if 'accept-encoding' not in (value.lower() for value in values) and '*' not in values:
+        values.append('Accept-Encoding')
+    return ', '.join(values)
+
+def _close(body):
+    close = getattr(body, 'close', None)
+    if close is not None:
+        close()
+
+def init_compression(app):
+    """Обгортає app.wsgi_app шаром стиснення, якщо COMPRESS_ENABLED."""
+    if not app.config['COMPRESS_ENABLED']:
+        return
+    app.wsgi_app = CompressionMiddleware(
+        app.wsgi_app,
+        min_size=app.config['COMPRESS_MIN_SIZE'],
+        mimetypes=app.config['COMPRESS_MIMETYPES'],
+        level=app.config['COMPRESS_LEVEL'],
+        brotli_quality=app.config['COMPRESS_BROTLI_QUALITY']
+    )
+    logger.info("Стиснення відповідей: gzip%s від %s байт", ', brotli' if brotli is not None else '', app.config['COMPRESS_MIN_SIZE'])
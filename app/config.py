@@ -5,4 +5,130 @@ load_dotenv()  # Загружаем переменные из .env
 
 class Config:
     SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL')
-    SQLALCHEMY_TRACK_MODIFICATIONS = False
\ No newline at end of file
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # Планувальник фонових задач
+    SCHEDULER_ENABLED = os.getenv('SCHEDULER_ENABLED', 'true').lower() == 'true'
+    SCHEDULER_LEASE_SECONDS = int(os.getenv('SCHEDULER_LEASE_SECONDS', '900'))
+    SCHEDULER_BACKOFF_BASE = int(os.getenv('SCHEDULER_BACKOFF_BASE', '30'))
+    SCHEDULER_BACKOFF_MAX = int(os.getenv('SCHEDULER_BACKOFF_MAX', '3600'))
+    SCHEDULER_POLL_INTERVAL = int(os.getenv('SCHEDULER_POLL_INTERVAL', '5'))
+    CSV_IMPORT_INTERVAL = int(os.getenv('CSV_IMPORT_INTERVAL', '60'))
+
+    # Карти місць рейсів у пам'яті воркера: кількість рейсів і час життя (с)
+    SEAT_MAP_CACHE_SIZE = int(os.getenv('SEAT_MAP_CACHE_SIZE', '2000'))
+    SEAT_MAP_CACHE_TTL = int(os.getenv('SEAT_MAP_CACHE_TTL', '30'))
+
+    # Котирування /quote: тарифи й курси в пам'яті воркера (с); курси з імпорту CSV підхоплюються після TTL
+    QUOTE_CACHE_TTL = int(os.getenv('QUOTE_CACHE_TTL', '60'))
+    QUOTE_CACHE_SIZE = int(os.getenv('QUOTE_CACHE_SIZE', '2000'))
+
+    # Архівування транзакцій і квитків закритих змін, старших за ARCHIVE_AFTER_MONTHS
+    ARCHIVE_ENABLED = os.getenv('ARCHIVE_ENABLED', 'true').lower() == 'true'
+    ARCHIVE_AFTER_MONTHS = int(os.getenv('ARCHIVE_AFTER_MONTHS', '12'))
+    ARCHIVE_BATCH_SIZE = int(os.getenv('ARCHIVE_BATCH_SIZE', '1000'))
+    ARCHIVE_INTERVAL = int(os.getenv('ARCHIVE_INTERVAL', '86400'))
+    ARCHIVE_LEASE_SECONDS = int(os.getenv('ARCHIVE_LEASE_SECONDS', '3600'))
+
+
+    # Інструментація SQL: Server-Timing, лог запитів і повільних SQL
+    SLOW_QUERY_THRESHOLD_MS = float(os.getenv('SLOW_QUERY_THRESHOLD_MS', '200'))
+    SERVER_TIMING_ENABLED = os.getenv('SERVER_TIMING_ENABLED', 'true').lower() == 'true'
+    REQUEST_DB_LOG_ENABLED = os.getenv('REQUEST_DB_LOG_ENABLED', 'true').lower() == 'true'
+
+    # Повтор транзакцій після взаємоблокувань і конфліктів серіалізації
+    DB_RETRY_ATTEMPTS = int(os.getenv('DB_RETRY_ATTEMPTS', '3'))
+    DB_RETRY_BASE_DELAY = float(os.getenv('DB_RETRY_BASE_DELAY', '0.05'))
+
+    # Логування: json або text, рівні окремих логерів у форматі "name=LEVEL,name=LEVEL"
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+    LOG_LEVELS = os.getenv('LOG_LEVELS', 'sqlalchemy.engine=WARNING,werkzeug=INFO')
+    LOG_FORMAT = os.getenv('LOG_FORMAT', 'json')
+    LOG_DIR = os.getenv('LOG_DIR')
+    LOG_MAX_BYTES = int(os.getenv('LOG_MAX_BYTES', str(10 * 1024 * 1024)))
+    LOG_BACKUP_COUNT = int(os.getenv('LOG_BACKUP_COUNT', '5'))
+
+    # Профілювальник запитів: режим cprofile або sampler, endpoint через кому
+    PROFILER_ENABLED = os.getenv('PROFILER_ENABLED', 'false').lower() == 'true'
+    PROFILER_MODE = os.getenv('PROFILER_MODE', 'cprofile')
+    PROFILER_ENDPOINTS = os.getenv('PROFILER_ENDPOINTS', '')
+    PROFILER_SAMPLE_RATE = float(os.getenv('PROFILER_SAMPLE_RATE', '0'))
+    PROFILER_SAMPLE_INTERVAL_MS = float(os.getenv('PROFILER_SAMPLE_INTERVAL_MS', '5'))
+    PROFILER_MAX_STACK_DEPTH = int(os.getenv('PROFILER_MAX_STACK_DEPTH', '64'))
+    # Спільний каталог налаштувань і знімків профілів воркерів (порожньо — лише поточний процес)
+    PROFILER_DIR = os.getenv('PROFILER_DIR')
+    PROFILER_SYNC_INTERVAL = float(os.getenv('PROFILER_SYNC_INTERVAL', '2'))
+
+    # Метрики Prometheus: каталог знімків воркерів (порожньо — лише поточний процес);
+    # /metrics доступний лише з METRICS_TOKEN (Authorization: Bearer), без нього — 404
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'true').lower() == 'true'
+    METRICS_DIR = os.getenv('METRICS_DIR')
+    METRICS_FLUSH_INTERVAL = int(os.getenv('METRICS_FLUSH_INTERVAL', '10'))
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+
+    # Кеш версій JWT у процесі: скільки секунд інші воркери можуть не бачити зміну пароля
+    TOKEN_VERSION_CACHE_TTL = int(os.getenv('TOKEN_VERSION_CACHE_TTL', '10'))
+
+    # Refresh-токени: термін дії (с), пільгове вікно для паралельних оновлень
+    # з кількох вкладок (с) і як часто чистити таблицю відкликаних токенів (с)
+    REFRESH_TOKEN_EXPIRES = int(os.getenv('REFRESH_TOKEN_EXPIRES', '43200'))
+    REFRESH_REUSE_GRACE = int(os.getenv('REFRESH_REUSE_GRACE', '30'))
+    REVOKED_TOKENS_PURGE_INTERVAL = int(os.getenv('REVOKED_TOKENS_PURGE_INTERVAL', '3600'))
+
+    # Вхід: обмежений пул bcrypt і ліміти спроб за email та IP
+    BCRYPT_WORKERS = int(os.getenv('BCRYPT_WORKERS', '0'))  # 0 — кількість CPU
+    BCRYPT_QUEUE_LIMIT = int(os.getenv('BCRYPT_QUEUE_LIMIT', '8'))
+    BCRYPT_TIMEOUT = float(os.getenv('BCRYPT_TIMEOUT', '5'))
+    LOGIN_RATE_LIMIT_ENABLED = os.getenv('LOGIN_RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+    LOGIN_EMAIL_MAX_ATTEMPTS = int(os.getenv('LOGIN_EMAIL_MAX_ATTEMPTS', '5'))
+    LOGIN_EMAIL_WINDOW = int(os.getenv('LOGIN_EMAIL_WINDOW', '300'))
+    LOGIN_IP_MAX_ATTEMPTS = int(os.getenv('LOGIN_IP_MAX_ATTEMPTS', '30'))
+    LOGIN_IP_WINDOW = int(os.getenv('LOGIN_IP_WINDOW', '60'))
+
+    # Вартість bcrypt: BCRYPT_ROUNDS фіксує її, 0 — калібрування під BCRYPT_TARGET_MS
+    BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', '0'))
+    BCRYPT_TARGET_MS = float(os.getenv('BCRYPT_TARGET_MS', '250'))
+    BCRYPT_MIN_ROUNDS = int(os.getenv('BCRYPT_MIN_ROUNDS', '12'))
+    BCRYPT_MAX_ROUNDS = int(os.getenv('BCRYPT_MAX_ROUNDS', '15'))
+
+    # Списки адмінки та JSON API: розмір сторінки за замовчуванням і максимальний
+    PAGINATION_PER_PAGE = int(os.getenv('PAGINATION_PER_PAGE', '50'))
+    PAGINATION_MAX_PER_PAGE = int(os.getenv('PAGINATION_MAX_PER_PAGE', '500'))
+
+    # Режим розробки (FLASK_ENV=development): налагоджувач і перезавантаження шаблонів при зміні
+    DEBUG = os.getenv('FLASK_ENV', 'production') == 'development'
+    TEMPLATES_AUTO_RELOAD = os.getenv('TEMPLATES_AUTO_RELOAD', str(DEBUG)).lower() == 'true'
+
+    # Скомпільовані шаблони Jinja на диску, спільні для воркерів (порожньо — вимкнено),
+    # і компіляція всіх шаблонів під час старту
+    JINJA_BYTECODE_CACHE_DIR = os.getenv('JINJA_BYTECODE_CACHE_DIR', 'data/jinja_cache')
+    JINJA_PRECOMPILE = os.getenv('JINJA_PRECOMPILE', 'true').lower() == 'true'
+
+    # Кеш фрагментів шаблонів ({% cache %}): розмір у процесі, час життя (с) і
+    # необов'язковий спільний для воркерів каталог (порожньо — лише процес)
+    FRAGMENT_CACHE_ENABLED = os.getenv('FRAGMENT_CACHE_ENABLED', 'true').lower() == 'true'
+    FRAGMENT_CACHE_SIZE = int(os.getenv('FRAGMENT_CACHE_SIZE', '256'))
+    FRAGMENT_CACHE_TTL = int(os.getenv('FRAGMENT_CACHE_TTL', '300'))
+    FRAGMENT_CACHE_DIR = os.getenv('FRAGMENT_CACHE_DIR', '')
+
+    # Статика: адреси з хешем вмісту і кешування на рік (у розробці вимкнено),
+    # стиснуті .gz/.br варіанти файлів від ASSETS_MIN_COMPRESS_SIZE байт
+    ASSETS_FINGERPRINT = os.getenv('ASSETS_FINGERPRINT', str(not DEBUG)).lower() == 'true'
+    ASSETS_BUILD_DIR = os.getenv('ASSETS_BUILD_DIR', 'data/assets')
+    ASSETS_PRECOMPRESS = os.getenv('ASSETS_PRECOMPRESS', 'true').lower() == 'true'
+    ASSETS_MIN_COMPRESS_SIZE = int(os.getenv('ASSETS_MIN_COMPRESS_SIZE', '256'))
+    ASSETS_MAX_AGE = int(os.getenv('ASSETS_MAX_AGE', '31536000'))
+
+    # Стиснення відповідей (gzip, brotli якщо встановлено): поріг розміру в байтах,
+    # рівні стиснення і текстові типи вмісту через кому
+    COMPRESS_ENABLED = os.getenv('COMPRESS_ENABLED', 'true').lower() == 'true'
+    COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', '1024'))
+    COMPRESS_LEVEL = int(os.getenv('COMPRESS_LEVEL', '6'))
+    COMPRESS_BROTLI_QUALITY = int(os.getenv('COMPRESS_BROTLI_QUALITY', '4'))
+    COMPRESS_MIMETYPES = [
+        mimetype.strip() for mimetype in os.getenv(
+            'COMPRESS_MIMETYPES',
+            'text/html,text/css,text/plain,text/csv,text/javascript,application/javascript,'
+            'application/json,application/xml,image/svg+xml'
+        ).split(',') if mimetype.strip()
+    ]
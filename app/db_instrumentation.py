@@ -0,0 +1,108 @@
+import re
+import time
+import logging
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+slow_query_logger = logging.getLogger('db.slow_query')
+request_logger = logging.getLogger('db.request')
+
+_whitespace = re.compile(r'\s+')
+
+# Поріг повільного запиту в мс (None — журнал вимкнено)
+_slow_query_threshold_ms = None
+
+def _redact_parameters(parameters, executemany):
+    """
+    Замінює значення параметрів на їхні типи, щоб у лог не потрапили паролі,
+    імена пасажирів тощо, але було видно форму запиту.
+    """
+    if executemany:
+        return f"<{len(parameters)} наборів параметрів>"
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Час старту зберігається в контексті виконання, а не в з'єднанні пулу:
+    # after_cursor_execute не викликається для запиту з помилкою, і контекст
+    # такого запиту просто відкидається разом із позначкою
+    if context is not None:
+        context._query_start_time = time.perf_counter()
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, '_query_start_time', None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    if has_request_context():
+        g.db_query_count = g.get('db_query_count', 0) + 1
+        g.db_query_time = g.get('db_query_time', 0.0) + elapsed
+    if _slow_query_threshold_ms is not None and elapsed * 1000 >= _slow_query_threshold_ms:
+        slow_query_logger.warning(
+            "Повільний SQL-запит %.1f мс: %s параметри=%s",
+            elapsed * 1000,
+            _whitespace.sub(' ', statement).strip()[:1000],
+            _redact_parameters(parameters, executemany)
+        )
+
+def init_db_instrumentation(app):
+    """
+    Підключає лічильник SQL-запитів на запит і журнал повільних запитів.
+
+    Для кожного HTTP-запиту рахуються кількість запитів до БД і сумарний
+    час у БД. Вони віддаються в заголовку Server-Timing (видно у вкладці
+    Network браузера) і пишуться одним структурованим рядком у лог
+    `db.request`. Запити, довші за SLOW_QUERY_THRESHOLD_MS, пишуться в
+    `db.slow_query` з текстом SQL і типами параметрів замість значень.
+    """
+    app.config.setdefault('SLOW_QUERY_THRESHOLD_MS', 200)
+    app.config.setdefault('SERVER_TIMING_ENABLED', True)
+    app.config.setdefault('REQUEST_DB_LOG_ENABLED', True)
+    global _slow_query_threshold_ms
+    _slow_query_threshold_ms = app.config['SLOW_QUERY_THRESHOLD_MS']
+
+    if not event.contains(Engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+
+    @app.before_request
+    def _start_request_timer():
+        g.request_started = time.perf_counter()
+        g.db_query_count = 0
+        g.db_query_time = 0.0
+
+    @app.after_request
+    def _report_db_usage(response):
+        started = g.get('request_started')
+        if started is None:
+            return response
+        total_ms = (time.perf_counter() - started) * 1000
+        db_ms = g.get('db_query_time', 0.0) * 1000
+        queries = g.get('db_query_count', 0)
+        if app.config['SERVER_TIMING_ENABLED']:
+            response.headers.add(
+                'Server-Timing',
+                f'db;dur={db_ms:.2f};desc="{queries} queries", app;dur={total_ms:.2f}'
+            )
+        if app.config['REQUEST_DB_LOG_ENABLED']:
+            request_logger.info(
+                "method=%s path=%s endpoint=%s status=%s duration_ms=%.1f db_queries=%s db_time_ms=%.1f",
+                request.method, request.path, request.endpoint, response.status_code, total_ms, queries, db_ms,
+                extra={'request_stats': {
+                    'method': request.method,
+                    'path': request.path,
+                    'endpoint': request.endpoint,
+                    'status': response.status_code,
+                    'duration_ms': round(total_ms, 1),
+                    'db_queries': queries,
+                    'db_time_ms': round(db_ms, 1)
+                }}
+            )
+        return response
+
+    logger.debug("Інструментацію SQL увімкнено, поріг повільних запитів %s мс", _slow_query_threshold_ms)
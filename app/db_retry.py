@@ -0,0 +1,56 @@
+import time
+import random
+import logging
+from functools import wraps
+from flask import current_app
+from sqlalchemy.exc import DBAPIError
+from database import db
+from metrics import db_transaction_retries
+
+logger = logging.getLogger(__name__)
+
+# Ознаки тимчасових конфліктів: MSSQL 1205 (жертва взаємоблокування),
+# 3960 (конфлікт snapshot isolation), SQLSTATE 40001, SQLite "database is locked"
+_TRANSIENT_MARKERS = ('1205', '3960', '40001', 'deadlock', 'database is locked')
+
+def is_transient_error(error):
+    """
+    Перевіряє, чи помилка БД є тимчасовим конфліктом, після якого транзакцію
+    можна безпечно повторити.
+
+    Args:
+        error (Exception): Виняток
+
+    Returns:
+        bool: True для взаємоблокувань і конфліктів серіалізації
+    """
+    if not isinstance(error, DBAPIError):
+        return False
+    message = str(error.orig).lower()
+    return any(marker in message for marker in _TRANSIENT_MARKERS)
+
+def retry_on_conflict(func):
+    """
+    Декоратор: повторює транзакцію після rollback, якщо БД повернула тимчасовий
+    конфлікт. Функція має сама робити commit і не перехоплювати винятки БД.
+
+    Кількість спроб — DB_RETRY_ATTEMPTS, затримка — експоненційна від
+    DB_RETRY_BASE_DELAY із випадковим розкидом, щоб конкуруючі запити не
+    повторювались синхронно.
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        attempts = current_app.config['DB_RETRY_ATTEMPTS']
+        for attempt in range(1, attempts + 1):
+            try:
+                return func(*args, **kwargs)
+            except DBAPIError as e:
+                db.session.rollback()
+                if attempt >= attempts or not is_transient_error(e):
+                    raise
+                delay = current_app.config['DB_RETRY_BASE_DELAY'] * 2 ** (attempt - 1) * random.uniform(0.5, 1.5)
+                db_transaction_retries.labels(func.__name__).inc()
+                logger.warning("Конфлікт транзакції %s (спроба %s/%s), повтор через %.3f с: %s",
+                               func.__name__, attempt, attempts, delay, e.orig)
+                time.sleep(delay)
+    return wrapper
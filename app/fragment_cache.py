@@ -0,0 +1,188 @@
+"""
+Кеш фрагментів шаблонів: блок {% cache 'ключ'[, ttl] %}...{% endcache %}.
+
+Відрендерений HTML блоку зберігається в TTLCache процесу і, якщо задано
+FRAGMENT_CACHE_DIR, у спільному для воркерів каталозі. До ключа додається
+версія каталогу (versioning.catalogue_stamp), тож новий аеропорт, рейс або
+тариф робить усі фрагменти застарілими без явного скидання кешу.
+
+Дані для блоку мають читатися всередині нього (глобальні функції шаблонів
+на кшталт catalogue_airports), а не в маршруті: тоді при влучанні в кеш
+запитів до БД, крім версії каталогу, немає зовсім.
+"""
+import os
+import time
+import hashlib
+import logging
+import tempfile
+from flask import g, current_app, has_app_context
+from jinja2 import nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+from cache import TTLCache
+from database import db
+from versioning import catalogue_stamp
+
+logger = logging.getLogger(__name__)
+
+_cache = None
+
+def _local_cache():
+    global _cache
+    if _cache is None:
+        _cache = TTLCache(
+            'template_fragments',
+            maxsize=current_app.config['FRAGMENT_CACHE_SIZE'],
+            ttl=current_app.config['FRAGMENT_CACHE_TTL']
+        )
+    return _cache
+
+def _catalogue_version():
+    # Один запит версії на HTTP-запит, скільки б фрагментів не було на сторінці
+    version = g.get('_catalogue_version')
+    if version is None:
+        version = g._catalogue_version = catalogue_stamp()
+    return version
+
+class SharedFragmentStore:
+    """
+    Фрагменти у файлах спільного каталогу: воркер, що першим відрендерив
+    блок, зберігає його для інших. Час життя перевіряється за mtime файлу,
+    прострочені файли видаляються не частіше ніж раз на ttl секунд.
+
+    Args:
+        directory (str): Каталог файлів
+        ttl (float): Час життя фрагмента за замовчуванням у секундах
+    """
+    def __init__(self, directory, ttl):
+        self.directory = directory
+        self.ttl = ttl
+        self._purged_at = time.time()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha1(key.encode('utf-8')).hexdigest() + '.html')
+
+    def get(self, key, ttl):
+        path = self._path(key)
+        try:
+            if os.path.getmtime(path) + ttl < time.time():
+                return None
+            with open(path, encoding='utf-8') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def set(self, key, value):
+        # Запис через тимчасовий файл: інші воркери не прочитають половину фрагмента
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(value)
+            os.replace(tmp_path, self._path(key))
+        except OSError as e:
+            logger.warning("Не вдалося зберегти фрагмент у %s: %s", self.directory, e)
+            return
+        if self._purged_at + self.ttl < time.time():
+            self.purge()
+
+    def purge(self):
+        """Видаляє прострочені фрагменти, зокрема для старих версій каталогу."""
+        self._purged_at = now = time.time()
+        removed = 0
+        for entry in os.scandir(self.directory):
+            try:
+                if entry.stat().st_mtime + self.ttl < now:
+                    os.remove(entry.path)
+                    removed += 1
+            except OSError:
+                continue
+        if removed:
+            logger.debug("Видалено %s прострочених фрагментів шаблонів", removed)
+        return removed
+
+def render_fragment(key, ttl, render):
+    """
+    Повертає фрагмент з кешу або рендерить і зберігає його.
+
+    Args:
+        key (str): Ключ фрагмента з шаблону
+        ttl (float | None): Час життя в секундах (None — FRAGMENT_CACHE_TTL)
+        render (callable): Рендер тіла блоку
+
+    Returns:
+        Markup: HTML фрагмента
+    """
+    if not has_app_context() or not current_app.config['FRAGMENT_CACHE_ENABLED']:
+        return render()
+    try:
+        full_key = f"{key}|{_catalogue_version()!r}"
+    except Exception as e:
+        # Без версії каталогу кешований фрагмент міг би бути застарілим
+        logger.error("Помилка обчислення версії каталогу для фрагмента %s: %s", key, e)
+        db.session.rollback()
+        return render()
+    if ttl is None:
+        ttl = current_app.config['FRAGMENT_CACHE_TTL']
+    local = _local_cache()
+    value = local.get(full_key)
+    if value is not None:
+        return value
+    shared = current_app.extensions.get('fragment_store')
+    if shared is not None:
+        stored = shared.get(full_key, ttl)
+        if stored is not None:
+            value = Markup(stored)
+            local.set(full_key, value, ttl)
+            return value
+    g.pop('_fragment_uncacheable', None)
+    value = Markup(render())
+    if g.pop('_fragment_uncacheable', False):
+        return value
+    local.set(full_key, value, ttl)
+    if shared is not None:
+        shared.set(full_key, str(value))
+    return value
+
+def skip_fragment_cache():
+    """
+    Не зберігати фрагмент, що зараз рендериться: джерело даних повернуло
+    заглушку через помилку, і кешувати її на весь ttl не можна.
+    """
+    if has_app_context():
+        g._fragment_uncacheable = True
+
+def clear_fragments():
+    """Очищає кеш фрагментів поточного процесу."""
+    if _cache is not None:
+        _cache.clear()
+
+class FragmentCacheExtension(Extension):
+    """Тег {% cache key[, ttl] %}...{% endcache %}."""
+    tags = {'cache'}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        args = [parser.parse_expression()]
+        if parser.stream.skip_if('comma'):
+            args.append(parser.parse_expression())
+        else:
+            args.append(nodes.Const(None))
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+        return nodes.CallBlock(self.call_method('_render', args), [], [], body).set_lineno(lineno)
+
+    def _render(self, key, ttl, caller):
+        return render_fragment(str(key), ttl, caller)
+
+def init_fragment_cache(app):
+    """
+    Реєструє тег {% cache %} і, якщо задано FRAGMENT_CACHE_DIR, спільне
+    сховище фрагментів. Викликається до init_templates: шаблони з тегом
+    компілюються лише з розширенням.
+    """
+    app.jinja_env.add_extension(FragmentCacheExtension)
+    cache_dir = app.config['FRAGMENT_CACHE_DIR']
+    if cache_dir:
+        app.extensions['fragment_store'] = SharedFragmentStore(
+            os.path.join(app.root_path, cache_dir), app.config['FRAGMENT_CACHE_TTL']
+        )
@@ -4,18 +4,19 @@ from datetime import datetime, timedelta
 from faker import Faker
 import random
 import logging
+import argparse
+from decimal import Decimal
+from sqlalchemy import insert, select, update, func
 from app import app, db
-from models import Airport, Flight
+from logging_config import configure_logging
+from models import (
+    Airport, Flight, FlightFare, CashDesk, CashDeskAccount, User, Role, Shift, ShiftStatus,
+    Ticket, TicketStatus, Transaction, TransactionType, ExchangeRate
+)
+from services.seat_map_service import SeatLayout
 
 # Налаштування логування
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler('logs/generate_csv.log')
-    ]
-)
+configure_logging(app.config, 'generate_csv.log')
 logger = logging.getLogger(__name__)
 
 # Ініціалізація Faker
@@ -75,7 +76,7 @@ def get_existing_airports():
                 } for airport in airports
             ]
     except Exception as e:
-        logger.error(f"Помилка отримання аеропортів: {e}")
+        logger.error("Помилка отримання аеропортів: %s", e)
         return []
 
 def get_existing_flights():
@@ -91,7 +92,7 @@ def get_existing_flights():
                 } for flight in flights
             }
     except Exception as e:
-        logger.error(f"Помилка отримання рейсів: {e}")
+        logger.error("Помилка отримання рейсів: %s", e)
         return {}
 
 def generate_airports_csv(num_new_airports=3):
@@ -100,7 +101,7 @@ def generate_airports_csv(num_new_airports=3):
     fieldnames = ['code', 'name', 'location']
 
     existing_airports = get_existing_airports()
-    logger.info(f"Знайдено {len(existing_airports)} існуючих аеропортів")
+    logger.info("Знайдено %s існуючих аеропортів", len(existing_airports))
 
     # Фільтруємо реальні аеропорти, які ще не існують у БД
     existing_codes = {airport['code'] for airport in existing_airports}
@@ -134,7 +135,7 @@ def generate_airports_csv(num_new_airports=3):
                 'location': airport_data['location']
             })
 
-    logger.info(f"Оновлено airports.csv: {len(existing_airports)} існуючих + {len(new_airports)} нових з реального списку")
+    logger.info("Оновлено airports.csv: %s існуючих + %s нових з реального списку", len(existing_airports), len(new_airports))
     return existing_airports + new_airports
 
 def generate_flights_csv(airports, num_new_flights=5):
@@ -146,7 +147,7 @@ def generate_flights_csv(airports, num_new_flights=5):
     ]
 
     existing_flights = get_existing_flights()
-    logger.info(f"Знайдено {len(existing_flights)} існуючих рейсів")
+    logger.info("Знайдено %s існуючих рейсів", len(existing_flights))
 
     new_flights = []
     used_flight_numbers = set(existing_flights.keys())
@@ -202,7 +203,7 @@ def generate_flights_csv(airports, num_new_flights=5):
                 'seat_capacity': seat_capacity
             })
 
-    logger.info(f"Оновлено flights.csv: додано {len(new_flights)} нових рейсів")
+    logger.info("Оновлено flights.csv: додано %s нових рейсів", len(new_flights))
     return new_flights
 
 def generate_flight_fares_csv(new_flights):
@@ -250,7 +251,7 @@ def generate_flight_fares_csv(new_flights):
                     'seats_sold': seats_sold
                 })
 
-    logger.info(f"Згенеровано тарифи для {len(new_flights)} рейсів у {fares_file} (сума seat_limit = seat_capacity)")
+    logger.info("Згенеровано тарифи для %s рейсів у %s (сума seat_limit = seat_capacity)", len(new_flights), fares_file)
 
 def generate_smart_csv(num_new_airports=3, num_new_flights=5):
     """Генерує розумні CSV-файли залежно від стану БД."""
@@ -267,9 +268,288 @@ def generate_smart_csv(num_new_airports=3, num_new_flights=5):
 
     logger.info("Генерація розумних CSV-файлів завершена")
 
+# Курси для бенчмарк-набору (базова валюта -> цільова)
+benchmark_rates = {
+    ('USD', 'UAH'): Decimal('41.5000'), ('UAH', 'USD'): Decimal('0.0241'),
+    ('EUR', 'UAH'): Decimal('45.0000'), ('UAH', 'EUR'): Decimal('0.0222'),
+    ('USD', 'EUR'): Decimal('0.9222'), ('EUR', 'USD'): Decimal('1.0843'),
+}
+
+# Кількість місць у ряду для нумерації місць "12A"
+seat_letters = 'ABCDEF'
+
+def _insert_returning_ids(model, rows):
+    """Пакетна вставка з поверненням ID у порядку рядків."""
+    if not rows:
+        return []
+    result = db.session.scalars(insert(model).returning(model.id, sort_by_parameter_order=True), rows)
+    return list(result)
+
+def seat_label(index):
+    return f"{index // len(seat_letters) + 1}{seat_letters[index % len(seat_letters)]}"
+
+def generate_benchmark_data(num_flights=2000, num_tickets=100000, desks_per_airport=5, days=90,
+                            refund_ratio=0.05, batch_size=5000, seed=42):
+    """
+    Генерує реалістичний обсяг даних для бенчмарків прямо в БД.
+
+    На відміну від generate_smart_csv, дані пишуться пакетними INSERT через Core,
+    без Faker у гарячому циклі, тож генерація мільйонів квитків і транзакцій
+    займає хвилини, а не години. Баланси рахунків і seats_sold тарифів
+    узгоджуються з транзакціями та квитками наприкінці.
+
+    Args:
+        num_flights (int): Кількість рейсів
+        num_tickets (int): Кількість квитків (обмежена сумарною місткістю рейсів)
+        desks_per_airport (int): Кількість кас на аеропорт
+        days (int): Глибина історії змін у днях
+        refund_ratio (float): Частка повернених квитків
+        batch_size (int): Розмір пакета для вставки
+        seed (int): Зерно генератора випадкових чисел
+
+    Returns:
+        dict: Кількість створених записів за типами
+    """
+    rng = random.Random(seed)
+    started = datetime.now()
+    counts = {}
+    with app.app_context():
+        # Аеропорти
+        existing_codes = set(db.session.scalars(select(Airport.code)))
+        new_airports = [ap for ap in real_airports if ap['code'] not in existing_codes]
+        _insert_returning_ids(Airport, new_airports)
+        airport_ids = list(db.session.scalars(select(Airport.id)))
+        counts['airports'] = len(new_airports)
+
+        # Курси валют
+        now = datetime.now()
+        db.session.execute(insert(ExchangeRate), [
+            {'base_currency': base, 'target_currency': target, 'rate': rate, 'valid_at': now}
+            for (base, target), rate in benchmark_rates.items()
+        ])
+
+        # Рейси та тарифи
+        prefix = f"BM{rng.randint(100, 999)}"
+        flight_rows = []
+        for i in range(num_flights):
+            origin_id = rng.choice(airport_ids)
+            destination_id = rng.choice([a for a in airport_ids if a != origin_id])
+            departure_time = now + timedelta(days=rng.randint(-days, 60), minutes=rng.randint(0, 1439))
+            flight_rows.append({
+                'flight_number': f"{prefix}-{i:06d}",
+                'origin_airport_id': origin_id,
+                'destination_airport_id': destination_id,
+                'departure_time': departure_time,
+                'arrival_time': departure_time + timedelta(hours=rng.randint(1, 4)),
+                'aircraft_model': rng.choice(aircraft_models),
+                'seat_capacity': rng.choice([120, 150, 180, 210, 240, 300])
+            })
+        flights = []
+        for start in range(0, len(flight_rows), batch_size):
+            chunk = flight_rows[start:start + batch_size]
+            flights.extend(zip(_insert_returning_ids(Flight, chunk), chunk))
+        counts['flights'] = len(flights)
+
+        fare_rows = []
+        for flight_id, flight in flights:
+            capacity = flight['seat_capacity']
+            names = rng.sample(fare_names, rng.randint(1, len(fare_names)))
+            limits = [capacity // len(names)] * len(names)
+            limits[-1] += capacity - sum(limits)
+            for name, limit in zip(names, limits):
+                fare_rows.append({
+                    'flight_id': flight_id,
+                    'name': name,
+                    'base_price': Decimal(str(round(rng.uniform(50, 500), 2))),
+                    'base_currency': rng.choice(currencies),
+                    'seat_limit': limit,
+                    'seats_sold': 0
+                })
+        fares = []
+        for start in range(0, len(fare_rows), batch_size):
+            chunk = fare_rows[start:start + batch_size]
+            fares.extend(zip(_insert_returning_ids(FlightFare, chunk), chunk))
+        counts['flight_fares'] = len(fares)
+
+        # Каси, рахунки та касири
+        password_hash = db.session.scalar(select(User.password_hash).limit(1)) or 'benchmark'
+        desks = []
+        for airport_id in airport_ids:
+            desk_rows = [
+                {'airport_id': airport_id, 'name': f"{prefix} Каса {n + 1}", 'is_active': True}
+                for n in range(desks_per_airport)
+            ]
+            desks.extend(zip(_insert_returning_ids(CashDesk, desk_rows), [airport_id] * len(desk_rows)))
+        account_rows = [
+            {'cash_desk_id': desk_id, 'currency_code': code, 'balance': 0, 'last_updated': now}
+            for desk_id, _ in desks for code in ('USD', 'UAH', 'EUR')
+        ]
+        account_ids = _insert_returning_ids(CashDeskAccount, account_rows)
+        accounts = {(row['cash_desk_id'], row['currency_code']): account_id for account_id, row in zip(account_ids, account_rows)}
+        cashier_rows = [
+            {
+                'name': f"Касир {desk_id}",
+                'email': f"{prefix.lower()}-cashier-{desk_id}@example.com",
+                'password_hash': password_hash,
+                'role': Role.CASHIER,
+                'created_at': now,
+                'password_changed': True,
+                'airport_id': airport_id
+            } for desk_id, airport_id in desks
+        ]
+        cashier_ids = _insert_returning_ids(User, cashier_rows)
+        counts['cash_desks'] = len(desks)
+        counts['cashiers'] = len(cashier_ids)
+
+        # Зміни: одна на касу на день, остання залишається відкритою
+        shift_rows = []
+        for (desk_id, airport_id), cashier_id in zip(desks, cashier_ids):
+            for day in range(days, -1, -1):
+                opened_at = (now - timedelta(days=day)).replace(hour=6, minute=0, second=0, microsecond=0)
+                is_open = day == 0
+                shift_rows.append({
+                    'cash_desk_id': desk_id,
+                    'cashier_id': cashier_id,
+                    'opened_at': opened_at,
+                    'closed_at': None if is_open else opened_at + timedelta(hours=12),
+                    'status': ShiftStatus.OPEN if is_open else ShiftStatus.CLOSED
+                })
+        shifts_by_desk = {}
+        for start in range(0, len(shift_rows), batch_size):
+            chunk = shift_rows[start:start + batch_size]
+            for shift_id, row in zip(_insert_returning_ids(Shift, chunk), chunk):
+                shifts_by_desk.setdefault(row['cash_desk_id'], []).append((shift_id, row['opened_at']))
+        counts['shifts'] = len(shift_rows)
+
+        # Квитки та транзакції
+        desks_by_airport = {}
+        for desk_id, airport_id in desks:
+            desks_by_airport.setdefault(airport_id, []).append(desk_id)
+        fares_by_flight = {}
+        for fare_id, fare in fares:
+            fares_by_flight.setdefault(fare['flight_id'], []).append((fare_id, fare))
+        seats_taken = {}
+        seats_sold = {}
+        total_capacity = sum(flight['seat_capacity'] for _, flight in flights)
+        if num_tickets > total_capacity:
+            logger.warning("Кількість квитків %s перевищує місткість рейсів %s, буде створено %s", num_tickets, total_capacity, total_capacity)
+            num_tickets = total_capacity
+        open_flights = [(flight_id, flight) for flight_id, flight in flights]
+        ticket_batch = []
+        created_tickets = 0
+        created_transactions = 0
+
+        def flush_tickets():
+            nonlocal created_transactions
+            ticket_ids = _insert_returning_ids(Ticket, [row for row, _ in ticket_batch])
+            transaction_rows = []
+            for ticket_id, (row, account_id) in zip(ticket_ids, ticket_batch):
+                transaction_rows.append({
+                    'shift_id': row['shift_id'], 'account_id': account_id, 'type': TransactionType.SALE,
+                    'amount': row['price'], 'currency_code': row['currency_code'],
+                    'reference_type': 'ticket', 'reference_id': ticket_id,
+                    'description': f"Продаж квитка для пасажира {row['passenger_name']}",
+                    'created_at': row['sold_at']
+                })
+                if row['status'] == TicketStatus.REFUNDED:
+                    transaction_rows.append({
+                        'shift_id': row['shift_id'], 'account_id': account_id, 'type': TransactionType.REFUND,
+                        'amount': -row['price'], 'currency_code': row['currency_code'],
+                        'reference_type': 'ticket', 'reference_id': ticket_id,
+                        'description': f"Повернення квитка для пасажира {row['passenger_name']}",
+                        'created_at': row['sold_at'] + timedelta(minutes=30)
+                    })
+            db.session.execute(insert(Transaction), transaction_rows)
+            db.session.commit()
+            created_transactions += len(transaction_rows)
+            ticket_batch.clear()
+
+        first_names = [fake.first_name() for _ in range(200)]
+        last_names = [fake.last_name() for _ in range(200)]
+        while created_tickets < num_tickets and open_flights:
+            index = rng.randrange(len(open_flights))
+            flight_id, flight = open_flights[index]
+            seat_index = seats_taken.get(flight_id, 0)
+            if seat_index >= flight['seat_capacity']:
+                open_flights[index] = open_flights[-1]
+                open_flights.pop()
+                continue
+            fare_id, fare = next(
+                ((fid, f) for fid, f in fares_by_flight[flight_id] if seats_sold.get(fid, 0) < f['seat_limit']),
+                (None, None)
+            )
+            if fare_id is None:
+                open_flights[index] = open_flights[-1]
+                open_flights.pop()
+                continue
+            seats_taken[flight_id] = seat_index + 1
+            desk_id = rng.choice(desks_by_airport[flight['origin_airport_id']])
+            shift_id, opened_at = rng.choice(shifts_by_desk[desk_id])
+            currency_code = rng.choice(['USD', 'UAH', 'EUR'])
+            price_in_base = fare['base_price']
+            exchange_rate = benchmark_rates.get((fare['base_currency'], currency_code), Decimal('1.0'))
+            price = (price_in_base * exchange_rate).quantize(Decimal('0.01'))
+            refunded = rng.random() < refund_ratio
+            if not refunded:
+                seats_sold[fare_id] = seats_sold.get(fare_id, 0) + 1
+            ticket_batch.append(({
+                'flight_id': flight_id,
+                'flight_fare_id': fare_id,
+                'shift_id': shift_id,
+                'passenger_name': f"{rng.choice(first_names)} {rng.choice(last_names)}",
+                'seat_number': SeatLayout.for_flight(flight['aircraft_model'], flight['seat_capacity']).label(seat_index),
+                'price': price,
+                'currency_code': currency_code,
+                'price_in_base': price_in_base,
+                'exchange_rate': exchange_rate,
+                'sold_at': opened_at + timedelta(minutes=rng.randint(0, 719)),
+                'status': TicketStatus.REFUNDED if refunded else TicketStatus.SOLD
+            }, accounts[(desk_id, currency_code)]))
+            created_tickets += 1
+            if len(ticket_batch) >= batch_size:
+                flush_tickets()
+                logger.info("Згенеровано %s/%s квитків", created_tickets, num_tickets)
+        if ticket_batch:
+            flush_tickets()
+        counts['tickets'] = created_tickets
+        counts['transactions'] = created_transactions
+
+        # Узгодження seats_sold і балансів з квитками та транзакціями
+        fare_updates = [{'id': fare_id, 'seats_sold': sold} for fare_id, sold in seats_sold.items()]
+        for start in range(0, len(fare_updates), batch_size):
+            db.session.execute(update(FlightFare), fare_updates[start:start + batch_size])
+        balances = db.session.execute(
+            select(Transaction.account_id, func.sum(Transaction.amount))
+            .where(Transaction.account_id.in_(account_ids))
+            .group_by(Transaction.account_id)
+        ).all()
+        db.session.execute(update(CashDeskAccount), [
+            {'id': account_id, 'balance': balance} for account_id, balance in balances
+        ])
+        db.session.commit()
+    logger.info("Бенчмарк-набір згенеровано за %s: %s", datetime.now() - started, counts)
+    return counts
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Генерація CSV-файлів або бенчмарк-набору даних")
+    parser.add_argument('--benchmark', action='store_true', help="Згенерувати бенчмарк-набір прямо в БД")
+    parser.add_argument('--flights', type=int, default=2000)
+    parser.add_argument('--tickets', type=int, default=100000)
+    parser.add_argument('--desks-per-airport', type=int, default=5)
+    parser.add_argument('--days', type=int, default=90)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
     try:
-        generate_smart_csv(num_new_airports=2, num_new_flights=3)
+        if args.benchmark:
+            generate_benchmark_data(
+                num_flights=args.flights,
+                num_tickets=args.tickets,
+                desks_per_airport=args.desks_per_airport,
+                days=args.days,
+                seed=args.seed
+            )
+        else:
+            generate_smart_csv(num_new_airports=2, num_new_flights=3)
     except Exception as e:
-        logger.error(f"Помилка генерації CSV: {e}")
+        logger.error("Помилка генерації CSV: %s", e)
         raise
\ No newline at end of file
@@ -4,17 +4,9 @@ from datetime import datetime
 from sqlalchemy.exc import IntegrityError
 from models import Airport, Flight, FlightFare
 from services.flight_service import create_flight, create_flight_fare
+from metrics import csv_import_duration, csv_import_failures
 import logging
 
-# Налаштування логування
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler('logs/import_csv.log')
-    ]
-)
 logger = logging.getLogger(__name__)
 
 # Шлях до папки з CSV
@@ -24,7 +16,7 @@ def import_airports(db):
     """Імпортує нові аеропорти з airports.csv."""
     airports_file = os.path.join(data_dir, 'airports.csv')
     if not os.path.exists(airports_file):
-        logger.warning(f"Файл {airports_file} не знайдено, пропускаємо імпорт аеропортів")
+        logger.warning("Файл %s не знайдено, пропускаємо імпорт аеропортів", airports_file)
         return True, {}
 
     imported_count = 0
@@ -38,7 +30,7 @@ def import_airports(db):
                 # Перевірка унікальності code
                 existing_airport = db.session.query(Airport).filter_by(code=code).first()
                 if existing_airport:
-                    logger.info(f"Аеропорт {code} уже існує")
+                    logger.info("Аеропорт %s уже існує", code)
                     skipped_count += 1
                     continue
 
@@ -51,20 +43,20 @@ def import_airports(db):
                 db.session.add(airport)
                 db.session.commit()
                 imported_count += 1
-                logger.info(f"Імпортовано новий аеропорт {code}")
+                logger.info("Імпортовано новий аеропорт %s", code)
             except Exception as e:
-                logger.error(f"Помилка обробки аеропорту {row.get('code', 'unknown')}: {e}")
+                logger.error("Помилка обробки аеропорту %s: %s", row.get('code', 'unknown'), e)
                 skipped_count += 1
                 db.session.rollback()
 
-    logger.info(f"Імпорт аеропортів: імпортовано {imported_count}, пропущено {skipped_count}")
+    logger.info("Імпорт аеропортів: імпортовано %s, пропущено %s", imported_count, skipped_count)
     return True, {}
 
 def import_flights(db):
     """Імпортує рейси з flights.csv, використовуючи airport_code."""
     flights_file = os.path.join(data_dir, 'flights.csv')
     if not os.path.exists(flights_file):
-        logger.warning(f"Файл {flights_file} не знайдено, пропускаємо імпорт рейсів")
+        logger.warning("Файл %s не знайдено, пропускаємо імпорт рейсів", flights_file)
         return True, {}
 
     flight_id_map = {}  # flight_number -> real_id
@@ -80,7 +72,7 @@ def import_flights(db):
                 # Перевірка унікальності flight_number
                 existing_flight = db.session.query(Flight).filter_by(flight_number=flight_number).first()
                 if existing_flight:
-                    logger.info(f"Рейс {flight_number} уже існує")
+                    logger.info("Рейс %s уже існує", flight_number)
                     flight_id_map[flight_number] = existing_flight.id
                     skipped_count += 1
                     continue
@@ -90,7 +82,7 @@ def import_flights(db):
                 destination_airport = db.session.query(Airport).filter_by(code=row['destination_airport_code']).first()
                 
                 if not origin_airport or not destination_airport:
-                    logger.error(f"Не знайдено аеропорти для рейсу {flight_number}: {row['origin_airport_code']} -> {row['destination_airport_code']}")
+                    logger.error("Не знайдено аеропорти для рейсу %s: %s -> %s", flight_number, row['origin_airport_code'], row['destination_airport_code'])
                     skipped_count += 1
                     continue
 
@@ -108,25 +100,25 @@ def import_flights(db):
                 if success:
                     flight_id_map[flight_number] = flight_data['id']
                     imported_count += 1
-                    logger.info(f"Імпортовано рейс {flight_number}")
+                    logger.info("Імпортовано рейс %s", flight_number)
                 else:
-                    logger.error(f"Помилка імпорту рейсу {flight_number}: {error_msg}")
+                    logger.error("Помилка імпорту рейсу %s: %s", flight_number, error_msg)
                     skipped_count += 1
                     
             except Exception as e:
-                logger.error(f"Помилка обробки рейсу {row.get('flight_number', 'unknown')}: {e}")
+                logger.error("Помилка обробки рейсу %s: %s", row.get('flight_number', 'unknown'), e)
                 skipped_count += 1
                 db.session.rollback()
 
     db.session.commit()
-    logger.info(f"Імпорт рейсів: імпортовано {imported_count}, пропущено {skipped_count}")
+    logger.info("Імпорт рейсів: імпортовано %s, пропущено %s", imported_count, skipped_count)
     return True, flight_id_map
 
 def import_flight_fares(db, flight_id_map):
     """Імпортує тарифи з flight_fares.csv, використовуючи flight_number."""
     fares_file = os.path.join(data_dir, 'flight_fares.csv')
     if not os.path.exists(fares_file):
-        logger.warning(f"Файл {fares_file} не знайдено, пропускаємо імпорт тарифів")
+        logger.warning("Файл %s не знайдено, пропускаємо імпорт тарифів", fares_file)
         return True, {}
 
     imported_count = 0
@@ -145,7 +137,7 @@ def import_flight_fares(db, flight_id_map):
                     if flight:
                         flight_id = flight.id
                     else:
-                        logger.error(f"Рейс {flight_number} не знайдено для тарифу {row['name']}")
+                        logger.error("Рейс %s не знайдено для тарифу %s", flight_number, row['name'])
                         skipped_count += 1
                         continue
 
@@ -154,7 +146,7 @@ def import_flight_fares(db, flight_id_map):
                     flight_id=flight_id, name=row['name']
                 ).first()
                 if existing_fare:
-                    logger.info(f"Тариф {row['name']} для рейсу {flight_number} уже існує")
+                    logger.info("Тариф %s для рейсу %s уже існує", row['name'], flight_number)
                     skipped_count += 1
                     continue
 
@@ -169,40 +161,46 @@ def import_flight_fares(db, flight_id_map):
                 
                 if success:
                     imported_count += 1
-                    logger.info(f"Імпортовано тариф {row['name']} для рейсу {flight_number}")
+                    logger.info("Імпортовано тариф %s для рейсу %s", row['name'], flight_number)
                 else:
-                    logger.error(f"Помилка імпорту тарифу {row['name']} для {flight_number}: {error_msg}")
+                    logger.error("Помилка імпорту тарифу %s для %s: %s", row['name'], flight_number, error_msg)
                     skipped_count += 1
                     
             except Exception as e:
-                logger.error(f"Помилка обробки тарифу {row.get('name', 'unknown')}: {e}")
+                logger.error("Помилка обробки тарифу %s: %s", row.get('name', 'unknown'), e)
                 skipped_count += 1
                 db.session.rollback()
 
     db.session.commit()
-    logger.info(f"Імпорт тарифів: імпортовано {imported_count}, пропущено {skipped_count}")
+    logger.info("Імпорт тарифів: імпортовано %s, пропущено %s", imported_count, skipped_count)
     return True, {}
 
 def import_csv_data(app, db):
     """Основна функція для імпорту розумних CSV-файлів."""
-    with app.app_context():
+    with app.app_context(), csv_import_duration.labels('total').time():
         logger.info("Початок імпорту розумних CSV-файлів")
         
         # Імпорт аеропортів
-        success_airports, _ = import_airports(db)
+        with csv_import_duration.labels('airports').time():
+            success_airports, _ = import_airports(db)
         if not success_airports:
+            csv_import_failures.labels('airports').inc()
             logger.error("Помилка імпорту аеропортів")
             return False, "Помилка імпорту аеропортів"
         
         # Імпорт рейсів
-        success_flights, flight_id_map = import_flights(db)
+        with csv_import_duration.labels('flights').time():
+            success_flights, flight_id_map = import_flights(db)
         if not success_flights:
+            csv_import_failures.labels('flights').inc()
             logger.error("Помилка імпорту рейсів")
             return False, "Помилка імпорту рейсів"
         
         # Імпорт тарифів
-        success_fares, _ = import_flight_fares(db, flight_id_map)
+        with csv_import_duration.labels('fares').time():
+            success_fares, _ = import_flight_fares(db, flight_id_map)
         if not success_fares:
+            csv_import_failures.labels('fares').inc()
             logger.error("Помилка імпорту тарифів")
             return False, "Помилка імпорту тарифів"
         
@@ -211,6 +209,8 @@ def import_csv_data(app, db):
 
 if __name__ == "__main__":
     from app import app, db
+    from logging_config import configure_logging
+    configure_logging(app.config, 'import_csv.log')
     try:
         success, message = import_csv_data(app, db)
         if success:
@@ -218,4 +218,4 @@ if __name__ == "__main__":
         else:
             logger.error(message)
     except Exception as e:
-        logger.error(f"Критична помилка імпорту: {e}")
\ No newline at end of file
+        logger.error("Критична помилка імпорту: %s", e)
\ No newline at end of file
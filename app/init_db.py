@@ -12,18 +12,9 @@ from datetime import datetime, timezone
 from app import app
 from models import db, User, ExchangeRate
 from services.user_service import create_user
-# Створення папки logs
-log_dir = os.path.join(os.path.dirname(__file__), 'logs')
-os.makedirs(log_dir, exist_ok=True)
+from logging_config import configure_logging
 # Налаштування логування
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler(os.path.join(log_dir, 'init_db.log'))
-    ]
-)
+configure_logging(app.config, 'init_db.log')
 logger = logging.getLogger(__name__)
 load_dotenv()
 def wait_for_db(master_url, max_attempts=20, delay=5):
@@ -37,7 +28,7 @@ def wait_for_db(master_url, max_attempts=20, delay=5):
                 logger.info("SQL Server is ready")
                 return True
         except (DatabaseError, OperationalError) as e:
-            logger.warning(f"Attempt {attempt}/{max_attempts} - SQL Server not ready: {e}")
+            logger.warning("Attempt %s/%s - SQL Server not ready: %s", attempt, max_attempts, e)
             if attempt == max_attempts:
                 logger.error("Failed to connect to SQL Server after maximum attempts")
                 return False
@@ -53,7 +44,7 @@ def create_database():
         logger.error("DATABASE_URL not set in environment variables")
         raise ValueError("DATABASE_URL not set in environment variables")
     master_url = database_url.replace('flask_db', 'master')
-    logger.info(f"Using master URL: {master_url}")
+    logger.info("Using master URL: %s", master_url)
     if not wait_for_db(master_url):
         raise Exception("Cannot connect to SQL Server")
     # Створюємо двигун з AUTOCOMMIT для уникнення транзакцій
@@ -70,11 +61,11 @@ def create_database():
                 # Перевіряємо collation бази даних
                 result = conn.execute(text("SELECT DATABASEPROPERTYEX('flask_db', 'Collation') AS collation"))
                 collation = result.scalar()
-                logger.info(f"Current collation for flask_db: {collation}")
+                logger.info("Current collation for flask_db: %s", collation)
                 if collation != 'Cyrillic_General_CI_AS':
                     logger.warning("Database collation is not Cyrillic_General_CI_AS. Consider updating collation for proper Cyrillic support.")
     except (DatabaseError, OperationalError) as e:
-        logger.error(f"Error creating database: {e}")
+        logger.error("Error creating database: %s", e)
         raise
     finally:
         engine.dispose()
@@ -83,14 +74,14 @@ def apply_migrations():
     try:
         alembic_ini_path = "alembic.ini"
         if not os.path.exists(alembic_ini_path):
-            logger.error(f"Alembic config file not found at {alembic_ini_path}")
+            logger.error("Alembic config file not found at %s", alembic_ini_path)
             raise FileNotFoundError(f"Alembic config file not found at {alembic_ini_path}")
         logger.info("Applying Alembic migrations...")
         alembic_cfg = Config(alembic_ini_path)
         command.upgrade(alembic_cfg, "head")
         logger.info("Alembic migrations applied successfully")
     except Exception as e:
-        logger.error(f"Error applying migrations: {e}")
+        logger.error("Error applying migrations: %s", e)
         raise
 def create_initial_data():
     """Створює початкові дані: адміністратора та курси валют."""
@@ -108,7 +99,7 @@ def create_initial_data():
                 else:
                     logger.warning("Admin user created but password_changed or airport_id is incorrect")
             else:
-                logger.error(f"Failed to create admin user: {error_msg}")
+                logger.error("Failed to create admin user: %s", error_msg)
                 raise Exception(f"Failed to create admin user: {error_msg}")
         else:
             logger.info("Admin user already exists")
@@ -131,7 +122,7 @@ def create_initial_data():
             ).first():
                 rate = ExchangeRate(**rate_data)
                 db.session.add(rate)
-                logger.info(f"Created exchange rate: {rate_data['base_currency']} -> {rate_data['target_currency']}, rate={rate_data['rate']:.4f}")
+                logger.info("Created exchange rate: %s -> %s, rate=%.4f", rate_data['base_currency'], rate_data['target_currency'], rate_data['rate'])
         db.session.commit()
 if __name__ == '__main__':
     os.environ["PYTHONUNBUFFERED"] = "1"
@@ -142,5 +133,5 @@ if __name__ == '__main__':
         create_initial_data()
         logger.info("Database initialization completed successfully")
     except Exception as e:
-        logger.error(f"Initialization failed: {e}")
+        logger.error("Initialization failed: %s", e)
         raise
\ No newline at end of file
@@ -0,0 +1,33 @@
+import logging
+from database import db
+from scheduler import scheduler
+from import_csv import import_csv_data
+from services.auth_service import purge_revoked_tokens
+from services.archive_service import archive_old_records
+
+logger = logging.getLogger(__name__)
+
+def register_jobs(app):
+    """Реєструє фонові задачі програми в планувальнику."""
+
+    @scheduler.job('csv_import', interval=app.config['CSV_IMPORT_INTERVAL'])
+    def csv_import():
+        """Імпорт CSV-файлів з папки data/."""
+        success, message = import_csv_data(app, db)
+        if not success:
+            raise RuntimeError(message)
+
+    @scheduler.job('purge_revoked_tokens', interval=app.config['REVOKED_TOKENS_PURGE_INTERVAL'])
+    def purge_tokens():
+        """Видалення прострочених записів відкликаних токенів."""
+        deleted = purge_revoked_tokens()
+        if deleted:
+            logger.info("Видалено %s прострочених відкликаних токенів", deleted)
+
+    if app.config['ARCHIVE_ENABLED']:
+        @scheduler.job('archive', interval=app.config['ARCHIVE_INTERVAL'], lease_seconds=app.config['ARCHIVE_LEASE_SECONDS'])
+        def archive():
+            """Перенесення старих транзакцій і квитків закритих змін в архівні таблиці."""
+            _, success, message = archive_old_records(app.config['ARCHIVE_AFTER_MONTHS'], app.config['ARCHIVE_BATCH_SIZE'])
+            if not success:
+                raise RuntimeError(message)
@@ -0,0 +1,77 @@
+import json
+import logging
+import dataclasses
+from enum import Enum
+from decimal import Decimal
+from datetime import date, datetime
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# Назва енкодера входить у ETag (versioning.make_etag): байти відповіді залежать від нього
+BACKEND = 'orjson' if orjson is not None else 'json'
+
+def _default(value):
+    """
+    Типи, які не серіалізуються напряму: Decimal — числом, як і раніше
+    float(...) у маршрутах; дати — ISO-рядком, як .isoformat() в API.
+    """
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        # Неглибока копія: вкладені dataclass обробляються наступними викликами
+        return {field.name: getattr(value, field.name) for field in dataclasses.fields(value)}
+    if hasattr(value, '__html__'):
+        return str(value.__html__())
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    JSON-провайдер Flask: orjson, якщо встановлено, інакше стандартний json.
+
+    Обидва варіанти напряму серіалізують Decimal, datetime, Enum і dataclass
+    (зокрема з __slots__), тож сервіси можуть повертати read-моделі з
+    read_models без проміжного dict на кожен рядок.
+    """
+    default = staticmethod(_default)
+
+    def _orjson_options(self, indent=False):
+        options = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if indent:
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def dumps(self, obj, **kwargs):
+        # Додаткові параметри (indent, separators з tojson тощо) підтримує лише json
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=_default, option=self._orjson_options()).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return json.loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        if orjson is None:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        data = orjson.dumps(obj, default=_default, option=self._orjson_options(indent) | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(data, mimetype=self.mimetype)
+
+def init_json(app):
+    """Встановлює FastJSONProvider як app.json."""
+    app.json = FastJSONProvider(app)
+    logger.info("JSON-енкодер: %s", BACKEND)
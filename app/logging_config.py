@@ -0,0 +1,153 @@
+import os
+import json
+import queue
+import atexit
+import logging
+import logging.handlers
+from datetime import datetime, timezone
+
+# Стандартні атрибути LogRecord — усе інше вважається полями з extra=
+_RESERVED_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+TEXT_FORMAT = '%(asctime)s - %(levelname)s - %(name)s - %(message)s'
+
+_listener = None
+
+class JsonFormatter(logging.Formatter):
+    """
+    Форматує запис логу як один JSON-рядок.
+
+    Окрім часу, рівня, логера та повідомлення, додає поля, передані через
+    extra=, і traceback винятку, якщо він є.
+    """
+    def format(self, record):
+        payload = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'process': record.process,
+            'thread': record.threadName
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS and not key.startswith('_'):
+                payload[key] = value
+        if record.exc_info:
+            payload['exc_info'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            payload['exc_info'] = record.exc_text
+        if record.stack_info:
+            payload['stack_info'] = self.formatStack(record.stack_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler, який не форматує повідомлення в потоці запиту.
+
+    Стандартний QueueHandler.prepare() одразу підставляє аргументи в рядок.
+    Тут форматування відкладається до потоку QueueListener: примітивні
+    аргументи передаються як є, а решта (моделі, словники) перетворюються на
+    рядок, щоб не тримати посилань на ORM-об'єкти між потоками.
+    """
+    _primitive = (str, int, float, bool, type(None))
+
+    def prepare(self, record):
+        record = logging.makeLogRecord(record.__dict__)
+        if record.args:
+            if isinstance(record.args, dict):
+                record.args = {key: value if isinstance(value, self._primitive) else str(value)
+                               for key, value in record.args.items()}
+            else:
+                record.args = tuple(arg if isinstance(arg, self._primitive) else str(arg)
+                                    for arg in record.args)
+        if record.exc_info:
+            # Traceback не можна передати між потоками безпечно — форматуємо зараз
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+def _parse_levels(spec):
+    """
+    Розбирає рядок рівнів логерів.
+
+    Args:
+        spec (str): Рядок виду "sqlalchemy.engine=WARNING,db.request=INFO"
+
+    Returns:
+        dict: Назва логера → рівень
+    """
+    levels = {}
+    for item in (spec or '').split(','):
+        item = item.strip()
+        if not item or '=' not in item:
+            continue
+        name, level = item.split('=', 1)
+        levels[name.strip()] = level.strip().upper()
+    return levels
+
+def _stop_listener():
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+def configure_logging(config, log_filename='app.log'):
+    """
+    Налаштовує асинхронне логування для програми та скриптів.
+
+    Кореневий логер отримує лише QueueHandler: запис у файл і консоль
+    виконує окремий потік QueueListener, тож запит не чекає на диск.
+    Файл ротується за розміром. Формат (json або text) і рівні окремих
+    логерів задаються в конфігурації. Повторний виклик замінює попередні
+    налаштування (наприклад, скрипт після імпорту app задає свій файл).
+
+    Args:
+        config (dict | object): app.config або клас Config
+        log_filename (str): Назва файлу логу в LOG_DIR
+    """
+    global _listener
+
+    def setting(name, default):
+        if isinstance(config, dict):
+            return config.get(name, default)
+        return getattr(config, name, default)
+
+    log_dir = setting('LOG_DIR', None) or os.path.join(os.path.dirname(__file__), 'logs')
+    os.makedirs(log_dir, exist_ok=True)
+
+    if setting('LOG_FORMAT', 'json') == 'json':
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter(TEXT_FORMAT)
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(formatter)
+    file_handler = logging.handlers.RotatingFileHandler(
+        os.path.join(log_dir, log_filename),
+        maxBytes=setting('LOG_MAX_BYTES', 10 * 1024 * 1024),
+        backupCount=setting('LOG_BACKUP_COUNT', 5),
+        encoding='utf-8'
+    )
+    file_handler.setFormatter(formatter)
+
+    _stop_listener()
+    log_queue = queue.Queue(-1)
+    _listener = logging.handlers.QueueListener(
+        log_queue, stream_handler, file_handler, respect_handler_level=True
+    )
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+    root.addHandler(_DeferredQueueHandler(log_queue))
+    root.setLevel(setting('LOG_LEVEL', 'INFO').upper())
+
+    for name, level in _parse_levels(setting('LOG_LEVELS', '')).items():
+        logging.getLogger(name).setLevel(level)
+
+    _listener.start()
+
+atexit.register(_stop_listener)
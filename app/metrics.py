@@ -0,0 +1,427 @@
+import os
+import json
+import time
+import bisect
+import itertools
+import threading
+import logging
+from contextlib import contextmanager
+from flask import g, request
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_shard_ids = itertools.count()
+
+class _Child:
+    """Метрика з конкретними значеннями міток: counter.labels('KBP', 'UAH').inc()."""
+    __slots__ = ('metric', 'key')
+
+    def __init__(self, metric, key):
+        self.metric = metric
+        self.key = key
+
+    def inc(self, amount=1):
+        self.metric._inc(self.key, amount)
+
+    def observe(self, value):
+        self.metric._observe(self.key, value)
+
+    def set(self, value):
+        self.metric._set(self.key, value)
+
+    @contextmanager
+    def time(self):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.metric._observe(self.key, time.perf_counter() - started)
+
+class _Metric:
+    """
+    Базова метрика з шардуванням за потоками.
+
+    Кожен потік пише лише у власний словник (шард), тому запис не потребує
+    блокувань: під GIL операції над власним dict атомарні, а інші потоки в
+    нього не пишуть. Блокування береться лише під час створення шарда і
+    збору значень; тоді ж шарди завершених потоків зливаються в один, тож
+    кількість шардів не перевищує кількості живих потоків, навіть якщо
+    метрики ніхто не збирає (сервер із потоком на запит).
+    """
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._shards = {}
+        self._retired = {}
+        self._local = threading.local()
+        self._collect_lock = threading.Lock()
+
+    def labels(self, *values):
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"Метрика {self.name} очікує мітки {self.labelnames}")
+        return _Child(self, tuple(str(value) for value in values))
+
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._collect_lock:
+                self._retire_finished()
+                self._shards[next(_shard_ids)] = (threading.current_thread(), shard)
+        return shard
+
+    def _retire_finished(self):
+        # Завершений потік більше не пише — переносимо його шард у загальний.
+        # Викликається під _collect_lock.
+        for shard_id, (thread, shard) in list(self._shards.items()):
+            if not thread.is_alive():
+                self._merge(self._retired, shard)
+                del self._shards[shard_id]
+
+    def _merge(self, target, source):
+        for key, value in source.items():
+            target[key] = target.get(key, 0) + value
+
+    def collect(self):
+        """
+        Повертає значення метрики в межах процесу.
+
+        Returns:
+            dict: Кортеж значень міток → значення
+        """
+        with self._collect_lock:
+            self._retire_finished()
+            result = {}
+            self._merge(result, self._retired)
+            for thread, shard in list(self._shards.values()):
+                self._merge(result, dict(shard))
+            return result
+
+class Counter(_Metric):
+    type = 'counter'
+
+    def inc(self, amount=1):
+        self._inc((), amount)
+
+    def _inc(self, key, amount):
+        shard = self._shard()
+        shard[key] = shard.get(key, 0) + amount
+
+class Histogram(_Metric):
+    """
+    Гістограма. Значення шарда — лічильники кошиків (не кумулятивні,
+    останній — +Inf), далі сума та кількість спостережень.
+    """
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value):
+        self._observe((), value)
+
+    def time(self):
+        return _Child(self, ()).time()
+
+    def _observe(self, key, value):
+        shard = self._shard()
+        entry = shard.get(key)
+        if entry is None:
+            entry = shard[key] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+        entry[bisect.bisect_left(self.buckets, value)] += 1
+        entry[-2] += value
+        entry[-1] += 1
+
+    def _merge(self, target, source):
+        for key, value in source.items():
+            current = target.get(key)
+            if current is None:
+                target[key] = list(value)
+            else:
+                for index, item in enumerate(value):
+                    current[index] += item
+
+class Gauge(_Metric):
+    """
+    Показник поточного стану. Значення задається через set() або обчислюється
+    функцією під час збору (callback повертає dict міток → значення або число).
+    Між воркерами значення підсумовуються лише для живих процесів.
+    """
+    type = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=(), callback=None):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+        self._values = {}
+
+    def set(self, value):
+        self._set((), value)
+
+    def _set(self, key, value):
+        self._values[key] = value
+
+    def collect(self):
+        result = dict(self._values)
+        if self.callback is not None:
+            try:
+                values = self.callback()
+            except Exception as e:
+                logger.debug("Не вдалося обчислити метрику %s: %s", self.name, e)
+                values = {}
+            if not isinstance(values, dict):
+                values = {(): values}
+            for key, value in values.items():
+                result[tuple(str(item) for item in key)] = value
+        return result
+
+class MetricsRegistry:
+    """
+    Реєстр метрик процесу та агрегація між воркерами.
+
+    Кожен процес періодично записує знімок своїх метрик у METRICS_DIR
+    (metrics_<pid>.json). Ендпоінт /metrics підсумовує знімки всіх воркерів:
+    лічильники та гістограми — з усіх файлів (у т.ч. завершених процесів,
+    щоб значення не зменшувались), показники — лише з живих процесів.
+    Каталог слід очищати під час розгортання, як і для prometheus_client.
+    """
+    def __init__(self):
+        self.metrics = {}
+        self.app = None
+        self._flush_thread = None
+        self._stop = threading.Event()
+        self._start_lock = threading.Lock()
+
+    def register(self, metric):
+        if metric.name in self.metrics:
+            raise ValueError(f"Метрика {metric.name} уже зареєстрована")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge(self, name, documentation, labelnames=(), callback=None):
+        return self.register(Gauge(name, documentation, labelnames, callback))
+
+    def init_app(self, app):
+        self.app = app
+        app.config.setdefault('METRICS_ENABLED', True)
+        app.config.setdefault('METRICS_DIR', None)
+        app.config.setdefault('METRICS_FLUSH_INTERVAL', 10)
+        app.config.setdefault('METRICS_TOKEN', None)
+        app.extensions['metrics'] = self
+        if not app.config['METRICS_ENABLED']:
+            return
+
+        @app.before_request
+        def _start_request_metrics():
+            # Потік запису знімків запускається ліниво, окремо в кожному воркері
+            if self._flush_thread is None and app.config['METRICS_DIR']:
+                self.start()
+            g.metrics_started = time.perf_counter()
+
+        @app.after_request
+        def _record_request_metrics(response):
+            started = g.get('metrics_started')
+            if started is not None:
+                endpoint = request.endpoint or 'none'
+                http_request_duration.labels(endpoint, request.method).observe(time.perf_counter() - started)
+                http_requests.labels(endpoint, request.method, response.status_code).inc()
+            return response
+
+    def start(self):
+        with self._start_lock:
+            if self._flush_thread is not None:
+                return
+            os.makedirs(self.app.config['METRICS_DIR'], exist_ok=True)
+            self._stop.clear()
+            self._flush_thread = threading.Thread(target=self._flush_loop, name='metrics-flush', daemon=True)
+            self._flush_thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._flush_thread is not None:
+            self._flush_thread.join()
+            self._flush_thread = None
+        self.flush()
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.app.config['METRICS_FLUSH_INTERVAL']):
+            self.flush()
+
+    def snapshot(self):
+        """
+        Повертає значення всіх метрик процесу.
+
+        Returns:
+            dict: Назва метрики → список [мітки, значення]
+        """
+        return {
+            name: [[list(key), value] for key, value in metric.collect().items()]
+            for name, metric in self.metrics.items()
+        }
+
+    def flush(self):
+        """Атомарно записує знімок метрик процесу в METRICS_DIR."""
+        directory = self.app.config['METRICS_DIR'] if self.app else None
+        if not directory:
+            return
+        path = os.path.join(directory, f"metrics_{os.getpid()}.json")
+        try:
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'pid': os.getpid(), 'time': time.time(), 'metrics': self.snapshot()}, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.error("Не вдалося записати знімок метрик %s: %s", path, e)
+
+    @staticmethod
+    def _process_alive(pid):
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        return True
+
+    def aggregate(self):
+        """
+        Підсумовує метрики поточного процесу та знімки інших воркерів.
+
+        Returns:
+            dict: Назва метрики → dict мітки → значення
+        """
+        snapshots = [(True, self.snapshot())]
+        directory = self.app.config['METRICS_DIR'] if self.app else None
+        if directory and os.path.isdir(directory):
+            for filename in os.listdir(directory):
+                if not (filename.startswith('metrics_') and filename.endswith('.json')):
+                    continue
+                try:
+                    with open(os.path.join(directory, filename), encoding='utf-8') as f:
+                        data = json.load(f)
+                except (OSError, ValueError) as e:
+                    logger.warning("Пропущено знімок метрик %s: %s", filename, e)
+                    continue
+                if data.get('pid') == os.getpid():
+                    continue
+                snapshots.append((self._process_alive(data['pid']), data['metrics']))
+
+        result = {name: {} for name in self.metrics}
+        for alive, snapshot in snapshots:
+            for name, samples in snapshot.items():
+                metric = self.metrics.get(name)
+                if metric is None or (metric.type == 'gauge' and not alive):
+                    continue
+                metric._merge(result[name], {tuple(labels): value for labels, value in samples})
+        return result
+
+    def render(self):
+        """Повертає метрики всіх воркерів у текстовому форматі Prometheus."""
+        aggregated = self.aggregate()
+        lines = []
+        for name, metric in self.metrics.items():
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.type}")
+            for key, value in sorted(aggregated[name].items()):
+                labels = list(zip(metric.labelnames, key))
+                if metric.type == 'histogram':
+                    cumulative = 0
+                    for bound, count in zip(list(metric.buckets) + ['+Inf'], value[:-2]):
+                        cumulative += count
+                        le = bound if bound == '+Inf' else repr(float(bound))
+                        lines.append(f"{name}_bucket{_format_labels(labels + [('le', le)])} {cumulative}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {value[-2]}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {value[-1]}")
+                else:
+                    lines.append(f"{name}{_format_labels(labels)} {value}")
+        return '\n'.join(lines) + '\n'
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape_label(value)}"' for name, value in labels) + '}'
+
+def _db_pool_state():
+    from database import db
+    pool = db.engine.pool
+    if not hasattr(pool, 'checkedout'):
+        return {}
+    return {
+        ('checked_out',): pool.checkedout(),
+        ('idle',): pool.checkedin(),
+        ('overflow',): max(0, pool.overflow()),
+        ('size',): pool.size()
+    }
+
+registry = MetricsRegistry()
+
+# HTTP
+http_request_duration = registry.histogram(
+    'http_request_duration_seconds', 'Тривалість обробки HTTP-запиту', ('endpoint', 'method')
+)
+http_requests = registry.counter(
+    'http_requests_total', 'Кількість HTTP-запитів', ('endpoint', 'method', 'status')
+)
+http_compressed_responses = registry.counter(
+    'http_compressed_responses_total', 'Стиснуті відповіді за кодуванням', ('encoding',)
+)
+http_compression_bytes = registry.counter(
+    'http_compression_bytes_total', 'Байти тіла відповідей до і після стиснення', ('encoding', 'kind')
+)
+
+# Бізнес-метрики
+tickets_sold = registry.counter(
+    'tickets_sold_total', 'Продані квитки', ('airport_id', 'currency')
+)
+tickets_refunded = registry.counter(
+    'tickets_refunded_total', 'Повернені квитки', ('airport_id', 'currency')
+)
+cash_withdrawals = registry.counter(
+    'cash_withdrawals_total', 'Зняття готівки з кас', ('currency',)
+)
+cash_withdrawn_amount = registry.counter(
+    'cash_withdrawn_amount_total', 'Сума знятої готівки', ('currency',)
+)
+
+# Інфраструктура
+db_pool_connections = registry.gauge(
+    'db_pool_connections', "З'єднання пулу БД за станом", ('state',), callback=_db_pool_state
+)
+cache_requests = registry.counter(
+    'cache_requests_total', 'Звернення до кешів за результатом (hit/miss)', ('cache', 'result')
+)
+csv_import_duration = registry.histogram(
+    'csv_import_duration_seconds', 'Тривалість етапів імпорту CSV', ('stage',),
+    buckets=(0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0)
+)
+csv_import_failures = registry.counter(
+    'csv_import_failures_total', 'Невдалі запуски імпорту CSV', ('stage',)
+)
+bcrypt_duration = registry.histogram(
+    'bcrypt_duration_seconds', 'Тривалість операцій bcrypt', ('operation',),
+    buckets=(0.01, 0.05, 0.1, 0.2, 0.3, 0.5, 1.0, 2.0)
+)
+login_throttled = registry.counter(
+    'login_throttled_total', 'Відхилені спроби входу за причиною (ip, email, busy)', ('reason',)
+)
+job_duration = registry.histogram(
+    'job_duration_seconds', 'Тривалість виконання фонових задач планувальника', ('job',),
+    buckets=(0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0)
+)
+db_transaction_retries = registry.counter(
+    'db_transaction_retries_total', 'Повтори транзакцій після тимчасових конфліктів БД', ('operation',)
+)
@@ -0,0 +1,31 @@
+"""Add job locks
+
+Revision ID: 8d2f61c0a4b7
+Revises: 3672c4b7381d
+Create Date: 2026-10-19 09:12:40.114203
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '8d2f61c0a4b7'
+down_revision: Union[str, Sequence[str], None] = '3672c4b7381d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Таблиця блокувань (lease) фонових задач планувальника
+    op.create_table('job_locks',
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('owner', sa.String(length=200), nullable=True),
+        sa.Column('locked_until', sa.DateTime(), nullable=True),
+        sa.Column('last_started_at', sa.DateTime(), nullable=True),
+        sa.Column('last_finished_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('name')
+    )
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('job_locks')
@@ -0,0 +1,28 @@
+"""Add unique sold seat index
+
+Revision ID: a8e4f1c7d203
+Revises: f2a6d8c3b915
+Create Date: 2026-10-19 17:02:38.145920
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'a8e4f1c7d203'
+down_revision: Union[str, Sequence[str], None] = 'f2a6d8c3b915'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Одне продане місце на рейс (фільтрований індекс: повернені квитки не заважають).
+    # Якщо в даних уже є дублікати проданих місць, їх треба виправити до міграції.
+    op.create_index(
+        'ix_ticket_flight_seat_sold', 'tickets', ['flight_id', 'seat_number'], unique=True,
+        mssql_where=sa.text("status = 'SOLD'"), sqlite_where=sa.text("status = 'SOLD'")
+    )
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_ticket_flight_seat_sold', table_name='tickets')
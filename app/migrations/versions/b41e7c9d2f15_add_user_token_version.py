@@ -0,0 +1,24 @@
+"""Add user token version
+
+Revision ID: b41e7c9d2f15
+Revises: 8d2f61c0a4b7
+Create Date: 2026-10-19 11:03:27.518940
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'b41e7c9d2f15'
+down_revision: Union[str, Sequence[str], None] = '8d2f61c0a4b7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Версія токенів користувача: збільшується при зміні пароля, старі JWT стають недійсними
+    op.add_column('users', sa.Column('token_version', sa.Integer(), nullable=False, server_default='0'))
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'token_version', mssql_drop_default=True)
@@ -0,0 +1,30 @@
+"""Add list search and sort indexes
+
+Revision ID: b9d2e7f4c618
+Revises: a8e4f1c7d203
+Create Date: 2026-10-19 19:24:51.307412
+"""
+from typing import Sequence, Union
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'b9d2e7f4c618'
+down_revision: Union[str, Sequence[str], None] = 'a8e4f1c7d203'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Пошук за префіксом і keyset-сортування списків адмінки (email і номер рейсу вже мають унікальні індекси)
+    op.create_index('ix_user_name', 'users', ['name'])
+    op.create_index('ix_cash_desk_name', 'cash_desks', ['name'])
+    op.create_index('ix_flight_departure', 'flights', ['departure_time'])
+    # Тарифи рейсів сторінки
+    op.create_index('ix_flight_fare_flight', 'flight_fares', ['flight_id'])
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_flight_fare_flight', table_name='flight_fares')
+    op.drop_index('ix_flight_departure', table_name='flights')
+    op.drop_index('ix_cash_desk_name', table_name='cash_desks')
+    op.drop_index('ix_user_name', table_name='users')
@@ -0,0 +1,24 @@
+"""Add shared next run time to job locks
+
+Revision ID: c3e8b1f6a925
+Revises: b9d2e7f4c618
+Create Date: 2026-10-19 21:05:17.482310
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3e8b1f6a925'
+down_revision: Union[str, Sequence[str], None] = 'b9d2e7f4c618'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Спільний для воркерів час наступного запуску: задача виконується раз за інтервал
+    op.add_column('job_locks', sa.Column('next_run_at', sa.DateTime(), nullable=True))
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('job_locks', 'next_run_at')
@@ -0,0 +1,47 @@
+"""Add hot query indexes
+
+Revision ID: d3f8a2b6c410
+Revises: c7a93e4b5d21
+Create Date: 2026-10-19 14:20:51.302417
+"""
+from typing import Sequence, Union
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3f8a2b6c410'
+down_revision: Union[str, Sequence[str], None] = 'c7a93e4b5d21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Перевірка зайнятості місця та квитки відкритої зміни
+    op.create_index('ix_ticket_flight_seat_status', 'tickets', ['flight_id', 'seat_number', 'status'], unique=False)
+    op.create_index('ix_ticket_shift_status', 'tickets', ['shift_id', 'status'], unique=False)
+    # Баланс рахунку на дату (покривний: amount у INCLUDE) та останні транзакції зміни
+    op.create_index(
+        'ix_transaction_account_created', 'transactions', ['account_id', 'created_at'],
+        unique=False, mssql_include=['amount']
+    )
+    op.create_index('ix_transaction_shift_created', 'transactions', ['shift_id', 'created_at'], unique=False)
+    # Рахунок каси у валюті продажу
+    op.create_index(
+        'ix_cash_desk_account_desk_currency', 'cash_desk_accounts', ['cash_desk_id', 'currency_code'], unique=False
+    )
+    # Актуальний курс пари валют (покривний: rate у INCLUDE)
+    op.create_index(
+        'ix_exchange_rate_pair_valid', 'exchange_rates', ['base_currency', 'target_currency', 'valid_at'],
+        unique=False, mssql_include=['rate']
+    )
+    # Рейси з аеропорту
+    op.create_index('ix_flight_origin_airport', 'flights', ['origin_airport_id'], unique=False)
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_flight_origin_airport', table_name='flights')
+    op.drop_index('ix_exchange_rate_pair_valid', table_name='exchange_rates')
+    op.drop_index('ix_cash_desk_account_desk_currency', table_name='cash_desk_accounts')
+    op.drop_index('ix_transaction_shift_created', table_name='transactions')
+    op.drop_index('ix_transaction_account_created', table_name='transactions')
+    op.drop_index('ix_ticket_shift_status', table_name='tickets')
+    op.drop_index('ix_ticket_flight_seat_status', table_name='tickets')
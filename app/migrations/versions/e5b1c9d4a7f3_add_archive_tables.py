@@ -0,0 +1,79 @@
+"""Add archive tables
+
+Revision ID: e5b1c9d4a7f3
+Revises: d3f8a2b6c410
+Create Date: 2026-10-19 15:07:44.819263
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b1c9d4a7f3'
+down_revision: Union[str, Sequence[str], None] = 'd3f8a2b6c410'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Архів транзакцій: id зберігаються з живої таблиці, тому без IDENTITY
+    op.create_table('transactions_archive',
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('shift_id', sa.Integer(), nullable=False),
+        sa.Column('account_id', sa.Integer(), nullable=False),
+        sa.Column('type', sa.Enum('SALE', 'REFUND', 'DEPOSIT', 'WITHDRAWAL', name='transaction_type'), nullable=False),
+        sa.Column('amount', sa.DECIMAL(precision=10, scale=2), nullable=False),
+        sa.Column('currency_code', sa.String(length=3), nullable=False),
+        sa.Column('reference_type', sa.String(length=50), nullable=True),
+        sa.Column('reference_id', sa.Integer(), nullable=True),
+        sa.Column('description', sa.String(length=200), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['shift_id'], ['shifts.id'], ),
+        sa.ForeignKeyConstraint(['account_id'], ['cash_desk_accounts.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'ix_transaction_archive_account_created', 'transactions_archive', ['account_id', 'created_at'],
+        unique=False, mssql_include=['amount']
+    )
+
+    # Архів квитків
+    op.create_table('tickets_archive',
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('flight_id', sa.Integer(), nullable=False),
+        sa.Column('flight_fare_id', sa.Integer(), nullable=False),
+        sa.Column('shift_id', sa.Integer(), nullable=False),
+        sa.Column('passenger_name', sa.String(length=100), nullable=False),
+        sa.Column('seat_number', sa.String(length=10), nullable=False),
+        sa.Column('price', sa.DECIMAL(precision=10, scale=2), nullable=False),
+        sa.Column('currency_code', sa.String(length=3), nullable=False),
+        sa.Column('price_in_base', sa.DECIMAL(precision=10, scale=2), nullable=False),
+        sa.Column('exchange_rate', sa.DECIMAL(precision=10, scale=4), nullable=False),
+        sa.Column('sold_at', sa.DateTime(), nullable=False),
+        sa.Column('status', sa.Enum('sold', 'refunded', name='ticket_status'), nullable=False),
+        sa.ForeignKeyConstraint(['flight_id'], ['flights.id'], ),
+        sa.ForeignKeyConstraint(['flight_fare_id'], ['flight_fares.id'], ),
+        sa.ForeignKeyConstraint(['shift_id'], ['shifts.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_ticket_archive_flight', 'tickets_archive', ['flight_id'], unique=False)
+    op.create_index('ix_ticket_archive_sold_at', 'tickets_archive', ['sold_at'], unique=False)
+
+    # Вхідні баланси рахунків: сума всіх архівованих транзакцій
+    op.create_table('account_balance_snapshots',
+        sa.Column('account_id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('archived_until', sa.DateTime(), nullable=False),
+        sa.Column('balance', sa.DECIMAL(precision=12, scale=2), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['account_id'], ['cash_desk_accounts.id'], ),
+        sa.PrimaryKeyConstraint('account_id')
+    )
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('account_balance_snapshots')
+    op.drop_index('ix_ticket_archive_sold_at', table_name='tickets_archive')
+    op.drop_index('ix_ticket_archive_flight', table_name='tickets_archive')
+    op.drop_table('tickets_archive')
+    op.drop_index('ix_transaction_archive_account_created', table_name='transactions_archive')
+    op.drop_table('transactions_archive')
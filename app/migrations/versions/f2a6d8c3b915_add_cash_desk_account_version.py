@@ -0,0 +1,24 @@
+"""Add cash desk account version
+
+Revision ID: f2a6d8c3b915
+Revises: e5b1c9d4a7f3
+Create Date: 2026-10-19 16:12:05.604718
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2a6d8c3b915'
+down_revision: Union[str, Sequence[str], None] = 'e5b1c9d4a7f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Версія рахунку: збільшується атомарним UPDATE при кожній зміні балансу
+    op.add_column('cash_desk_accounts', sa.Column('version', sa.Integer(), nullable=False, server_default='0'))
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('cash_desk_accounts', 'version', mssql_drop_default=True)
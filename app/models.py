@@ -49,6 +49,10 @@ class CashDesk(db.Model):
     airport = db.relationship('Airport', back_populates='cash_desks')
     accounts = db.relationship('CashDeskAccount', back_populates='cash_desk')
     shifts = db.relationship('Shift', back_populates='cash_desk')
+    __table_args__ = (
+        # Пошук і сортування списку кас за назвою
+        db.Index('ix_cash_desk_name', 'name'),
+    )
 
 # Таблиця рахунків кас
 class CashDeskAccount(db.Model):
@@ -58,8 +62,13 @@ class CashDeskAccount(db.Model):
     currency_code = db.Column(db.String(3), nullable=False)
     balance = db.Column(db.DECIMAL(12, 2), nullable=False, default=0.0)
     last_updated = db.Column(db.DateTime, nullable=False, default=func.current_timestamp())
+    # Збільшується при кожній зміні балансу (атомарний UPDATE у apply_balance_delta)
+    version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     cash_desk = db.relationship('CashDesk', back_populates='accounts')
     transactions = db.relationship('Transaction', back_populates='account')
+    __table_args__ = (
+        db.Index('ix_cash_desk_account_desk_currency', 'cash_desk_id', 'currency_code'),
+    )
 
 # Таблиця користувачів
 class User(db.Model):
@@ -71,9 +80,15 @@ class User(db.Model):
     role = db.Column(Enum(Role, name='role'), nullable=False, default=Role.CASHIER)
     created_at = db.Column(db.DateTime, nullable=False, default=func.current_timestamp())
     password_changed = db.Column(db.Boolean, nullable=False, default=False)
+    # Збільшується при зміні пароля: JWT з іншою версією вважаються відкликаними
+    token_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     airport_id = db.Column(db.Integer, db.ForeignKey('airports.id'), nullable=True)
     airport = db.relationship('Airport', back_populates='users')
     shifts = db.relationship('Shift', back_populates='cashier')
+    __table_args__ = (
+        # Пошук і сортування списку користувачів за ім'ям
+        db.Index('ix_user_name', 'name'),
+    )
 
 # Таблиця змін
 class Shift(db.Model):
@@ -110,6 +125,9 @@ class Flight(db.Model):
     tickets = db.relationship('Ticket', back_populates='flight')
     __table_args__ = (
         db.CheckConstraint('origin_airport_id != destination_airport_id', name='check_origin_destination'),
+        db.Index('ix_flight_origin_airport', 'origin_airport_id'),
+        # Сортування списку рейсів за часом відправлення
+        db.Index('ix_flight_departure', 'departure_time'),
     )
 
 # Таблиця тарифів рейсів
@@ -124,6 +142,9 @@ class FlightFare(db.Model):
     seats_sold = db.Column(db.Integer, nullable=False, default=0)
     flight = db.relationship('Flight', back_populates='fares')
     tickets = db.relationship('Ticket', back_populates='flight_fare')
+    __table_args__ = (
+        db.Index('ix_flight_fare_flight', 'flight_id'),
+    )
 
 # Таблиця квитків
 class Ticket(db.Model):
@@ -143,6 +164,17 @@ class Ticket(db.Model):
     flight = db.relationship('Flight', back_populates='tickets')
     flight_fare = db.relationship('FlightFare', back_populates='tickets')
     shift = db.relationship('Shift', back_populates='tickets')
+    __table_args__ = (
+        # Перевірка зайнятості місця під час продажу
+        db.Index('ix_ticket_flight_seat_status', 'flight_id', 'seat_number', 'status'),
+        # Одне продане місце на рейс: останній захист від подвійного продажу між воркерами
+        db.Index(
+            'ix_ticket_flight_seat_sold', 'flight_id', 'seat_number', unique=True,
+            mssql_where=db.text("status = 'SOLD'"), sqlite_where=db.text("status = 'SOLD'")
+        ),
+        # Квитки відкритої зміни
+        db.Index('ix_ticket_shift_status', 'shift_id', 'status'),
+    )
 
 # Таблиця транзакцій
 class Transaction(db.Model):
@@ -159,6 +191,12 @@ class Transaction(db.Model):
     created_at = db.Column(db.DateTime, nullable=False, default=func.current_timestamp())
     shift = db.relationship('Shift', back_populates='transactions')
     account = db.relationship('CashDeskAccount', back_populates='transactions')
+    __table_args__ = (
+        # Баланс рахунку на дату: SUM(amount) читається з індексу без звернення до таблиці
+        db.Index('ix_transaction_account_created', 'account_id', 'created_at', mssql_include=['amount']),
+        # Останні транзакції зміни
+        db.Index('ix_transaction_shift_created', 'shift_id', 'created_at'),
+    )
 
 # Таблиця курсів обміну
 class ExchangeRate(db.Model):
@@ -167,4 +205,77 @@ class ExchangeRate(db.Model):
     base_currency = db.Column(db.String(3), nullable=False)
     target_currency = db.Column(db.String(3), nullable=False)
     rate = db.Column(db.DECIMAL(10, 4), nullable=False)
-    valid_at = db.Column(db.DateTime, nullable=False, default=func.current_timestamp())
\ No newline at end of file
+    valid_at = db.Column(db.DateTime, nullable=False, default=func.current_timestamp())
+    __table_args__ = (
+        # Актуальний курс пари валют: ORDER BY valid_at DESC зчитується з індексу
+        db.Index('ix_exchange_rate_pair_valid', 'base_currency', 'target_currency', 'valid_at', mssql_include=['rate']),
+    )
+
+# Таблиця блокувань фонових задач
+class JobLock(db.Model):
+    __tablename__ = 'job_locks'
+    name = db.Column(db.String(100), primary_key=True)
+    owner = db.Column(db.String(200), nullable=True)
+    locked_until = db.Column(db.DateTime, nullable=True)
+    last_started_at = db.Column(db.DateTime, nullable=True)
+    last_finished_at = db.Column(db.DateTime, nullable=True)
+    # Спільний для воркерів час наступного запуску задачі
+    next_run_at = db.Column(db.DateTime, nullable=True)
+
+# Відкликані refresh-токени (ротація та вихід із системи)
+class RevokedToken(db.Model):
+    __tablename__ = 'revoked_tokens'
+    jti = db.Column(db.String(36), primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    token_type = db.Column(db.String(10), nullable=False)
+    revoked_at = db.Column(db.DateTime, nullable=False, default=func.current_timestamp())
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+# Архів транзакцій закритих змін (переносяться з transactions фоновою задачею archive)
+class TransactionArchive(db.Model):
+    __tablename__ = 'transactions_archive'
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    shift_id = db.Column(db.Integer, db.ForeignKey('shifts.id'), nullable=False)
+    account_id = db.Column(db.Integer, db.ForeignKey('cash_desk_accounts.id'), nullable=False)
+    type = db.Column(Enum(TransactionType, name='transaction_type'), nullable=False)
+    amount = db.Column(db.DECIMAL(10, 2), nullable=False)
+    currency_code = db.Column(db.String(3), nullable=False)
+    reference_type = db.Column(db.String(50), nullable=True)
+    reference_id = db.Column(db.Integer, nullable=True)
+    description = db.Column(db.String(200), nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False)
+    __table_args__ = (
+        db.Index('ix_transaction_archive_account_created', 'account_id', 'created_at', mssql_include=['amount']),
+    )
+
+# Архів квитків закритих змін на рейси, що давно відбулися
+class TicketArchive(db.Model):
+    __tablename__ = 'tickets_archive'
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    flight_id = db.Column(db.Integer, db.ForeignKey('flights.id'), nullable=False)
+    flight_fare_id = db.Column(db.Integer, db.ForeignKey('flight_fares.id'), nullable=False)
+    shift_id = db.Column(db.Integer, db.ForeignKey('shifts.id'), nullable=False)
+    passenger_name = db.Column(db.String(100), nullable=False)
+    seat_number = db.Column(db.String(10), nullable=False)
+    price = db.Column(db.DECIMAL(10, 2), nullable=False)
+    currency_code = db.Column(db.String(3), nullable=False)
+    price_in_base = db.Column(db.DECIMAL(10, 2), nullable=False)
+    exchange_rate = db.Column(db.DECIMAL(10, 4), nullable=False)
+    sold_at = db.Column(db.DateTime, nullable=False)
+    status = db.Column(Enum(TicketStatus, name='ticket_status'), nullable=False)
+    flight = db.relationship('Flight', viewonly=True)
+    flight_fare = db.relationship('FlightFare', viewonly=True)
+    shift = db.relationship('Shift', viewonly=True)
+    __table_args__ = (
+        db.Index('ix_ticket_archive_flight', 'flight_id'),
+        db.Index('ix_ticket_archive_sold_at', 'sold_at'),
+    )
+
+# Сума архівованих транзакцій рахунку: вхідний баланс для живої таблиці transactions
+class AccountBalanceSnapshot(db.Model):
+    __tablename__ = 'account_balance_snapshots'
+    account_id = db.Column(db.Integer, db.ForeignKey('cash_desk_accounts.id'), primary_key=True, autoincrement=False)
+    # Усі архівовані транзакції рахунку створені раніше за цей момент
+    archived_until = db.Column(db.DateTime, nullable=False)
+    balance = db.Column(db.DECIMAL(12, 2), nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=func.current_timestamp())
@@ -0,0 +1,183 @@
+"""
+Спільна keyset-пагінація списків адмінки та JSON API.
+
+Сторінка — це ORDER BY (ключ сортування, id) LIMIT per_page + 1 з умовою
+"після курсора" замість OFFSET, тож будь-яка сторінка читає з індексу
+лише свої рядки, а загальна кількість не рахується. Курсор — base64 з
+JSON [значення ключа, id] останнього рядка попередньої сторінки.
+"""
+import json
+import base64
+import binascii
+import logging
+from datetime import datetime
+from flask import current_app, url_for
+from sqlalchemy import or_, and_
+
+logger = logging.getLogger(__name__)
+
+class SortKey:
+    """
+    Допустимий ключ сортування.
+
+    Args:
+        column: Колонка ORDER BY (має бути проіндексована)
+        attribute (str): Атрибут елемента сторінки з тим самим значенням
+        label (str): Назва для списку сортувань на сторінці
+    """
+    __slots__ = ('column', 'attribute', 'label')
+
+    def __init__(self, column, attribute, label):
+        self.column = column
+        self.attribute = attribute
+        self.label = label
+
+class PageRequest:
+    """
+    Параметри сторінки з рядка запиту: q, sort (`name` або `-name` для
+    спадання), per_page, cursor. Невідомі або пошкоджені значення
+    замінюються типовими, а не дають помилку.
+    """
+    __slots__ = ('q', 'sort', 'descending', 'per_page', 'cursor')
+
+    def __init__(self, q='', sort=None, descending=False, per_page=None, cursor=None):
+        self.q = q
+        self.sort = sort
+        self.descending = descending
+        self.per_page = per_page
+        self.cursor = cursor
+
+    @classmethod
+    def from_args(cls, args, sort_keys, default_sort):
+        sort = args.get('sort', default_sort)
+        descending = sort.startswith('-')
+        sort = sort.lstrip('-')
+        if sort not in sort_keys:
+            sort, descending = default_sort.lstrip('-'), default_sort.startswith('-')
+        per_page = args.get('per_page', type=int) or current_app.config['PAGINATION_PER_PAGE']
+        per_page = max(1, min(per_page, current_app.config['PAGINATION_MAX_PER_PAGE']))
+        return cls(
+            q=(args.get('q') or '').strip()[:100],
+            sort=sort,
+            descending=descending,
+            per_page=per_page,
+            cursor=_decode_cursor(args.get('cursor'))
+        )
+
+    @property
+    def sort_param(self):
+        return f"-{self.sort}" if self.descending else self.sort
+
+class Page:
+    """
+    Сторінка списку.
+
+    Args:
+        items (list): Елементи (read-моделі)
+        request (PageRequest): Параметри, з якими її отримано
+        next_cursor (str | None): Курсор наступної сторінки
+    """
+    __slots__ = ('items', 'request', 'next_cursor')
+
+    def __init__(self, items, request, next_cursor=None):
+        self.items = items
+        self.request = request
+        self.next_cursor = next_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def is_first(self):
+        return self.request.cursor is None
+
+    def url(self, endpoint, cursor=None, **values):
+        """Посилання на сторінку з тим самим пошуком і сортуванням."""
+        params = {'sort': self.request.sort_param, 'per_page': self.request.per_page}
+        if self.request.q:
+            params['q'] = self.request.q
+        if cursor:
+            params['cursor'] = cursor
+        return url_for(endpoint, **params, **values)
+
+    def to_dict(self):
+        return {
+            'items': self.items,
+            'next_cursor': self.next_cursor,
+            'q': self.request.q,
+            'sort': self.request.sort_param,
+            'per_page': self.request.per_page
+        }
+
+def _encode_cursor(value, row_id):
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    raw = json.dumps([value, row_id], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def _decode_cursor(cursor):
+    if not cursor:
+        return None
+    try:
+        value, row_id = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        return value, int(row_id)
+    except (binascii.Error, ValueError, TypeError):
+        logger.debug("Некоректний курсор сторінки: %s", cursor)
+        return None
+
+def _cursor_value(column, value):
+    # Значення з JSON до типу колонки (дати в курсорі — ISO-рядки)
+    if value is not None and column.type.python_type is datetime:
+        return datetime.fromisoformat(value)
+    return value
+
+def page_query(query, id_column, sort_keys, page_request):
+    """
+    Додає до вибірки умову "після курсора", ORDER BY і LIMIT per_page + 1.
+
+    Returns:
+        Select: Запит однієї сторінки
+    """
+    key = sort_keys[page_request.sort]
+    column = key.column
+    if page_request.cursor is not None:
+        value, last_id = page_request.cursor
+        try:
+            value = _cursor_value(column, value)
+        except (ValueError, TypeError):
+            value = None
+        if value is not None:
+            if page_request.descending:
+                query = query.where(or_(column < value, and_(column == value, id_column < last_id)))
+            else:
+                query = query.where(or_(column > value, and_(column == value, id_column > last_id)))
+    if page_request.descending:
+        query = query.order_by(column.desc(), id_column.desc())
+    else:
+        query = query.order_by(column.asc(), id_column.asc())
+    return query.limit(page_request.per_page + 1)
+
+def paginate(session, query, id_column, sort_keys, page_request, build):
+    """
+    Виконує keyset-вибірку однієї сторінки.
+
+    Args:
+        session: Сесія SQLAlchemy
+        query (Select): Вибірка колонок з уже застосованим пошуком
+        id_column: Первинний ключ (другий ключ сортування, робить порядок однозначним)
+        sort_keys (dict): Назва → SortKey
+        page_request (PageRequest): Параметри сторінки
+        build (callable): Рядки результату → список елементів з атрибутами id і SortKey.attribute
+
+    Returns:
+        Page: Сторінка
+    """
+    key = sort_keys[page_request.sort]
+    rows = session.execute(page_query(query, id_column, sort_keys, page_request)).all()
+    items = build(rows[:page_request.per_page])
+    next_cursor = None
+    if len(rows) > page_request.per_page and items:
+        last = items[-1]
+        next_cursor = _encode_cursor(getattr(last, key.attribute), last.id)
+    return Page(items, page_request, next_cursor)
@@ -0,0 +1,193 @@
+import os
+import time
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+import bcrypt
+from flask import current_app
+from metrics import bcrypt_duration
+
+logger = logging.getLogger(__name__)
+
+class PasswordCheckBusy(Exception):
+    """Пул перевірки паролів заповнений — запит слід відхилити, а не ставити в чергу."""
+
+class _BcryptPool:
+    """
+    Обмежений пул потоків для bcrypt.
+
+    bcrypt відпускає GIL, тож перевірки виконуються паралельно, але не більше
+    BCRYPT_WORKERS одночасно. Разом з очікуючими в черзі запитів не більше
+    BCRYPT_WORKERS + BCRYPT_QUEUE_LIMIT; решта одразу отримують відмову,
+    тому сплеск входів не забирає весь CPU воркера і не блокує касирів.
+    """
+    def __init__(self):
+        self._executor = None
+        self._slots = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self):
+        # Пул створюється ліниво і заново після fork (потоки не успадковуються)
+        if self._executor is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._executor is not None and self._pid == os.getpid():
+                return
+            workers = current_app.config['BCRYPT_WORKERS'] or os.cpu_count() or 2
+            self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bcrypt')
+            self._slots = threading.BoundedSemaphore(workers + current_app.config['BCRYPT_QUEUE_LIMIT'])
+            self._pid = os.getpid()
+            logger.info("Пул bcrypt: %s потоків, черга %s", workers, current_app.config['BCRYPT_QUEUE_LIMIT'])
+
+    def run(self, operation, func, *args):
+        self._ensure_started()
+        if not self._slots.acquire(blocking=False):
+            raise PasswordCheckBusy()
+        try:
+            future = self._executor.submit(self._timed, operation, func, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        # Місце звільняється, лише коли bcrypt справді завершився, навіть якщо запит уже не чекає
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=current_app.config['BCRYPT_TIMEOUT'])
+        except FutureTimeoutError:
+            raise PasswordCheckBusy()
+
+    @staticmethod
+    def _timed(operation, func, *args):
+        with bcrypt_duration.labels(operation).time():
+            return func(*args)
+
+_pool = _BcryptPool()
+_dummy_hash = None
+
+# Поточна вартість bcrypt (log2 кількості раундів); 12 — типове значення bcrypt.gensalt()
+_rounds = 12
+
+def _dummy_password_hash():
+    global _dummy_hash
+    if _dummy_hash is None:
+        _dummy_hash = bcrypt.hashpw(os.urandom(16), bcrypt.gensalt(_rounds))
+    return _dummy_hash
+
+def calibrate_rounds(target_ms, min_rounds=12, max_rounds=15):
+    """
+    Підбирає вартість bcrypt під цільовий час одного хешу на цьому обладнанні.
+
+    Вимірюється хеш з min_rounds (найкращий з трьох запусків, щоб шум не
+    давав різний результат у різних воркерах), далі кожен наступний раунд
+    подвоює час.
+
+    Args:
+        target_ms (float): Бажаний час одного хешу в мс
+        min_rounds (int): Мінімальна допустима вартість
+        max_rounds (int): Максимальна допустима вартість
+
+    Returns:
+        int: Найбільша вартість, для якої очікуваний час не перевищує target_ms
+    """
+    salt = bcrypt.gensalt(min_rounds)
+    timings = []
+    for _ in range(3):
+        started = time.perf_counter()
+        bcrypt.hashpw(b'calibration', salt)
+        timings.append((time.perf_counter() - started) * 1000)
+    base_ms = min(timings)
+    rounds = min_rounds
+    while rounds < max_rounds and base_ms * 2 ** (rounds + 1 - min_rounds) <= target_ms:
+        rounds += 1
+    return rounds
+
+def init_password_hashing(app):
+    """
+    Визначає вартість bcrypt: BCRYPT_ROUNDS, якщо задано, інакше калібрування
+    під BCRYPT_TARGET_MS. Для кількох серверів з різним CPU варто зафіксувати
+    BCRYPT_ROUNDS: хеш перераховується лише до більшої вартості, тож сервер
+    зі слабшим CPU не послаблює хеші, але й не підвищує їх до спільного рівня.
+    Калібрування ніколи не опускається нижче BCRYPT_MIN_ROUNDS (за
+    замовчуванням 12 — вартість bcrypt.gensalt(), з якою створено наявні хеші).
+    """
+    global _rounds, _dummy_hash
+    app.config.setdefault('BCRYPT_ROUNDS', 0)
+    app.config.setdefault('BCRYPT_TARGET_MS', 250)
+    app.config.setdefault('BCRYPT_MIN_ROUNDS', 12)
+    app.config.setdefault('BCRYPT_MAX_ROUNDS', 15)
+    if app.config['BCRYPT_ROUNDS']:
+        _rounds = app.config['BCRYPT_ROUNDS']
+        logger.info("Вартість bcrypt задана конфігурацією: %s", _rounds)
+    else:
+        _rounds = calibrate_rounds(
+            app.config['BCRYPT_TARGET_MS'], app.config['BCRYPT_MIN_ROUNDS'], app.config['BCRYPT_MAX_ROUNDS']
+        )
+        logger.info("Вартість bcrypt відкалібровано: %s (ціль %s мс)", _rounds, app.config['BCRYPT_TARGET_MS'])
+    _dummy_hash = None
+    _dummy_password_hash()
+
+def hash_password(password):
+    """
+    Хешує пароль з поточною вартістю bcrypt.
+
+    Args:
+        password (str): Пароль у відкритому вигляді
+
+    Returns:
+        str: bcrypt-хеш
+    """
+    with bcrypt_duration.labels('hashpw').time():
+        return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(_rounds)).decode('utf-8')
+
+def hash_password_in_pool(password):
+    """
+    Хешує пароль з поточною вартістю bcrypt у пулі bcrypt (для перехешування
+    під час входу: операція не виходить за ліміт паралельних bcrypt).
+
+    Args:
+        password (str): Пароль у відкритому вигляді
+
+    Returns:
+        str: bcrypt-хеш
+
+    Raises:
+        PasswordCheckBusy: Пул перевантажений або хешування не вклалося в BCRYPT_TIMEOUT
+    """
+    return _pool.run('hashpw', bcrypt.hashpw, password.encode('utf-8'), bcrypt.gensalt(_rounds)).decode('utf-8')
+
+def needs_rehash(password_hash):
+    """
+    Перевіряє, чи хеш створено з меншою вартістю, ніж поточна. Хеші з
+    більшою вартістю не чіпаються: перехешування не повинно їх послаблювати.
+
+    Args:
+        password_hash (str): bcrypt-хеш виду $2b$12$...
+
+    Returns:
+        bool: True, якщо хеш слід перерахувати
+    """
+    try:
+        return int(password_hash.split('$')[2]) < _rounds
+    except (IndexError, ValueError, AttributeError):
+        return True
+
+def check_password(password, password_hash):
+    """
+    Перевіряє пароль у пулі bcrypt.
+
+    Args:
+        password (str): Пароль у відкритому вигляді
+        password_hash (str | None): Хеш з БД; None — користувача не існує,
+            тоді перевірка йде проти фіктивного хешу, щоб час відповіді не
+            видавав, чи зареєстровано email
+
+    Returns:
+        bool: True, якщо пароль правильний
+
+    Raises:
+        PasswordCheckBusy: Пул перевантажений або перевірка не вклалася в BCRYPT_TIMEOUT
+    """
+    if password_hash is None:
+        _pool.run('checkpw', bcrypt.checkpw, password.encode('utf-8'), _dummy_password_hash())
+        return False
+    return _pool.run('checkpw', bcrypt.checkpw, password.encode('utf-8'), password_hash.encode('utf-8'))
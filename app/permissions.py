@@ -0,0 +1,104 @@
+from functools import wraps
+from flask import g, request, jsonify, redirect, url_for, flash
+from flask_jwt_extended import verify_jwt_in_request, get_jwt
+from models import Role
+import logging
+
+logger = logging.getLogger(__name__)
+
+class RoleRule:
+    """
+    Правило доступу до endpoint.
+
+    Args:
+        roles (frozenset): Ролі, яким дозволено доступ
+        message (str): Повідомлення для відмови
+        redirect_to (str | None): Endpoint для редиректу (HTML) або None для JSON 403
+    """
+    __slots__ = ('roles', 'message', 'redirect_to')
+
+    def __init__(self, roles, message, redirect_to):
+        self.roles = roles
+        self.message = message
+        self.redirect_to = redirect_to
+
+def requires_role(*roles, message=None, redirect_to='web.dashboard'):
+    """
+    Декоратор, що обмежує доступ до view ролями з JWT.
+
+    Перевірка виконується в before_request за таблицею, побудованою в
+    init_permissions, тобто до тіла view і будь-яких запитів до БД. Якщо
+    таблицю не ініціалізовано, ту саму перевірку виконає обгортка view.
+
+    Args:
+        *roles (Role | str): Дозволені ролі
+        message (str, optional): Повідомлення при відмові
+        redirect_to (str | None): Куди перенаправити з flash-повідомленням;
+            None — відповісти JSON {'error': message} зі статусом 403
+    """
+    rule = RoleRule(
+        frozenset(role.value if isinstance(role, Role) else role for role in roles),
+        message or 'Недостатньо прав для цієї дії',
+        redirect_to
+    )
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if g.get('role_checked_endpoint') != request.endpoint:
+                denied = check_role(rule)
+                if denied is not None:
+                    return denied
+            return view(*args, **kwargs)
+        wrapper.role_rule = rule
+        return wrapper
+    return decorator
+
+def check_role(rule):
+    """
+    Перевіряє JWT і роль користувача для правила.
+
+    Returns:
+        Response | None: Відповідь з відмовою або None, якщо доступ дозволено
+    """
+    verify_jwt_in_request()
+    claims = get_jwt()
+    g.role_checked_endpoint = request.endpoint
+    if claims.get('role') in rule.roles:
+        return None
+    logger.warning(
+        "User %s with role %s denied access to %s", claims.get('sub'), claims.get('role'), request.endpoint
+    )
+    if rule.redirect_to is None:
+        return jsonify({'error': rule.message}), 403
+    flash(rule.message, 'error')
+    return redirect(url_for(rule.redirect_to))
+
+def build_permission_table(app):
+    """
+    Збирає таблицю endpoint → RoleRule з усіх зареєстрованих view.
+
+    Returns:
+        dict: Правила доступу за назвою endpoint
+    """
+    return {
+        endpoint: view.role_rule
+        for endpoint, view in app.view_functions.items()
+        if getattr(view, 'role_rule', None) is not None
+    }
+
+def init_permissions(app):
+    """
+    Будує таблицю прав після реєстрації blueprints і підключає перевірку
+    ролей до обробки запиту.
+    """
+    table = build_permission_table(app)
+    app.extensions['permissions'] = table
+
+    @app.before_request
+    def _check_permissions():
+        rule = table.get(request.endpoint)
+        if rule is not None:
+            return check_role(rule)
+
+    logger.debug("Таблиця прав доступу: %s endpoint", len(table))
@@ -0,0 +1,485 @@
+import os
+import sys
+import json
+import time
+import random
+import marshal
+import pstats
+import cProfile
+import threading
+import logging
+from collections import Counter
+from flask import g, request
+
+logger = logging.getLogger(__name__)
+
+class _StackSampler(threading.Thread):
+    """
+    Потік, який періодично знімає стеки потоків, що обробляють вибрані запити.
+
+    Стеки зберігаються у форматі flamegraph-collapsed
+    ("файл:функція;файл:функція ...") і підсумовуються за endpoint.
+    """
+    def __init__(self, profiler):
+        super().__init__(name='profiler-sampler', daemon=True)
+        self.profiler = profiler
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.profiler.sample_interval):
+            with self.profiler._lock:
+                active = dict(self.profiler._active_threads)
+            if not active:
+                continue
+            frames = sys._current_frames()
+            for thread_id, endpoint in active.items():
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    stack = self.profiler._collapse(frame)
+                    with self.profiler._lock:
+                        self.profiler._samples.setdefault(endpoint, Counter())[stack] += 1
+                        self.profiler._dirty = True
+
+class _SharedStateSync(threading.Thread):
+    """
+    Потік воркера, що застосовує спільні налаштування з PROFILER_DIR і
+    записує знімок зібраних профілів процесу для інших воркерів.
+    """
+    def __init__(self, profiler):
+        super().__init__(name='profiler-sync', daemon=True)
+        self.profiler = profiler
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.profiler.sync_interval):
+            try:
+                self.profiler.sync()
+            except Exception as e:
+                logger.error("Помилка синхронізації профілювальника: %s", e)
+
+class Profiler:
+    """
+    Профілювальник запитів для діагностики в продакшені.
+
+    Вибрані запити (за списком endpoint або з імовірністю sample_rate)
+    обгортаються в cProfile або реєструються у фоновому семплері стеків.
+    Результати агрегуються за endpoint і доступні для завантаження у
+    форматі pstats або flamegraph-collapsed. Налаштування змінюються під час
+    роботи без перезапуску.
+
+    Якщо задано PROFILER_DIR (спільний для воркерів каталог, як METRICS_DIR),
+    налаштування і скидання записуються в settings.json, який кожен воркер
+    перечитує раз на PROFILER_SYNC_INTERVAL секунд, а зібрані профілі кожен
+    воркер записує у власний знімок profile_<pid>.marshal. Зведення і
+    завантаження підсумовують усі знімки, тож охоплюють трафік усіх воркерів.
+    Без PROFILER_DIR стан зберігається в межах процесу.
+    """
+    MODES = ('cprofile', 'sampler')
+
+    def __init__(self, app=None):
+        self.enabled = False
+        self.mode = 'cprofile'
+        self.endpoints = set()
+        self.sample_rate = 0.0
+        self.sample_interval = 0.005
+        self.max_depth = 64
+        self._lock = threading.Lock()
+        # cProfile в одному процесі безпечно запускати лише для одного запиту одночасно
+        self._cprofile_lock = threading.Lock()
+        self._stats = {}
+        self._samples = {}
+        self._counts = Counter()
+        self._skipped = Counter()
+        self._active_threads = {}
+        self._sampler = None
+        self.directory = None
+        self.sync_interval = 2.0
+        # Номер скидання даних: знімки воркерів зі старшим номером ігноруються
+        self._generation = 0
+        self._dirty = False
+        self._settings_mtime = None
+        self._sync_thread = None
+        self._sync_pid = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault('PROFILER_ENABLED', False)
+        app.config.setdefault('PROFILER_MODE', 'cprofile')
+        app.config.setdefault('PROFILER_ENDPOINTS', '')
+        app.config.setdefault('PROFILER_SAMPLE_RATE', 0.0)
+        app.config.setdefault('PROFILER_SAMPLE_INTERVAL_MS', 5)
+        app.config.setdefault('PROFILER_MAX_STACK_DEPTH', 64)
+        app.config.setdefault('PROFILER_DIR', None)
+        app.config.setdefault('PROFILER_SYNC_INTERVAL', 2)
+        app.extensions['profiler'] = self
+        self.configure(
+            enabled=app.config['PROFILER_ENABLED'],
+            mode=app.config['PROFILER_MODE'],
+            endpoints=app.config['PROFILER_ENDPOINTS'],
+            sample_rate=app.config['PROFILER_SAMPLE_RATE'],
+            sample_interval_ms=app.config['PROFILER_SAMPLE_INTERVAL_MS'],
+            shared=False
+        )
+        self.max_depth = app.config['PROFILER_MAX_STACK_DEPTH']
+        self.sync_interval = float(app.config['PROFILER_SYNC_INTERVAL'])
+        self.directory = app.config['PROFILER_DIR']
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+            # Налаштування, змінені під час роботи, переживають перезапуск воркера
+            self.sync()
+        app.before_request(self._before_request)
+        app.teardown_request(self._teardown_request)
+
+    def configure(self, enabled=None, mode=None, endpoints=None, sample_rate=None, sample_interval_ms=None, shared=True):
+        """
+        Змінює налаштування профілювальника під час роботи.
+
+        Args:
+            enabled (bool, optional): Увімкнути або вимкнути профілювання
+            mode (str, optional): 'cprofile' або 'sampler'
+            endpoints (str | list, optional): Endpoint, які профілюються завжди (через кому або список)
+            sample_rate (float, optional): Частка інших запитів, що профілюються (0..1)
+            sample_interval_ms (float, optional): Інтервал семплера стеків у мс
+            shared (bool): Записати налаштування для інших воркерів (якщо задано PROFILER_DIR)
+
+        Returns:
+            tuple: (dict налаштувань, bool успіх, str повідомлення про помилку або None)
+        """
+        if mode is not None and mode not in self.MODES:
+            return None, False, f"Невідомий режим профілювання: {mode}"
+        if sample_rate is not None:
+            try:
+                sample_rate = float(sample_rate)
+            except (TypeError, ValueError):
+                return None, False, "sample_rate має бути числом"
+            if not 0 <= sample_rate <= 1:
+                return None, False, "sample_rate має бути в межах від 0 до 1"
+        if sample_interval_ms is not None:
+            try:
+                sample_interval_ms = float(sample_interval_ms)
+            except (TypeError, ValueError):
+                return None, False, "sample_interval_ms має бути числом"
+            if sample_interval_ms <= 0:
+                return None, False, "sample_interval_ms має бути більше 0"
+
+        with self._lock:
+            if mode is not None:
+                self.mode = mode
+            if endpoints is not None:
+                if isinstance(endpoints, str):
+                    endpoints = endpoints.split(',')
+                self.endpoints = {name.strip() for name in endpoints if name and name.strip()}
+            if sample_rate is not None:
+                self.sample_rate = sample_rate
+            if sample_interval_ms is not None:
+                self.sample_interval = sample_interval_ms / 1000
+            if enabled is not None:
+                self.enabled = bool(enabled)
+
+        if self.enabled and self.mode == 'sampler':
+            self._start_sampler()
+        else:
+            self._stop_sampler()
+        logger.info(
+            "Профілювальник: enabled=%s mode=%s endpoints=%s sample_rate=%s",
+            self.enabled, self.mode, ','.join(sorted(self.endpoints)), self.sample_rate
+        )
+        if shared and self.directory:
+            self._write_settings()
+        return self.settings(), True, None
+
+    def settings(self):
+        return {
+            'enabled': self.enabled,
+            'mode': self.mode,
+            'endpoints': sorted(self.endpoints),
+            'sample_rate': self.sample_rate,
+            'sample_interval_ms': self.sample_interval * 1000,
+            'pid': os.getpid(),
+            'shared': bool(self.directory)
+        }
+
+    def _settings_path(self):
+        return os.path.join(self.directory, 'settings.json')
+
+    def _snapshot_path(self, pid):
+        return os.path.join(self.directory, f"profile_{pid}.marshal")
+
+    def _write_settings(self):
+        path = self._settings_path()
+        settings = self.settings()
+        settings['generation'] = self._generation
+        try:
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(settings, f)
+            os.replace(tmp_path, path)
+            self._settings_mtime = os.stat(path).st_mtime_ns
+        except OSError as e:
+            logger.error("Не вдалося записати налаштування профілювальника %s: %s", path, e)
+
+    def _start_sync(self):
+        # Потік створюється ліниво і заново після fork, як потік знімків метрик
+        with self._lock:
+            if self._sync_pid == os.getpid():
+                return
+            self._sync_pid = os.getpid()
+            self._sync_thread = _SharedStateSync(self)
+            self._sync_thread.start()
+
+    def sync(self):
+        """
+        Застосовує спільні налаштування з PROFILER_DIR (зокрема скидання даних
+        іншим воркером) і записує знімок профілів процесу, якщо є нові дані.
+        """
+        path = self._settings_path()
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if mtime is not None and mtime != self._settings_mtime:
+            try:
+                with open(path, encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning("Пропущено налаштування профілювальника %s: %s", path, e)
+            else:
+                self._settings_mtime = mtime
+                if data.get('generation', 0) > self._generation:
+                    self._clear(data['generation'])
+                self.configure(
+                    enabled=data.get('enabled'),
+                    mode=data.get('mode'),
+                    endpoints=data.get('endpoints'),
+                    sample_rate=data.get('sample_rate'),
+                    sample_interval_ms=data.get('sample_interval_ms'),
+                    shared=False
+                )
+        if self._dirty:
+            self.flush()
+
+    def flush(self):
+        """Атомарно записує знімок профілів процесу в PROFILER_DIR."""
+        if not self.directory:
+            return
+        with self._lock:
+            data = marshal.dumps({
+                'pid': os.getpid(),
+                'generation': self._generation,
+                'counts': dict(self._counts),
+                'skipped': dict(self._skipped),
+                'samples': {endpoint: dict(samples) for endpoint, samples in self._samples.items()},
+                'stats': {endpoint: stats.stats for endpoint, stats in self._stats.items()}
+            })
+            self._dirty = False
+        path = self._snapshot_path(os.getpid())
+        try:
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.error("Не вдалося записати знімок профілів %s: %s", path, e)
+
+    def _worker_snapshots(self, generation):
+        # Знімки інших воркерів поточного покоління (до скидання — пропускаються)
+        if not self.directory or not os.path.isdir(self.directory):
+            return
+        for filename in os.listdir(self.directory):
+            if not (filename.startswith('profile_') and filename.endswith('.marshal')):
+                continue
+            try:
+                with open(os.path.join(self.directory, filename), 'rb') as f:
+                    data = marshal.load(f)
+            except (OSError, EOFError, ValueError, TypeError) as e:
+                logger.warning("Пропущено знімок профілів %s: %s", filename, e)
+                continue
+            if data.get('pid') == os.getpid() or data.get('generation', 0) < generation:
+                continue
+            yield data
+
+    def _collect(self):
+        """Дані процесу разом зі знімками інших воркерів: (counts, skipped, samples, stats)."""
+        with self._lock:
+            counts = Counter(self._counts)
+            skipped = Counter(self._skipped)
+            samples = {endpoint: Counter(stacks) for endpoint, stacks in self._samples.items()}
+            stats = {}
+            for endpoint, local_stats in self._stats.items():
+                # Stats.add не змінює доданий об'єкт, тож локальні дані лишаються окремо
+                stats[endpoint] = pstats.Stats()
+                stats[endpoint].add(local_stats)
+            generation = self._generation
+        for data in self._worker_snapshots(generation):
+            counts.update(data['counts'])
+            skipped.update(data['skipped'])
+            for endpoint, stacks in data['samples'].items():
+                samples.setdefault(endpoint, Counter()).update(stacks)
+            for endpoint, raw in data['stats'].items():
+                worker_stats = pstats.Stats()
+                worker_stats.stats = raw
+                worker_stats.get_top_level_stats()
+                stats.setdefault(endpoint, pstats.Stats()).add(worker_stats)
+        return counts, skipped, samples, stats
+
+    def _start_sampler(self):
+        if self._sampler is None or not self._sampler.is_alive():
+            self._sampler = _StackSampler(self)
+            self._sampler.start()
+
+    def _stop_sampler(self):
+        if self._sampler is not None:
+            self._sampler.stopped.set()
+            self._sampler = None
+
+    def _should_profile(self, endpoint):
+        if not self.enabled or endpoint is None or endpoint == 'static':
+            return False
+        if endpoint.startswith('profiler.'):
+            return False
+        if endpoint in self.endpoints:
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def _before_request(self):
+        if self.directory and self._sync_pid != os.getpid():
+            self._start_sync()
+        endpoint = request.endpoint
+        if not self._should_profile(endpoint):
+            return
+        if self.mode == 'sampler':
+            with self._lock:
+                self._active_threads[threading.get_ident()] = endpoint
+            g.profiler_mode = 'sampler'
+        else:
+            if not self._cprofile_lock.acquire(blocking=False):
+                # Інший запит уже профілюється — цей пропускаємо, а не чекаємо
+                with self._lock:
+                    self._skipped[endpoint] += 1
+                return
+            profile = cProfile.Profile()
+            g.profiler_mode = 'cprofile'
+            g.profiler_profile = profile
+            profile.enable()
+        g.profiler_endpoint = endpoint
+        g.profiler_started = time.perf_counter()
+
+    def _teardown_request(self, exc):
+        mode = g.pop('profiler_mode', None)
+        if mode is None:
+            return
+        endpoint = g.pop('profiler_endpoint')
+        duration = time.perf_counter() - g.pop('profiler_started')
+        if mode == 'sampler':
+            with self._lock:
+                self._active_threads.pop(threading.get_ident(), None)
+                self._counts[endpoint] += 1
+                self._dirty = True
+            return
+        profile = g.pop('profiler_profile')
+        profile.disable()
+        self._cprofile_lock.release()
+        try:
+            with self._lock:
+                if endpoint in self._stats:
+                    self._stats[endpoint].add(profile)
+                else:
+                    self._stats[endpoint] = pstats.Stats(profile)
+                self._counts[endpoint] += 1
+                self._dirty = True
+        except Exception as e:
+            logger.error("Помилка агрегації профілю %s: %s", endpoint, e)
+        logger.debug("Запит %s профільовано за %.1f мс", endpoint, duration * 1000)
+
+    def _collapse(self, frame):
+        stack = []
+        while frame is not None and len(stack) < self.max_depth:
+            code = frame.f_code
+            stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+            frame = frame.f_back
+        return ';'.join(reversed(stack))
+
+    def summary(self, limit=15):
+        """
+        Повертає зведення за endpoint: кількість профільованих запитів і найдорожчі функції.
+
+        Args:
+            limit (int): Кількість функцій у топі для кожного endpoint
+
+        Returns:
+            dict: endpoint → {'requests', 'skipped', 'samples', 'top'}
+        """
+        counts, skipped, samples, stats_by_endpoint = self._collect()
+        result = {}
+        for endpoint in sorted(set(counts) | set(skipped)):
+            item = {
+                'requests': counts[endpoint],
+                'skipped': skipped[endpoint],
+                'samples': sum(samples.get(endpoint, Counter()).values()),
+                'top': []
+            }
+            stats = stats_by_endpoint.get(endpoint)
+            if stats is not None:
+                rows = sorted(stats.stats.items(), key=lambda entry: entry[1][3], reverse=True)[:limit]
+                for (filename, line, func), (cc, nc, tt, ct, callers) in rows:
+                    item['top'].append({
+                        'function': f"{os.path.basename(filename)}:{line}({func})",
+                        'calls': nc,
+                        'total_time': round(tt, 6),
+                        'cumulative_time': round(ct, 6)
+                    })
+            result[endpoint] = item
+        return result
+
+    def dump_pstats(self, endpoint):
+        """
+        Повертає агреговану статистику endpoint у бінарному форматі pstats
+        (той самий, що пише Stats.dump_stats; відкривається snakeviz, pstats тощо).
+
+        Returns:
+            bytes | None: Вміст файлу або None, якщо даних немає
+        """
+        stats = self._collect()[3].get(endpoint)
+        if stats is None:
+            return None
+        return marshal.dumps(stats.stats)
+
+    def dump_collapsed(self, endpoint):
+        """
+        Повертає стеки endpoint у форматі flamegraph-collapsed
+        (вхід для flamegraph.pl, speedscope, inferno).
+
+        Returns:
+            str | None: Рядки "стек кількість" або None, якщо даних немає
+        """
+        samples = self._collect()[2].get(endpoint)
+        if not samples:
+            return None
+        return '\n'.join(f"{stack} {count}" for stack, count in samples.most_common()) + '\n'
+
+    def _clear(self, generation):
+        with self._lock:
+            self._stats.clear()
+            self._samples.clear()
+            self._counts.clear()
+            self._skipped.clear()
+            self._generation = generation
+            self._dirty = False
+        if self.directory:
+            try:
+                os.remove(self._snapshot_path(os.getpid()))
+            except OSError:
+                pass
+
+    def reset(self):
+        """
+        Очищає зібрані дані. Зі спільним PROFILER_DIR скидання отримує новий
+        номер покоління: знімки інших воркерів до нього більше не враховуються,
+        а самі воркери очищають свої дані під час наступної синхронізації.
+        """
+        self._clear(self._generation + 1)
+        if self.directory:
+            self._write_settings()
+
+profiler = Profiler()
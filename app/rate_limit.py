@@ -0,0 +1,60 @@
+import time
+import threading
+from collections import OrderedDict, deque
+
+class RateLimiter:
+    """
+    Обмежувач частоти подій за ключем (email, IP) у пам'яті процесу.
+
+    Для кожного ключа зберігаються часи останніх `limit` подій (ковзне вікно).
+    Кількість ключів обмежена maxsize: при переповненні спершу видаляються
+    ключі з простроченими подіями, потім найдавніші, тож перебір випадкових
+    email не роздуває пам'ять.
+
+    Args:
+        limit (int): Максимальна кількість подій у вікні
+        window (float): Тривалість вікна в секундах
+        maxsize (int): Максимальна кількість ключів
+    """
+    def __init__(self, limit, window, maxsize=100000):
+        self.limit = limit
+        self.window = window
+        self.maxsize = maxsize
+        self._events = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, key):
+        """
+        Реєструє подію для ключа, якщо ліміт не вичерпано.
+
+        Args:
+            key (str): Ключ обмеження
+
+        Returns:
+            tuple: (allowed: bool, retry_after: float — секунд до звільнення вікна)
+        """
+        now = time.monotonic()
+        with self._lock:
+            events = self._events.get(key)
+            if events is None:
+                if len(self._events) >= self.maxsize:
+                    self._evict(now)
+                events = self._events[key] = deque(maxlen=self.limit)
+            else:
+                self._events.move_to_end(key)
+            if len(events) >= self.limit and now - events[0] < self.window:
+                return False, self.window - (now - events[0])
+            events.append(now)
+            return True, 0.0
+
+    def reset(self, key):
+        with self._lock:
+            self._events.pop(key, None)
+
+    def _evict(self, now):
+        expired = [key for key, events in self._events.items() if not events or now - events[-1] >= self.window]
+        for key in expired:
+            del self._events[key]
+        # Звільняємо із запасом, щоб повний перегляд не повторювався на кожній новій події
+        while len(self._events) >= self.maxsize * 0.9:
+            self._events.popitem(last=False)
@@ -0,0 +1,95 @@
+"""
+Read-моделі для списків і звітів: dataclass з __slots__ замість вкладених
+dict. Будуються прямо з рядків вибірки колонок, шаблони читають їх як
+атрибути, а FastJSONProvider серіалізує без проміжних перетворень.
+"""
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal
+
+@dataclass(slots=True)
+class AirportRef:
+    id: int
+    code: str
+    name: str
+
+@dataclass(slots=True)
+class FareView:
+    id: int
+    name: str
+    base_price: Decimal
+    base_currency: str
+    seat_limit: int
+    seats_sold: int
+
+@dataclass(slots=True)
+class FlightView:
+    id: int
+    flight_number: str
+    origin_airport: AirportRef
+    destination_airport: AirportRef
+    departure_time: datetime
+    arrival_time: datetime
+    aircraft_model: str
+    seat_capacity: int
+    fares: list = field(default_factory=list)
+
+@dataclass(slots=True)
+class SoldTicketRow:
+    id: int
+    flight_number: str
+    origin_code: str
+    destination_code: str
+    passenger_name: str
+    fare_name: str
+    seat_number: str
+    price: Decimal
+    currency_code: str
+    cash_desk_name: str
+    sold_at: datetime
+
+@dataclass(slots=True)
+class AirportCode:
+    code: str
+
+@dataclass(slots=True)
+class FlightRef:
+    id: int
+    flight_number: str
+    origin_airport: AirportCode
+    destination_airport: AirportCode
+
+@dataclass(slots=True)
+class UserRow:
+    id: int
+    name: str
+    email: str
+    role: str
+    created_at: datetime
+    password_changed: bool
+    airport_id: int | None
+
+@dataclass(slots=True)
+class CashDeskRow:
+    id: int
+    name: str
+    airport_id: int
+    airport_name: str
+    is_active: bool
+
+@dataclass(slots=True)
+class CashDeskAccountRow:
+    id: int
+    cash_desk_id: int
+    currency_code: str
+    balance: Decimal
+    last_updated: datetime
+
+@dataclass(slots=True)
+class BalanceRow:
+    cash_desk_id: int
+    cash_desk_name: str
+    currency_code: str
+    balance_date1: Decimal
+    balance_date2: Decimal | None = None
+    difference: Decimal | None = None
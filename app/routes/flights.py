@@ -1,7 +1,9 @@
 from flask import Blueprint, request, jsonify, render_template, redirect, url_for, flash
-from flask_jwt_extended import jwt_required, get_jwt
+from permissions import requires_role
+from versioning import conditional, flights_stamp
 from models import Role, Airport, Flight
-from services.flight_service import create_flight, create_flight_fare, get_all_flights
+from pagination import PageRequest
+from services.flight_service import create_flight, create_flight_fare, list_flights, get_flight_details, FLIGHT_SORT_KEYS
 import logging
 
 logger = logging.getLogger(__name__)
@@ -9,22 +11,20 @@ logger = logging.getLogger(__name__)
 flights_bp = Blueprint('flights', __name__, template_folder='../templates')
 
 @flights_bp.route('/flights', methods=['GET', 'POST'])
-@jwt_required()
+@requires_role(Role.ADMIN, message='Only admins can manage flights', redirect_to=None)
+@conditional(flights_stamp)
 def flights():
-    claims = get_jwt()
-    if claims['role'] != Role.ADMIN.value:
-        return jsonify({'error': 'Only admins can manage flights'}), 403
-    
     if request.method == 'GET':
         try:
-            flights_list, success, error_msg = get_all_flights()
+            page_request = PageRequest.from_args(request.args, FLIGHT_SORT_KEYS, 'id')
+            page, success, error_msg = list_flights(page_request)
             if success:
-                return jsonify(flights_list)
+                return jsonify(page.to_dict())
             else:
-                logger.error(f"Error retrieving flights: {error_msg}")
+                logger.error("Error retrieving flights: %s", error_msg)
                 return jsonify({'error': error_msg}), 500
         except Exception as e:
-            logger.error(f"Unexpected error retrieving flights: {e}")
+            logger.error("Unexpected error retrieving flights: %s", e)
             return jsonify({'error': 'Failed to retrieve flights'}), 500
     
     elif request.method == 'POST':
@@ -55,16 +55,12 @@ def flights():
             else:
                 return jsonify({'error': error_msg}), 400
         except Exception as e:
-            logger.error(f"Unexpected error creating flight: {e}")
+            logger.error("Unexpected error creating flight: %s", e)
             return jsonify({'error': 'Failed to create flight'}), 500
 
 @flights_bp.route('/flights/<int:flight_id>/fares', methods=['POST'])
-@jwt_required()
+@requires_role(Role.ADMIN, message='Only admins can manage fares', redirect_to=None)
 def create_fare(flight_id):
-    claims = get_jwt()
-    if claims['role'] != Role.ADMIN.value:
-        return jsonify({'error': 'Only admins can manage fares'}), 403
-    
     try:
         data = request.get_json()
         if not data:
@@ -87,17 +83,12 @@ def create_fare(flight_id):
         else:
             return jsonify({'error': error_msg}), 400
     except Exception as e:
-        logger.error(f"Unexpected error creating fare: {e}")
+        logger.error("Unexpected error creating fare: %s", e)
         return jsonify({'error': 'Failed to create fare'}), 500
 
 @flights_bp.route('/web/flights', methods=['GET', 'POST'])
-@jwt_required()
+@requires_role(Role.ADMIN, message='Тільки адміністратори можуть керувати рейсами')
 def manage_flights():
-    claims = get_jwt()
-    if claims['role'] != Role.ADMIN.value:
-        flash('Тільки адміністратори можуть керувати рейсами', 'error')
-        return redirect(url_for('web.dashboard'))
-    
     if request.method == 'POST':
         flight_number = request.form.get('flight_number')
         origin_airport_id = request.form.get('origin_airport_id')
@@ -124,22 +115,23 @@ def manage_flights():
             flash(f'Помилка створення рейсу: {error_msg}', 'error')
         return redirect(url_for('flights.manage_flights'))
     
-    flights_list, success, error_msg = get_all_flights()
+    page, success, error_msg = list_flights(PageRequest.from_args(request.args, FLIGHT_SORT_KEYS, 'id'))
     airports = Airport.query.all()
     if not success:
         flash(f'Помилка отримання списку рейсів: {error_msg}', 'error')
         return redirect(url_for('web.dashboard'))
     
-    return render_template('flights/manage_flights.html', flights=flights_list, airports=airports)
+    return render_template(
+        'flights/manage_flights.html',
+        flights=page.items,
+        page=page,
+        sort_keys=FLIGHT_SORT_KEYS,
+        airports=airports
+    )
 
 @flights_bp.route('/web/flights/<int:flight_id>/fares', methods=['GET', 'POST'])
-@jwt_required()
+@requires_role(Role.ADMIN, message='Тільки адміністратори можуть керувати тарифами')
 def add_flight_fare(flight_id):
-    claims = get_jwt()
-    if claims['role'] != Role.ADMIN.value:
-        flash('Тільки адміністратори можуть керувати тарифами', 'error')
-        return redirect(url_for('flights.manage_flights'))
-    
     flight = Flight.query.get(flight_id)
     if not flight:
         flash('Рейс не знайдено', 'error')
@@ -167,8 +159,7 @@ def add_flight_fare(flight_id):
             flash(f'Помилка створення тарифу: {error_msg}', 'error')
         return redirect(url_for('flights.add_flight_fare', flight_id=flight_id))
     
-    flights_list, success, error_msg = get_all_flights()
-    flight_data = next((f for f in flights_list if f['id'] == flight_id), None)
+    flight_data, success, error_msg = get_flight_details(flight_id)
     if not flight_data:
         flash('Рейс не знайдено', 'error')
         return redirect(url_for('flights.manage_flights'))
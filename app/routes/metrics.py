@@ -0,0 +1,25 @@
+import hmac
+from flask import Blueprint, request, jsonify, Response, current_app
+from metrics import registry
+import logging
+
+logger = logging.getLogger(__name__)
+
+metrics_bp = Blueprint('metrics', __name__)
+
+@metrics_bp.route('/metrics')
+def metrics():
+    # Метрики містять продажі за аеропортами і суми знятої готівки: без токена ендпоінт вимкнено
+    token = current_app.config.get('METRICS_TOKEN')
+    if not token:
+        logger.debug("Metrics request from %s rejected: METRICS_TOKEN is not configured", request.remote_addr)
+        return jsonify({'error': 'Not found'}), 404
+    provided = request.headers.get('Authorization', '').removeprefix('Bearer ').strip()
+    if not hmac.compare_digest(provided, token):
+        logger.warning("Unauthorized metrics request from %s", request.remote_addr)
+        return jsonify({'error': 'Invalid metrics token'}), 401
+    try:
+        return Response(registry.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+    except Exception as e:
+        logger.error("Error rendering metrics: %s", e)
+        return jsonify({'error': 'Failed to render metrics'}), 500
@@ -0,0 +1,63 @@
+from flask import Blueprint, request, jsonify, Response
+from flask_jwt_extended import get_jwt
+from permissions import requires_role
+from models import Role
+from profiler import profiler
+import logging
+
+logger = logging.getLogger(__name__)
+
+profiler_bp = Blueprint('profiler', __name__)
+
+@profiler_bp.route('/admin/profiler', methods=['GET', 'POST'])
+@requires_role(Role.ADMIN, message='Only admins can access the profiler', redirect_to=None)
+def profiler_settings():
+    if request.method == 'POST':
+        data = request.get_json(silent=True)
+        if not data:
+            return jsonify({'error': 'No input data provided'}), 400
+        settings, success, error_msg = profiler.configure(
+            enabled=data.get('enabled'),
+            mode=data.get('mode'),
+            endpoints=data.get('endpoints'),
+            sample_rate=data.get('sample_rate'),
+            sample_interval_ms=data.get('sample_interval_ms')
+        )
+        if not success:
+            return jsonify({'error': error_msg}), 400
+        logger.info("Admin %s changed profiler settings: %s", get_jwt()['sub'], settings)
+        return jsonify(settings)
+    return jsonify({
+        'settings': profiler.settings(),
+        'endpoints': profiler.summary(limit=request.args.get('limit', 15, type=int))
+    })
+
+@profiler_bp.route('/admin/profiler/reset', methods=['POST'])
+@requires_role(Role.ADMIN, message='Only admins can access the profiler', redirect_to=None)
+def profiler_reset():
+    profiler.reset()
+    return jsonify({'message': 'Profiler data cleared'})
+
+@profiler_bp.route('/admin/profiler/<endpoint>/pstats')
+@requires_role(Role.ADMIN, message='Only admins can access the profiler', redirect_to=None)
+def profiler_pstats(endpoint):
+    data = profiler.dump_pstats(endpoint)
+    if data is None:
+        return jsonify({'error': 'No cProfile data for this endpoint'}), 404
+    return Response(
+        data,
+        mimetype='application/octet-stream',
+        headers={'Content-Disposition': f'attachment; filename={endpoint}.pstats'}
+    )
+
+@profiler_bp.route('/admin/profiler/<endpoint>/collapsed')
+@requires_role(Role.ADMIN, message='Only admins can access the profiler', redirect_to=None)
+def profiler_collapsed(endpoint):
+    data = profiler.dump_collapsed(endpoint)
+    if data is None:
+        return jsonify({'error': 'No sampler data for this endpoint'}), 404
+    return Response(
+        data,
+        mimetype='text/plain',
+        headers={'Content-Disposition': f'attachment; filename={endpoint}.collapsed.txt'}
+    )
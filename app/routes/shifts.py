@@ -1,5 +1,6 @@
 from flask import Blueprint, redirect, url_for, flash, request
-from flask_jwt_extended import jwt_required, get_jwt
+from flask_jwt_extended import get_jwt
+from permissions import requires_role
 from models import Role, ShiftStatus
 from services.shift_service import open_shift as shift_service_open_shift, close_shift as shift_service_close_shift
 import logging
@@ -8,12 +9,9 @@ logger = logging.getLogger(__name__)
 shifts_bp = Blueprint('shifts', __name__)
 
 @shifts_bp.route('/web/shifts/open', methods=['POST'])
-@jwt_required()
+@requires_role(Role.CASHIER, message='Тільки касири можуть відкривати зміни')
 def open_shift():
     claims = get_jwt()
-    if claims['role'] != Role.CASHIER.value:
-        flash('Тільки касири можуть відкривати зміни', 'error')
-        return redirect(url_for('web.dashboard'))
     user_id = int(claims['sub'])
     cash_desk_id = request.form.get('cash_desk_id')
     if not cash_desk_id:
@@ -27,12 +25,9 @@ def open_shift():
     return redirect(url_for('web.dashboard'))
 
 @shifts_bp.route('/web/shifts/close', methods=['POST'])
-@jwt_required()
+@requires_role(Role.CASHIER, message='Тільки касири можуть закривати зміни')
 def close_shift():
     claims = get_jwt()
-    if claims['role'] != Role.CASHIER.value:
-        flash('Тільки касири можуть закривати зміни', 'error')
-        return redirect(url_for('web.dashboard'))
     user_id = int(claims['sub'])
     shift_data, success, error_msg = shift_service_close_shift(user_id)
     if success:
@@ -1,21 +1,21 @@
 from flask import Blueprint, request, jsonify, render_template, redirect, url_for, flash
 from flask_jwt_extended import jwt_required, get_jwt
-from models import ExchangeRate, Role, Flight, FlightFare, Shift, ShiftStatus, CashDeskAccount, Ticket, TicketStatus
-from services.ticket_service import sell_ticket, refund_ticket
+from permissions import requires_role
+from versioning import conditional, flight_fares_stamp, exchange_rate_stamp
+from models import db, ExchangeRate, Role, Flight, FlightFare, Shift, ShiftStatus, CashDeskAccount
+from services.ticket_service import sell_ticket, refund_ticket, shift_tickets_query
 from services.cash_desk_service import withdraw_from_cash_desk
+from services.seat_map_service import get_flight_seats
+from services.quote_service import get_flight_quote
 import logging
 
 logger = logging.getLogger(__name__)
 tickets_bp = Blueprint('tickets', __name__, template_folder='../templates')
 
 @tickets_bp.route('/web/tickets/sell', methods=['GET', 'POST'])
-@jwt_required()
+@requires_role(Role.CASHIER, message='Тільки касири можуть продавати квитки')
 def sell_ticket_web():
     claims = get_jwt()
-    if claims['role'] != Role.CASHIER.value:
-        flash('Тільки касири можуть продавати квитки', 'error')
-        return redirect(url_for('web.dashboard'))
-
     user_id = int(claims['sub'])
     open_shift = Shift.query.filter_by(cashier_id=user_id, status=ShiftStatus.OPEN).first()
     if not open_shift:
@@ -44,7 +44,11 @@ def sell_ticket_web():
             return redirect(url_for('tickets.sell_ticket_web'))
 
     flights = Flight.query.all()
-    currencies = ['USD', 'UAH', 'EUR']
+    # Валюти рахунків каси — ті самі, в яких /quote рахує ціни
+    currencies = [
+        account.currency_code
+        for account in CashDeskAccount.query.filter_by(cash_desk_id=open_shift.cash_desk_id).order_by(CashDeskAccount.currency_code)
+    ]
     return render_template(
         'tickets/sell_ticket.html',
         flights=flights,
@@ -52,12 +56,9 @@ def sell_ticket_web():
     )
 
 @tickets_bp.route('/tickets', methods=['POST'])
-@jwt_required()
+@requires_role(Role.CASHIER, message='Only cashiers can sell tickets', redirect_to=None)
 def sell_ticket_api():
     claims = get_jwt()
-    if claims['role'] != Role.CASHIER.value:
-        return jsonify({'error': 'Only cashiers can sell tickets'}), 403
-
     try:
         data = request.get_json()
         if not data:
@@ -87,14 +88,15 @@ def sell_ticket_api():
             return jsonify({'error': error_msg}), 400
 
     except Exception as e:
-        logger.error(f"Unexpected error selling ticket: {e}")
+        logger.error("Unexpected error selling ticket: %s", e)
         return jsonify({'error': 'Failed to sell ticket'}), 500
 
 @tickets_bp.route('/flights/<int:flight_id>/fares', methods=['GET'])
 @jwt_required()
+@conditional(flight_fares_stamp)
 def get_fares_for_flight(flight_id):
     try:
-        logger.debug(f"Fetching fares for flight_id: {flight_id}")
+        logger.debug("Fetching fares for flight_id: %s", flight_id)
         fares = FlightFare.query.filter_by(flight_id=flight_id).all()
         fares_list = [
             {
@@ -106,14 +108,47 @@ def get_fares_for_flight(flight_id):
                 'seats_sold': fare.seats_sold
             } for fare in fares
         ]
-        logger.debug(f"Fares found: {len(fares_list)}")
+        logger.debug("Fares found: %s", len(fares_list))
         return jsonify(fares_list), 200
     except Exception as e:
-        logger.error(f"Error retrieving fares for flight {flight_id}: {e}")
+        logger.error("Error retrieving fares for flight %s: %s", flight_id, e)
         return jsonify({'error': 'Failed to retrieve fares'}), 500
 
+@tickets_bp.route('/flights/<int:flight_id>/seats', methods=['GET'])
+@jwt_required()
+def get_seats_for_flight(flight_id):
+    seats, success, error_msg = get_flight_seats(flight_id)
+    if not success:
+        status = 404 if error_msg == "Рейс не знайдено" else 500
+        return jsonify({'error': error_msg}), status
+    return jsonify(seats), 200
+
+@tickets_bp.route('/quote', methods=['GET'])
+@requires_role(Role.CASHIER, message='Only cashiers can request quotes', redirect_to=None)
+def get_quote():
+    flight_id = request.args.get('flight_id', type=int)
+    if not flight_id:
+        return jsonify({'error': 'Missing flight_id'}), 400
+    user_id = int(get_jwt()['sub'])
+    open_shift = Shift.query.filter_by(cashier_id=user_id, status=ShiftStatus.OPEN).first()
+    if not open_shift:
+        return jsonify({'error': 'No open shift found'}), 400
+    currencies = [
+        account.currency_code
+        for account in CashDeskAccount.query.filter_by(cash_desk_id=open_shift.cash_desk_id).order_by(CashDeskAccount.currency_code)
+    ]
+    quote, success, error_msg = get_flight_quote(flight_id, currencies)
+    if not success:
+        return jsonify({'error': error_msg}), 500
+    # ETag від вмісту: повторний запит того самого рейсу повертає 304 без тіла
+    response = jsonify(quote)
+    response.add_etag()
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response.make_conditional(request)
+
 @tickets_bp.route('/exchange_rates', methods=['GET'])
 @jwt_required()
+@conditional(exchange_rate_stamp)
 def get_exchange_rate():
     try:
         base_currency = request.args.get('base_currency')
@@ -127,26 +162,22 @@ def get_exchange_rate():
         ).order_by(ExchangeRate.valid_at.desc()).first()
 
         if not exchange_rate:
-            logger.warning(f"Exchange rate not found for {base_currency} -> {target_currency}")
+            logger.warning("Exchange rate not found for %s -> %s", base_currency, target_currency)
             return jsonify({'error': 'Exchange rate not found'}), 404
 
-        logger.debug(f"Exchange rate found: {base_currency} -> {target_currency}, rate={exchange_rate.rate}")
+        logger.debug("Exchange rate found: %s -> %s, rate=%s", base_currency, target_currency, exchange_rate.rate)
         return jsonify({
             'rate': float(exchange_rate.rate),
             'valid_at': exchange_rate.valid_at.isoformat()
         }), 200
     except Exception as e:
-        logger.error(f"Error retrieving exchange rate: {e}")
+        logger.error("Error retrieving exchange rate: %s", e)
         return jsonify({'error': 'Failed to retrieve exchange rate'}), 500
 
 @tickets_bp.route('/web/cash-desks/withdraw', methods=['GET', 'POST'])
-@jwt_required()
+@requires_role(Role.CASHIER, message='Тільки касири можуть знімати гроші з каси')
 def withdraw_cash():
     claims = get_jwt()
-    if claims['role'] != Role.CASHIER.value:
-        flash('Тільки касири можуть знімати гроші з каси', 'error')
-        return redirect(url_for('web.dashboard'))
-
     user_id = int(claims['sub'])
     open_shift = Shift.query.filter_by(cashier_id=user_id, status=ShiftStatus.OPEN).first()
     if not open_shift:
@@ -184,13 +215,9 @@ def withdraw_cash():
     )
 
 @tickets_bp.route('/web/tickets/refund', methods=['GET', 'POST'])
-@jwt_required()
+@requires_role(Role.CASHIER, message='Тільки касири можуть повертати квитки')
 def refund_ticket_web():
     claims = get_jwt()
-    if claims['role'] != Role.CASHIER.value:
-        flash('Тільки касири можуть повертати квитки', 'error')
-        return redirect(url_for('web.dashboard'))
-
     user_id = int(claims['sub'])
     open_shift = Shift.query.filter_by(cashier_id=user_id, status=ShiftStatus.OPEN).first()
     if not open_shift:
@@ -212,7 +239,7 @@ def refund_ticket_web():
             return redirect(url_for('tickets.refund_ticket_web'))
 
     # Отримання квитків для поточної зміни
-    tickets = Ticket.query.filter_by(shift_id=open_shift.id, status=TicketStatus.SOLD).all()
+    tickets = db.session.execute(shift_tickets_query(open_shift.id)).scalars().all()
     return render_template(
         'tickets/refund_ticket.html',
         tickets=tickets
@@ -1,8 +1,11 @@
 from flask import Blueprint, request, jsonify, render_template, redirect, url_for, flash
-from flask_jwt_extended import jwt_required, get_jwt
+from flask_jwt_extended import get_jwt
+from permissions import requires_role
+from versioning import conditional, users_stamp
 from models import Role, Airport, Shift, CashDesk
-from services.user_service import create_user, get_all_users, change_user_password, get_user_by_id
-from services.cash_desk_service import get_all_cash_desks, create_cash_desk, update_cash_desk, create_cash_desk_account, get_cash_desk_accounts
+from pagination import PageRequest
+from services.user_service import create_user, list_users, change_user_password, get_user_by_id, USER_SORT_KEYS
+from services.cash_desk_service import list_cash_desks, CASH_DESK_SORT_KEYS, create_cash_desk, update_cash_desk, create_cash_desk_account, get_cash_desk_accounts
 import logging
 
 logger = logging.getLogger(__name__)
@@ -10,18 +13,20 @@ logger = logging.getLogger(__name__)
 users_bp = Blueprint('users', __name__, template_folder='../templates')
 
 @users_bp.route('/users', methods=['GET', 'POST'])
-@jwt_required()
+@requires_role(Role.ADMIN, message='Only admins can manage users', redirect_to=None)
+@conditional(users_stamp)
 def users():
     if request.method == 'GET':
         try:
-            users_list, success, error_msg = get_all_users()
+            page_request = PageRequest.from_args(request.args, USER_SORT_KEYS, 'id')
+            page, success, error_msg = list_users(page_request)
             if success:
-                return jsonify(users_list)
+                return jsonify(page.to_dict())
             else:
-                logger.error(f"Error retrieving users: {error_msg}")
+                logger.error("Error retrieving users: %s", error_msg)
                 return jsonify({'error': error_msg}), 500
         except Exception as e:
-            logger.error(f"Unexpected error retrieving users: {e}")
+            logger.error("Unexpected error retrieving users: %s", e)
             return jsonify({'error': 'Failed to retrieve users'}), 500
     elif request.method == 'POST':
         try:
@@ -53,20 +58,15 @@ def users():
             else:
                 return jsonify({'error': error_msg}), 400
         except Exception as e:
-            logger.error(f"Unexpected error creating user: {e}")
+            logger.error("Unexpected error creating user: %s", e)
             return jsonify({'error': 'Failed to create user'}), 500
 
 @users_bp.route('/users/<int:user_id>/password', methods=['PUT'])
-@jwt_required()
+@requires_role(Role.ADMIN, message='Only admins can change user passwords', redirect_to=None)
 def change_user_password_route(user_id):
     try:
-        claims = get_jwt()
-        admin_id = int(claims['sub'])
-        role = claims['role']
-        logger.info(f"User {admin_id} with role {role} attempting to change password for user {user_id}")
-        if role != Role.ADMIN.value:
-            logger.warning(f"User {admin_id} with role {role} attempted to change password for user {user_id}")
-            return jsonify({'error': 'Only admins can change user passwords'}), 403
+        admin_id = int(get_jwt()['sub'])
+        logger.info("Admin %s attempting to change password for user %s", admin_id, user_id)
         data = request.get_json()
         if not data:
             return jsonify({'error': 'No input data provided'}), 400
@@ -82,17 +82,12 @@ def change_user_password_route(user_id):
         else:
             return jsonify({'error': error_msg}), 400
     except Exception as e:
-        logger.error(f"Unexpected error changing password for user {user_id}: {e}")
+        logger.error("Unexpected error changing password for user %s: %s", user_id, e)
         return jsonify({'error': 'Failed to change password'}), 500
 
 @users_bp.route('/web/users', methods=['GET', 'POST'])
-@jwt_required()
+@requires_role(Role.ADMIN, message='Тільки адміністратори можуть керувати користувачами')
 def manage_users():
-    claims = get_jwt()
-    if claims['role'] != Role.ADMIN.value:
-        flash('Тільки адміністратори можуть керувати користувачами', 'error')
-        return redirect(url_for('web.dashboard'))
-  
     if request.method == 'POST':
         name = request.form.get('name')
         email = request.form.get('email')
@@ -121,22 +116,24 @@ def manage_users():
             flash(f'Помилка створення користувача: {error_msg}', 'error')
         return redirect(url_for('users.manage_users'))
    
-    users_list, success, error_msg = get_all_users()
+    page, success, error_msg = list_users(PageRequest.from_args(request.args, USER_SORT_KEYS, 'id'))
     airports = Airport.query.all()
     if not success:
         flash(f'Помилка отримання списку користувачів: {error_msg}', 'error')
         return redirect(url_for('web.dashboard'))
   
-    return render_template('users/manage_users.html', users=users_list, roles=[r.value for r in Role], airports=airports)
+    return render_template(
+        'users/manage_users.html',
+        users=page.items,
+        page=page,
+        sort_keys=USER_SORT_KEYS,
+        roles=[r.value for r in Role],
+        airports=airports
+    )
 
 @users_bp.route('/web/users/<int:user_id>', methods=['GET'])
-@jwt_required()
+@requires_role(Role.ADMIN, message='Тільки адміністратори можуть керувати користувачами')
 def manage_user(user_id):
-    claims = get_jwt()
-    if claims['role'] != Role.ADMIN.value:
-        flash('Тільки адміністратори можуть керувати користувачами', 'error')
-        return redirect(url_for('web.dashboard'))
-  
     user, success, error_msg = get_user_by_id(user_id)
     if not success:
         flash(f'Помилка: {error_msg}', 'error')
@@ -145,20 +142,15 @@ def manage_user(user_id):
     shifts = []
     if user.role == Role.CASHIER:
         shifts = Shift.query.filter_by(cashier_id=user_id).all()
-        logger.debug(f"Retrieved {len(shifts)} shifts for user {user_id}")
+        logger.debug("Retrieved %s shifts for user %s", len(shifts), user_id)
   
     return render_template('users/manage_user.html', user=user, shifts=shifts)
 
 @users_bp.route('/web/users/<int:user_id>/change-password', methods=['POST'])
-@jwt_required()
+@requires_role(Role.ADMIN, message='Тільки адміністратори можуть змінювати паролі')
 def change_user_password_web(user_id):
-    logger.debug(f"Processing change_user_password_web for user_id={user_id}")
-    claims = get_jwt()
-    admin_id = int(claims['sub'])
-    if claims['role'] != Role.ADMIN.value:
-        flash('Тільки адміністратори можуть змінювати паролі', 'error')
-        return redirect(url_for('users.manage_user', user_id=user_id))
-  
+    logger.debug("Processing change_user_password_web for user_id=%s", user_id)
+    admin_id = int(get_jwt()['sub'])
     try:
         new_password = request.form.get('new_password')
         if not new_password:
@@ -171,22 +163,17 @@ def change_user_password_web(user_id):
         else:
             flash(f'Помилка зміни пароля: {error_msg}', 'error')
       
-        logger.debug(f"Redirecting to users.manage_user with user_id={user_id}")
+        logger.debug("Redirecting to users.manage_user with user_id=%s", user_id)
         return redirect(url_for('users.manage_user', user_id=user_id))
   
     except Exception as e:
-        logger.error(f"Помилка зміни пароля для користувача {user_id} адміністратором {admin_id}: {e}")
+        logger.error("Помилка зміни пароля для користувача %s адміністратором %s: %s", user_id, admin_id, e)
         flash('Не вдалося змінити пароль', 'error')
         return redirect(url_for('users.manage_user', user_id=user_id))
 
 @users_bp.route('/web/cash-desks', methods=['GET', 'POST'])
-@jwt_required()
+@requires_role(Role.ADMIN, message='Тільки адміністратори можуть керувати касами')
 def manage_cash_desks():
-    claims = get_jwt()
-    if claims['role'] != Role.ADMIN.value:
-        flash('Тільки адміністратори можуть керувати касами', 'error')
-        return redirect(url_for('web.dashboard'))
-  
     if request.method == 'POST':
         name = request.form.get('name')
         airport_id = request.form.get('airport_id')
@@ -221,7 +208,7 @@ def manage_cash_desks():
        
         return redirect(url_for('users.manage_cash_desks'))
    
-    cash_desks_list, success, error_msg = get_all_cash_desks()
+    page, success, error_msg = list_cash_desks(PageRequest.from_args(request.args, CASH_DESK_SORT_KEYS, 'id'))
     airports = Airport.query.all()
     if not success:
         flash(f'Помилка отримання списку кас: {error_msg}', 'error')
@@ -229,18 +216,24 @@ def manage_cash_desks():
   
     return render_template(
         'users/manage_cash_desks.html',
-        cash_desks=cash_desks_list,
+        cash_desks=page.items,
+        page=page,
+        sort_keys=CASH_DESK_SORT_KEYS,
         airports=airports
     )
 
+@users_bp.route('/cash-desks', methods=['GET'])
+@requires_role(Role.ADMIN, message='Only admins can manage cash desks', redirect_to=None)
+def cash_desks():
+    page, success, error_msg = list_cash_desks(PageRequest.from_args(request.args, CASH_DESK_SORT_KEYS, 'id'))
+    if not success:
+        logger.error("Error retrieving cash desks: %s", error_msg)
+        return jsonify({'error': error_msg}), 500
+    return jsonify(page.to_dict())
+
 @users_bp.route('/web/cash-desks/<int:cash_desk_id>/accounts', methods=['GET', 'POST'])
-@jwt_required()
+@requires_role(Role.ADMIN, message='Тільки адміністратори можуть керувати рахунками кас')
 def manage_cash_desk_accounts(cash_desk_id):
-    claims = get_jwt()
-    if claims['role'] != Role.ADMIN.value:
-        flash('Тільки адміністратори можуть керувати рахунками кас', 'error')
-        return redirect(url_for('web.dashboard'))
-    
     cash_desk = CashDesk.query.get(cash_desk_id)
     if not cash_desk:
         flash('Касу не знайдено', 'error')
@@ -1,15 +1,20 @@
 import csv
 from io import StringIO
-from flask import Blueprint, jsonify, render_template, request, redirect, url_for, make_response, flash
-from flask_jwt_extended import create_access_token, get_jwt_identity, jwt_required, get_jwt
+from flask import Blueprint, jsonify, render_template, request, redirect, url_for, make_response, flash, current_app
+from flask_jwt_extended import get_jwt_identity, jwt_required, get_jwt, decode_token
 from werkzeug import Response
-from services.flight_service import get_all_flights
-from services.auth_service import authenticate_user
-from services.user_service import change_user_password_by_user, get_user_by_id, get_admin_dashboard_stats
-from services.shift_service import get_available_cash_desks
+from permissions import requires_role
+from versioning import conditional, flights_by_airport_stamp
+from services.flight_service import get_flight_details, get_flights_from_airport
+from services.auth_service import (
+    authenticate_user, issue_access_token, issue_refresh_token, rotate_refresh_token, revoke_refresh_token,
+    LoginThrottled
+)
+from services.user_service import change_user_password_by_user, get_user_by_id
+from services.shift_service import get_available_cash_desks, shift_transactions_query
 from services.cash_desk_service import get_cash_desk_accounts, get_cash_desk_balances_by_date
 from services.ticket_service import get_sold_tickets_by_criteria
-from models import Shift, CashDesk, ShiftStatus, Transaction, Role, Airport, Flight
+from models import db, Shift, CashDesk, ShiftStatus, Role
 import logging
 from datetime import datetime
 
@@ -17,73 +22,115 @@ logger = logging.getLogger(__name__)
 
 web_bp = Blueprint('web', __name__, template_folder='../templates')
 
+def _set_access_cookies(response, access_token, refresh_token=None):
+    """Встановлює access-токен у httponly-куку та в куку для JavaScript, а refresh-токен — лише в httponly-куку."""
+    response.set_cookie(
+        'access_token',
+        access_token,
+        httponly=True,
+        secure=False,
+        samesite='Lax',
+        path='/',
+        max_age=1800
+    )
+    response.set_cookie(
+        'js_access_token',
+        access_token,
+        httponly=False,
+        secure=False,
+        samesite='Lax',
+        path='/',
+        max_age=1800
+    )
+    if refresh_token is not None:
+        response.set_cookie(
+            'refresh_token',
+            refresh_token,
+            httponly=True,
+            secure=False,
+            samesite='Lax',
+            path='/',
+            max_age=current_app.config['REFRESH_TOKEN_EXPIRES']
+        )
+
+def _safe_next_url(next_url):
+    """Дозволяє перенаправлення лише на відносні шляхи цього застосунку."""
+    if next_url and next_url.startswith('/') and not next_url.startswith('//') and '\\' not in next_url:
+        return next_url
+    return None
+
 @web_bp.route('/login', methods=['GET', 'POST'])
 def login():
     if request.method == 'GET':
         logger.debug("Відображення форми входу")
         return render_template('login.html')
     try:
-        logger.debug(f"Отримано POST-запит на /login з Content-Type: {request.content_type}")
+        logger.debug("Отримано POST-запит на /login з Content-Type: %s", request.content_type)
         data = request.form
         email = data.get('email')
         password = data.get('password')
         if not all([email, password]):
-            logger.warning(f"Спроба входу з відсутніми полями: {email}")
+            logger.warning("Спроба входу з відсутніми полями: %s", email)
             flash('Заповніть усі поля', 'error')
             return render_template('login.html')
-        user, success, error_msg, requires_password_change = authenticate_user(email, password)
+        try:
+            user, success, error_msg, requires_password_change = authenticate_user(email, password, request.remote_addr)
+        except LoginThrottled as e:
+            flash(f'Забагато спроб входу. Спробуйте ще раз через {e.retry_after} с', 'error')
+            return render_template('login.html'), 429, {'Retry-After': str(e.retry_after)}
         if not success:
-            logger.warning(f"Невдала спроба входу для email: {email}")
+            logger.warning("Невдала спроба входу для email: %s", email)
             flash('Невірна електронна пошта або пароль', 'error')
             return render_template('login.html')
-        access_token = create_access_token(
-            identity=str(user.id),
-            additional_claims={'role': user.role.value, 'name': user.name}
-        )
-        logger.info(f"Успішний вхід для користувача: {email}")
-        logger.debug(f"Створено access_token: {access_token}")
+        access_token = issue_access_token(user)
+        logger.info("Успішний вхід для користувача: %s", email)
     
         response = make_response()
-        response.set_cookie(
-            'access_token',
-            access_token,
-            httponly=True,
-            secure=False,
-            samesite='Lax',
-            path='/',
-            max_age=1800
-        )
-        response.set_cookie(
-            'js_access_token',
-            access_token,
-            httponly=False,
-            secure=False,
-            samesite='Lax',
-            path='/',
-            max_age=1800
-        )
+        _set_access_cookies(response, access_token, issue_refresh_token(user))
         if requires_password_change:
-            logger.debug(f"Користувач {email} повинен змінити пароль")
+            logger.debug("Користувач %s повинен змінити пароль", email)
             response.headers['Location'] = url_for('web.change_password')
         else:
             response.headers['Location'] = url_for('web.dashboard')
         return response, 302
     except Exception as e:
-        logger.error(f"Помилка під час входу: {e}")
+        logger.error("Помилка під час входу: %s", e)
         flash('Помилка входу', 'error')
         return render_template('login.html')
 
+@web_bp.route('/token/refresh', methods=['GET', 'POST'])
+@jwt_required(refresh=True, locations=['cookies'])
+def refresh_token():
+    """
+    Обмінює refresh-токен з куки на нову пару токенів.
+
+    З параметром next повертає 307 на вихідну сторінку (метод і тіло форми
+    зберігаються), тож прострочений access-токен оновлюється без повторного входу.
+    """
+    tokens, success, error_msg = rotate_refresh_token(get_jwt())
+    if not success:
+        flash(error_msg, 'error')
+        response = redirect(url_for('web.login'))
+        for cookie in ('access_token', 'js_access_token', 'refresh_token'):
+            response.delete_cookie(cookie)
+        return response
+    access_token, new_refresh_token = tokens
+    next_url = _safe_next_url(request.args.get('next'))
+    if next_url:
+        response = redirect(next_url, code=307)
+    else:
+        response = jsonify({'access_token': access_token})
+    _set_access_cookies(response, access_token, new_refresh_token)
+    return response
+
 @web_bp.route('/change-password', methods=['GET', 'POST'])
 @jwt_required()
 def change_password():
     user_id = int(get_jwt_identity())
-    user, success, error_msg = get_user_by_id(user_id)
-    if not success:
-        flash(error_msg, 'error')
-        return redirect(url_for('web.login'))
+    user_name = get_jwt().get('name', '')
  
     if request.method == 'GET':
-        return render_template('change_password.html', user_name=user.name)
+        return render_template('change_password.html', user_name=user_name)
  
     try:
         current_password = request.form.get('current_password')
@@ -92,24 +139,31 @@ def change_password():
      
         if not all([current_password, new_password, confirm_password]):
             flash('Заповніть усі поля', 'error')
-            return render_template('change_password.html', user_name=user.name)
+            return render_template('change_password.html', user_name=user_name)
      
         if new_password != confirm_password:
             flash('Новий пароль і підтвердження не співпадають', 'error')
-            return render_template('change_password.html', user_name=user.name)
+            return render_template('change_password.html', user_name=user_name)
      
         success, error_msg = change_user_password_by_user(user_id, current_password, new_password)
         if success:
+            # Зміна пароля відкликає старий токен, тому видаємо новий з оновленими claims
+            user, success, error_msg = get_user_by_id(user_id)
+            if not success:
+                flash(error_msg, 'error')
+                return redirect(url_for('web.login'))
             flash('Пароль успішно змінено!', 'success')
-            return redirect(url_for('web.dashboard'))
+            response = redirect(url_for('web.dashboard'))
+            _set_access_cookies(response, issue_access_token(user), issue_refresh_token(user))
+            return response
         else:
             flash(f'Помилка зміни пароля: {error_msg}', 'error')
-            return render_template('change_password.html', user_name=user.name)
+            return render_template('change_password.html', user_name=user_name)
          
     except Exception as e:
-        logger.error(f"Помилка зміни пароля для користувача {user_id}: {e}")
+        logger.error("Помилка зміни пароля для користувача %s: %s", user_id, e)
         flash('Не вдалося змінити пароль', 'error')
-        return render_template('change_password.html', user_name=user.name)
+        return render_template('change_password.html', user_name=user_name)
 
 @web_bp.route('/dashboard')
 @jwt_required()
@@ -119,21 +173,13 @@ def dashboard():
     role = current_user['role']
     user_name = current_user.get('name', '')
  
-    user, success, error_msg = get_user_by_id(user_id)
-    if not success:
-        flash(error_msg, 'error')
-        return redirect(url_for('web.login'))
- 
-    if not user.password_changed:
+    if not current_user.get('password_changed'):
         flash('Будь ласка, змініть свій пароль перед продовженням', 'warning')
         return redirect(url_for('web.change_password'))
  
+    # Статистика, аеропорти і рейси для панелей читаються в кешованих фрагментах шаблонів
     if role == Role.ADMIN.value:
-        stats, success, error_msg = get_admin_dashboard_stats()
-        if not success:
-            flash(f'Помилка отримання статистики: {error_msg}', 'error')
-            stats = {}
-        return render_template('admin_dashboard.html', user_name=user_name, user_role=role, stats=stats)
+        return render_template('admin_dashboard.html', user_name=user_name, user_role=role)
  
     elif role == Role.CASHIER.value:
         open_shift = Shift.query.filter_by(cashier_id=user_id, status=ShiftStatus.OPEN).first()
@@ -149,9 +195,9 @@ def dashboard():
                 cash_desk_accounts = accounts
             else:
                 shift_status_message += f" Помилка отримання рахунків: {error_msg}"
-            transactions = Transaction.query.filter_by(shift_id=open_shift.id).order_by(Transaction.created_at.desc()).limit(20).all()
+            transactions = db.session.execute(shift_transactions_query(open_shift.id)).scalars().all()
         else:
-            cash_desks, success, error_msg = get_available_cash_desks(user.airport_id)
+            cash_desks, success, error_msg = get_available_cash_desks(current_user.get('airport_id'))
             if success:
                 available_cash_desks = cash_desks
                 shift_status_message = "Наразі немає відкритої зміни."
@@ -169,30 +215,14 @@ def dashboard():
         )
  
     elif role == Role.ACCOUNTANT.value:
-        airports = Airport.query.all()
         return render_template(
             'accountant_dashboard.html',
             user_name=user_name,
-            user_role=role,
-            airports=airports
+            user_role=role
         )
     elif role == Role.SALES_MANAGER.value:
-        airports = Airport.query.all()
-        flights, success, error_msg = get_all_flights()
-        
-        # Додайте логування для діагностики
-        logger.info(f"SALES_MANAGER dashboard: Loaded {len(airports)} airports")
-        logger.info(f"SALES_MANAGER dashboard: Flights success={success}, error={error_msg}, count={len(flights) if success else 0}")
-        
-        if not success:
-            flash(f'Помилка завантаження рейсів: {error_msg}', 'warning')
-        
-        return render_template(
-            'sales_manager_dashboard.html',
-            user_name=user_name,
-            airports=airports or [],  # Дефолтний порожній список
-            flights=flights or []     # Дефолтний порожній список
-        )
+        # Рейси аеропорту підвантажуються на сторінці через /flights/by_airport
+        return render_template('sales_manager_dashboard.html', user_name=user_name)
  
     return render_template(
         'base.html',
@@ -201,12 +231,9 @@ def dashboard():
     )
 
 @web_bp.route('/accountant/balances', methods=['POST'])
-@jwt_required()
+@requires_role(Role.ACCOUNTANT, message='Тільки бухгалтери можуть переглядати баланси')
 def accountant_balances():
     claims = get_jwt()
-    if claims['role'] != Role.ACCOUNTANT.value:
-        flash('Тільки бухгалтери можуть переглядати баланси', 'error')
-        return redirect(url_for('web.dashboard'))
 
     airport_id = request.form.get('airport_id')
     cash_desk_id = request.form.get('cash_desk_id')
@@ -230,22 +257,17 @@ def accountant_balances():
         flash(f'Помилка отримання балансів: {error_msg}', 'error')
         return redirect(url_for('web.dashboard'))
 
-    airports = Airport.query.all()
     return render_template(
         'accountant_dashboard.html',
         user_name=claims.get('name', 'User'),
-        airports=airports,
         balances=balances,
         date1=date1.strftime('%d.%m.%Y'),
         date2=date2.strftime('%d.%m.%Y') if date2 else None
     )
 
 @web_bp.route('/accountant/balances/export', methods=['POST'])
-@jwt_required()
+@requires_role(Role.ACCOUNTANT, message='Тільки бухгалтери можуть експортувати баланси', redirect_to=None)
 def export_balances():
-    claims = get_jwt()
-    if claims['role'] != Role.ACCOUNTANT.value:
-        return Response('Тільки бухгалтери можуть експортувати баланси', status=403)
 
     airport_id = request.form.get('airport_id')
     cash_desk_id = request.form.get('cash_desk_id')
@@ -276,14 +298,14 @@ def export_balances():
 
     for balance in balances:
         row = [
-            balance['cash_desk_name'],
-            balance['currency_code'],
-            f"{balance['balance_date1']:.2f}"
+            balance.cash_desk_name,
+            balance.currency_code,
+            f"{balance.balance_date1:.2f}"
         ]
         if date2:
             row.extend([
-                f"{balance['balance_date2']:.2f}" if balance['balance_date2'] is not None else 'Н/Д',
-                f"{balance['difference']:.2f}" if balance['difference'] is not None else 'Н/Д'
+                f"{balance.balance_date2:.2f}" if balance.balance_date2 is not None else 'Н/Д',
+                f"{balance.difference:.2f}" if balance.difference is not None else 'Н/Д'
             ])
         writer.writerow(row)
 
@@ -295,12 +317,9 @@ def export_balances():
         headers={'Content-Disposition': f'attachment; filename={filename}'}
     )
 @web_bp.route('/sales_manager/tickets', methods=['POST'])
-@jwt_required()
+@requires_role(Role.SALES_MANAGER, message='Тільки менеджери з продажів можуть переглядати статистику квитків')
 def sales_manager_tickets():
     claims = get_jwt()
-    if claims['role'] != Role.SALES_MANAGER.value:
-        flash('Тільки менеджери з продажів можуть переглядати статистику квитків', 'error')
-        return redirect(url_for('web.dashboard'))
 
     airport_id = request.form.get('airport_id')
     flight_id = request.form.get('flight_id')
@@ -315,47 +334,38 @@ def sales_manager_tickets():
         flash(f'Помилка отримання квитків: {error_msg}', 'error')
         return redirect(url_for('web.dashboard'))
 
-    airports = Airport.query.all()
-    flights, _, _ = get_all_flights()
-    flight = next((f for f in flights if f['id'] == int(flight_id)), None)
-    filter_info = f"{flight['flight_number']} ({flight['origin_airport']['code']} → {flight['destination_airport']['code']})" if flight else None
+    flight, _, _ = get_flight_details(int(flight_id))
+    filter_info = f"{flight.flight_number} ({flight.origin_airport.code} → {flight.destination_airport.code})" if flight else None
 
     return render_template(
         'sales_manager_dashboard.html',
         user_name=claims.get('name', 'User'),
-        airports=airports,
-        flights=flights,
         tickets=tickets,
         filter_info=filter_info
     )
 
 @web_bp.route('/flights/by_airport/<int:airport_id>', methods=['GET'])
-@jwt_required()
+@requires_role(Role.SALES_MANAGER, message='Тільки менеджери з продажів можуть отримувати рейси', redirect_to=None)
+@conditional(flights_by_airport_stamp)
 def get_flights_by_airport(airport_id):
-    claims = get_jwt()
-    if claims['role'] != Role.SALES_MANAGER.value:
-        return jsonify({'error': 'Тільки менеджери з продажів можуть отримувати рейси'}), 403
 
-    try:
-        flights = Flight.query.filter_by(origin_airport_id=airport_id).all()
-        flights_list = [
-            {
-                'id': flight.id,
-                'flight_number': flight.flight_number,
-                'origin_airport': {'code': flight.origin_airport.code},
-                'destination_airport': {'code': flight.destination_airport.code}
-            } for flight in flights
-        ]
-        logger.info(f"Отримано {len(flights_list)} рейсів для аеропорту {airport_id}")
-        return jsonify(flights_list), 200
-    except Exception as e:
-        logger.error(f"Помилка отримання рейсів для аеропорту {airport_id}: {e}")
-        return jsonify({'error': 'Не вдалося отримати рейси'}), 500
+    flights_list, success, error_msg = get_flights_from_airport(airport_id)
+    if not success:
+        return jsonify({'error': error_msg}), 500
+    return jsonify(flights_list), 200
 
 @web_bp.route('/logout')
 def logout():
+    refresh_cookie = request.cookies.get('refresh_token')
+    if refresh_cookie:
+        # Відкликаємо refresh-токен, інакше вкрадена кука працювала б до кінця терміну дії
+        try:
+            revoke_refresh_token(decode_token(refresh_cookie, allow_expired=True))
+        except Exception as e:
+            logger.warning("Не вдалося розкодувати refresh-токен під час виходу: %s", e)
     response = redirect(url_for('web.login'))
     response.delete_cookie('access_token')
     response.delete_cookie('js_access_token')
-    logger.debug("Куки access_token та js_access_token видалено, редирект на /login")
+    response.delete_cookie('refresh_token')
+    logger.debug("Куки токенів видалено, редирект на /login")
     return response
\ No newline at end of file
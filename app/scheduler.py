@@ -0,0 +1,276 @@
+import os
+import random
+import socket
+import threading
+import time
+import logging
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import select, update, insert, or_
+from sqlalchemy.exc import IntegrityError
+from database import db
+from models import JobLock
+from metrics import job_duration
+
+logger = logging.getLogger(__name__)
+
+def _utcnow():
+    """Поточний час UTC без часового поясу (так зберігаються DateTime у БД)."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+class Job:
+    """
+    Опис фонової задачі та її локальний стан розкладу.
+
+    Args:
+        name (str): Унікальна назва задачі (ключ блокування в job_locks)
+        func (callable): Функція задачі, викликається в контексті програми
+        interval (int): Інтервал між запусками в секундах
+        lease_seconds (int): Тривалість lease-блокування в секундах
+    """
+    def __init__(self, name, func, interval, lease_seconds):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.lease_seconds = lease_seconds
+        self.next_run_at = time.monotonic()
+        self.running = False
+        self.consecutive_failures = 0
+
+class _LeaseHeartbeat(threading.Thread):
+    """Продовжує lease задачі, поки вона виконується, щоб інший воркер не запустив її паралельно."""
+    def __init__(self, scheduler, job):
+        super().__init__(name=f"lease-{job.name}", daemon=True)
+        self.scheduler = scheduler
+        self.job = job
+        self.stopped = threading.Event()
+
+    def run(self):
+        interval = max(1.0, self.job.lease_seconds / 3)
+        while not self.stopped.wait(interval):
+            try:
+                with self.scheduler.app.app_context():
+                    if not self.scheduler._renew_lease(self.job):
+                        logger.warning("Не вдалося продовжити lease задачі %s", self.job.name)
+            except Exception as e:
+                logger.error("Помилка продовження lease задачі %s: %s", self.job.name, e)
+
+class Scheduler:
+    """
+    Планувальник фонових задач.
+
+    Кожен воркер запускає власний потік планувальника, а виконання задачі
+    захищене lease-блокуванням у таблиці job_locks: задачу в конкретний момент
+    виконує лише один процес, а наступний запуск не починається, поки не
+    завершився попередній. Час наступного запуску (next_run_at) теж зберігається
+    в job_locks і спільний для всіх воркерів, тож задача виконується один раз
+    за інтервал, а не по разу в кожному воркері. Рядки job_locks створюються
+    один раз після старту, тож отримання lease — один умовний UPDATE, а
+    воркер, що програв, не робить зайвих записів. Тривалість виконання
+    експортується гістограмою job_duration_seconds. Після помилки задача
+    відкладається з експоненційною затримкою та випадковим розкидом (jitter).
+    """
+    def __init__(self, app=None):
+        self.app = None
+        self.jobs = {}
+        self.owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._thread = None
+        self._rows_ready = False
+        self._stop = threading.Event()
+        self._start_lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        app.config.setdefault('SCHEDULER_ENABLED', True)
+        app.config.setdefault('SCHEDULER_LEASE_SECONDS', 900)
+        app.config.setdefault('SCHEDULER_BACKOFF_BASE', 30)
+        app.config.setdefault('SCHEDULER_BACKOFF_MAX', 3600)
+        app.config.setdefault('SCHEDULER_POLL_INTERVAL', 5)
+        app.extensions['scheduler'] = self
+
+        # Потік запускається ліниво на першому запиті: так кожен воркер
+        # (у т.ч. після fork у gunicorn) має власний планувальник
+        @app.before_request
+        def _start_scheduler():
+            if self._thread is None and app.config['SCHEDULER_ENABLED']:
+                self.start()
+
+    def job(self, name, interval, lease_seconds=None):
+        """Декоратор для реєстрації задачі: @scheduler.job('csv_import', interval=60)."""
+        def decorator(func):
+            self.add_job(name, func, interval, lease_seconds)
+            return func
+        return decorator
+
+    def add_job(self, name, func, interval, lease_seconds=None):
+        if name in self.jobs:
+            raise ValueError(f"Задача {name} уже зареєстрована")
+        self.jobs[name] = Job(name, func, interval, lease_seconds)
+        self._rows_ready = False
+        logger.info("Зареєстровано задачу %s з інтервалом %s с", name, interval)
+
+    def start(self):
+        with self._start_lock:
+            if self._thread is not None:
+                return
+            # PID змінюється після fork, тому власника lease визначаємо під час старту
+            self.owner = f"{socket.gethostname()}:{os.getpid()}"
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._loop, name='scheduler', daemon=True)
+            self._thread.start()
+            logger.info("Планувальник запущено (%s), задач: %s", self.owner, len(self.jobs))
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self.run_pending()
+            self._stop.wait(self.app.config['SCHEDULER_POLL_INTERVAL'])
+
+    def run_pending(self):
+        """Виконує всі задачі, час запуску яких настав."""
+        if not self._rows_ready:
+            try:
+                with self.app.app_context():
+                    self._ensure_lock_rows()
+                self._rows_ready = True
+            except Exception as e:
+                # БД недоступна — повторимо на наступному циклі
+                logger.error("Помилка створення рядків job_locks: %s", e)
+                return
+        now = time.monotonic()
+        for job in list(self.jobs.values()):
+            if job.next_run_at <= now and not job.running:
+                self._run_job(job)
+
+    def _run_job(self, job):
+        lease_seconds = job.lease_seconds or self.app.config['SCHEDULER_LEASE_SECONDS']
+        job.lease_seconds = lease_seconds
+        started = time.monotonic()
+        try:
+            with self.app.app_context():
+                acquired = self._acquire_lease(job)
+        except Exception as e:
+            logger.error("Помилка отримання lease задачі %s: %s", job.name, e)
+            self._schedule_retry(job, started)
+            return
+        if not acquired:
+            # Задачу виконує інший воркер або її вже виконано в цьому інтервалі
+            job.next_run_at = started + self._shared_delay(job)
+            logger.debug("Задача %s виконується або виконана іншим процесом, пропускаємо", job.name)
+            return
+
+        job.running = True
+        heartbeat = _LeaseHeartbeat(self, job)
+        heartbeat.start()
+        try:
+            with self.app.app_context():
+                job.func()
+            job.consecutive_failures = 0
+            job.next_run_at = started + self._jittered(job.interval)
+            logger.info("Задачу %s виконано за %.3f с", job.name, time.monotonic() - started)
+        except Exception as e:
+            job.consecutive_failures += 1
+            self._schedule_retry(job, started)
+            logger.error("Помилка виконання задачі %s (спроба %s): %s", job.name, job.consecutive_failures, e)
+        finally:
+            heartbeat.stopped.set()
+            heartbeat.join()
+            job.running = False
+            job_duration.labels(job.name).observe(time.monotonic() - started)
+            try:
+                with self.app.app_context():
+                    self._release_lease(job)
+            except Exception as e:
+                logger.error("Помилка звільнення lease задачі %s: %s", job.name, e)
+
+    def _schedule_retry(self, job, started):
+        base = self.app.config['SCHEDULER_BACKOFF_BASE']
+        cap = self.app.config['SCHEDULER_BACKOFF_MAX']
+        delay = min(cap, base * 2 ** max(0, job.consecutive_failures - 1))
+        # Full jitter у межах [delay/2, delay], щоб воркери не повторювали синхронно
+        job.next_run_at = started + random.uniform(delay / 2, delay)
+
+    @staticmethod
+    def _jittered(interval):
+        return interval + random.uniform(0, interval * 0.1)
+
+    def _shared_delay(self, job):
+        """
+        Через скільки секунд задача може стати доступною цьому воркеру: до
+        спільного next_run_at або до закінчення чужого lease (якщо власник
+        завис), з невеликим розкидом, щоб воркери не опитували БД синхронно.
+        """
+        poll = self.app.config['SCHEDULER_POLL_INTERVAL']
+        try:
+            with self.app.app_context(), db.engine.connect() as conn:
+                table = JobLock.__table__
+                row = conn.execute(
+                    select(table.c.next_run_at, table.c.locked_until).where(table.c.name == job.name)
+                ).first()
+        except Exception as e:
+            logger.error("Помилка читання розкладу задачі %s: %s", job.name, e)
+            return self._jittered(job.interval)
+        moments = [moment for moment in (row or ()) if moment is not None]
+        delay = max(((moment - _utcnow()).total_seconds() for moment in moments), default=0.0)
+        return max(poll, delay) + random.uniform(0, poll)
+
+    def _ensure_lock_rows(self):
+        """Створює рядки job_locks для зареєстрованих задач, яких ще немає в БД."""
+        table = JobLock.__table__
+        with db.engine.connect() as conn:
+            existing = set(conn.execute(select(table.c.name).where(table.c.name.in_(list(self.jobs)))).scalars())
+        for name in self.jobs.keys() - existing:
+            try:
+                with db.engine.begin() as conn:
+                    conn.execute(insert(table).values(name=name))
+            except IntegrityError:
+                # Рядок щойно створив інший воркер
+                logger.debug("Рядок job_locks для %s уже створено іншим процесом", name)
+
+    def _acquire_lease(self, job):
+        now = _utcnow()
+        until = now + timedelta(seconds=job.lease_seconds)
+        table = JobLock.__table__
+        with db.engine.begin() as conn:
+            result = conn.execute(
+                update(table)
+                .where(
+                    table.c.name == job.name,
+                    or_(table.c.locked_until.is_(None), table.c.locked_until < now, table.c.owner == self.owner),
+                    # Спільний розклад: інший воркер уже виконав задачу в цьому інтервалі
+                    or_(table.c.next_run_at.is_(None), table.c.next_run_at <= now)
+                )
+                .values(owner=self.owner, locked_until=until, last_started_at=now)
+            )
+            return result.rowcount == 1
+
+    def _renew_lease(self, job):
+        table = JobLock.__table__
+        until = _utcnow() + timedelta(seconds=job.lease_seconds)
+        with db.engine.begin() as conn:
+            result = conn.execute(
+                update(table)
+                .where(table.c.name == job.name, table.c.owner == self.owner)
+                .values(locked_until=until)
+            )
+            return result.rowcount == 1
+
+    def _release_lease(self, job):
+        table = JobLock.__table__
+        now = _utcnow()
+        # Наступний запуск (інтервал або затримка після помилки) — спільний для всіх воркерів
+        next_run_at = now + timedelta(seconds=max(0.0, job.next_run_at - time.monotonic()))
+        with db.engine.begin() as conn:
+            conn.execute(
+                update(table)
+                .where(table.c.name == job.name, table.c.owner == self.owner)
+                .values(owner=None, locked_until=None, last_finished_at=now, next_run_at=next_run_at)
+            )
+
+scheduler = Scheduler()
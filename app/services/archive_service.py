@@ -0,0 +1,162 @@
+from models import (
+    db, Transaction, TransactionArchive, Ticket, TicketArchive, Shift, ShiftStatus, Flight,
+    AccountBalanceSnapshot
+)
+from sqlalchemy import select, insert, delete, func
+from datetime import datetime
+from decimal import Decimal
+import logging
+logger = logging.getLogger(__name__)
+
+def _months_ago(moment, months):
+    month_index = moment.year * 12 + moment.month - 1 - months
+    year, month = divmod(month_index, 12)
+    return moment.replace(year=year, month=month + 1, day=min(moment.day, 28))
+
+def _move_rows(live, archive, ids):
+    columns = [column.name for column in live.__table__.columns]
+    db.session.execute(
+        insert(archive).from_select(columns, select(*live.__table__.columns).where(live.id.in_(ids)))
+    )
+    db.session.execute(delete(live).where(live.id.in_(ids)))
+
+def _archive_transactions(cutoff, batch_size):
+    moved = 0
+    while True:
+        ids = db.session.execute(
+            select(Transaction.id)
+            .join(Shift, Transaction.shift_id == Shift.id)
+            .where(Shift.status == ShiftStatus.CLOSED, Transaction.created_at < cutoff)
+            .order_by(Transaction.id)
+            .limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            return moved
+        sums = db.session.execute(
+            select(Transaction.account_id, func.sum(Transaction.amount))
+            .where(Transaction.id.in_(ids))
+            .group_by(Transaction.account_id)
+        ).all()
+        _move_rows(Transaction, TransactionArchive, ids)
+        # Перенесення і вхідний баланс фіксуються одним commit, тож звіти не бачать проміжного стану
+        for account_id, amount in sums:
+            snapshot = db.session.get(AccountBalanceSnapshot, account_id)
+            if snapshot is None:
+                snapshot = AccountBalanceSnapshot(account_id=account_id, archived_until=cutoff, balance=Decimal('0'))
+                db.session.add(snapshot)
+            snapshot.balance = Decimal(str(snapshot.balance)) + Decimal(str(amount))
+            snapshot.archived_until = max(snapshot.archived_until, cutoff)
+            snapshot.updated_at = datetime.now()
+        db.session.commit()
+        moved += len(ids)
+
+def _archive_tickets(cutoff, batch_size):
+    moved = 0
+    while True:
+        ids = db.session.execute(
+            select(Ticket.id)
+            .join(Shift, Ticket.shift_id == Shift.id)
+            .join(Flight, Ticket.flight_id == Flight.id)
+            .where(Shift.status == ShiftStatus.CLOSED, Ticket.sold_at < cutoff, Flight.departure_time < cutoff)
+            .order_by(Ticket.id)
+            .limit(batch_size)
+        ).scalars().all()
+        if not ids:
+            return moved
+        _move_rows(Ticket, TicketArchive, ids)
+        db.session.commit()
+        moved += len(ids)
+
+def archive_old_records(months, batch_size=1000):
+    """
+    Переносить в архівні таблиці транзакції та квитки закритих змін, старші за
+    `months` місяців. Для квитків додатково потрібно, щоб рейс уже відбувся,
+    інакше місце та повернення перестали б бачити квиток.
+
+    Сума перенесених транзакцій додається до вхідного балансу рахунку
+    (account_balance_snapshots), тож звіти за балансами залишаються точними.
+
+    Args:
+        months (int): Вік записів у місяцях
+        batch_size (int): Записів за один commit (MSSQL обмежує IN 2100 параметрами)
+
+    Returns:
+        tuple: (stats: dict, success: bool, error_message: str)
+    """
+    cutoff = _months_ago(datetime.now(), months)
+    try:
+        transactions = _archive_transactions(cutoff, batch_size)
+        tickets = _archive_tickets(cutoff, batch_size)
+        logger.info("Архівовано до %s: %s транзакцій, %s квитків", cutoff, transactions, tickets)
+        return {'cutoff': cutoff, 'transactions': transactions, 'tickets': tickets}, True, None
+    except Exception as e:
+        db.session.rollback()
+        logger.error("Помилка архівування: %s", e)
+        return None, False, f"Не вдалося архівувати записи: {e}"
+
+def _live_balances_query(account_ids, moment):
+    # Суми живих транзакцій рахунків до моменту (індекс ix_transaction_account_created)
+    return (
+        select(Transaction.account_id, func.sum(Transaction.amount))
+        .where(Transaction.account_id.in_(account_ids), Transaction.created_at <= moment)
+        .group_by(Transaction.account_id)
+    )
+
+def _archived_balances_query(account_ids, moment):
+    # Те саме для архіву (індекс ix_transaction_archive_account_created)
+    return (
+        select(TransactionArchive.account_id, func.sum(TransactionArchive.amount))
+        .where(TransactionArchive.account_id.in_(account_ids), TransactionArchive.created_at <= moment)
+        .group_by(TransactionArchive.account_id)
+    )
+
+def _archive_horizon_query():
+    # MAX(sold_at) читається з кінця індексу ix_ticket_archive_sold_at
+    return select(func.max(TicketArchive.sold_at))
+
+def account_balances_at(account_ids, moment):
+    """
+    Баланси рахунків на момент `moment` з урахуванням архіву.
+
+    Якщо момент не раніше archived_until, архівна частина береться зі знімка,
+    і сумуються лише живі транзакції; інакше додатково сумується архівна
+    таблиця до цього моменту. Кожна частина — один згрупований запит на всі
+    рахунки.
+
+    Args:
+        account_ids (list): ID рахунків кас (для MSSQL — до ~2000 за виклик)
+        moment (datetime): Момент, на кінець якого рахується баланс
+
+    Returns:
+        dict: ID рахунку → Decimal
+    """
+    if not account_ids:
+        return {}
+    balances = dict.fromkeys(account_ids, Decimal('0'))
+    live = db.session.execute(_live_balances_query(account_ids, moment))
+    for account_id, amount in live:
+        balances[account_id] += Decimal(str(amount))
+    snapshots = db.session.execute(
+        select(AccountBalanceSnapshot.account_id, AccountBalanceSnapshot.balance, AccountBalanceSnapshot.archived_until)
+        .where(AccountBalanceSnapshot.account_id.in_(account_ids))
+    )
+    before_snapshot = []
+    for account_id, snapshot_balance, archived_until in snapshots:
+        if moment >= archived_until:
+            balances[account_id] += Decimal(str(snapshot_balance))
+        else:
+            before_snapshot.append(account_id)
+    if before_snapshot:
+        archived = db.session.execute(_archived_balances_query(before_snapshot, moment))
+        for account_id, amount in archived:
+            balances[account_id] += Decimal(str(amount))
+    return balances
+
+def tickets_archive_horizon():
+    """
+    Найпізніший момент продажу серед архівованих квитків.
+
+    Returns:
+        datetime | None: None, якщо архів порожній
+    """
+    return db.session.execute(_archive_horizon_query()).scalar()
@@ -1,29 +1,294 @@
-from models import User
-import bcrypt
+import math
+from datetime import datetime, timezone
+from flask import current_app
+from flask_jwt_extended import create_access_token, create_refresh_token
+from sqlalchemy import update, delete
+from sqlalchemy.exc import IntegrityError
+from models import User, RevokedToken, db
+from metrics import login_throttled
+from cache import TTLCache
+from passwords import check_password, hash_password_in_pool, needs_rehash, PasswordCheckBusy
+from rate_limit import RateLimiter
 import logging
 
 logger = logging.getLogger(__name__)
 
-def authenticate_user(email, password):
+# Поточні версії токенів користувачів (user_id → token_version)
+token_versions = TTLCache('token_version', maxsize=10000)
+
+# Обмежувачі спроб входу за email та IP (створюються ліниво з налаштувань програми)
+_login_limiters = {}
+
+class LoginThrottled(Exception):
+    """
+    Спробу входу відхилено без перевірки пароля: вичерпано ліміт спроб
+    або пул bcrypt перевантажений.
+
+    Args:
+        retry_after (float): Через скільки секунд можна повторити спробу
+    """
+    def __init__(self, retry_after):
+        super().__init__(f"Спробуйте через {retry_after:.0f} с")
+        self.retry_after = max(1, math.ceil(retry_after))
+
+def _login_limiter(kind):
+    limiter = _login_limiters.get(kind)
+    if limiter is None:
+        limiter = _login_limiters.setdefault(kind, RateLimiter(
+            current_app.config[f'LOGIN_{kind}_MAX_ATTEMPTS'],
+            current_app.config[f'LOGIN_{kind}_WINDOW']
+        ))
+    return limiter
+
+def _check_login_rate(email, remote_addr):
+    for kind, key in (('IP', remote_addr), ('EMAIL', email.strip().lower())):
+        if not key:
+            continue
+        allowed, retry_after = _login_limiter(kind).hit(key)
+        if not allowed:
+            login_throttled.labels(kind.lower()).inc()
+            logger.warning("Перевищено ліміт спроб входу (%s) для %s", kind.lower(), key)
+            raise LoginThrottled(retry_after)
+
+def _rehash_password(user, password):
+    """Перераховує хеш з поточною вартістю bcrypt у пулі bcrypt; помилка не заважає входу."""
+    try:
+        old_rounds = user.password_hash.split('$')[2]
+        user.password_hash = hash_password_in_pool(password)
+        db.session.commit()
+        logger.info(
+            "Пароль користувача %s перехешовано: вартість %s → %s", user.id, old_rounds, user.password_hash.split('$')[2]
+        )
+    except PasswordCheckBusy:
+        # Пул зайнятий: перехешування відкладається до наступного входу
+        db.session.rollback()
+        logger.info("Пул bcrypt зайнятий, перехешування пароля користувача %s відкладено", user.id)
+    except Exception as e:
+        db.session.rollback()
+        logger.error("Не вдалося перехешувати пароль користувача %s: %s", user.id, e)
+
+def authenticate_user(email, password, remote_addr=None):
     """
     Аутентифікує користувача за email і паролем.
+
+    Перед перевіркою пароля застосовуються ліміти спроб за IP та email.
+    Для неіснуючого email пароль перевіряється проти фіктивного хешу, тому
+    час відповіді однаковий.
+
+    Args:
+        email (str): Електронна пошта
+        password (str): Пароль
+        remote_addr (str, optional): IP-адреса клієнта для ліміту спроб
    
     Returns:
         tuple: (user: User, success: bool, error_message: str, requires_password_change: bool)
+
+    Raises:
+        LoginThrottled: Ліміт спроб вичерпано або пул bcrypt перевантажений
     """
     try:
+        if current_app.config['LOGIN_RATE_LIMIT_ENABLED']:
+            _check_login_rate(email, remote_addr)
+
         user = User.query.filter_by(email=email).first()
+        try:
+            password_valid = check_password(password, user.password_hash if user else None)
+        except PasswordCheckBusy:
+            login_throttled.labels('busy').inc()
+            logger.warning("Пул перевірки паролів перевантажено, вхід для %s відхилено", email)
+            raise LoginThrottled(1)
+
         if not user:
-            logger.warning(f"Спроба входу для неіснуючого email: {email}")
+            logger.warning("Спроба входу для неіснуючого email: %s", email)
             return None, False, "Користувача не знайдено", False
-       
-        if not bcrypt.checkpw(password.encode('utf-8'), user.password_hash.encode('utf-8')):
-            logger.warning(f"Невдала спроба входу для email: {email}")
+        if not password_valid:
+            logger.warning("Невдала спроба входу для email: %s", email)
             return None, False, "Невірний пароль", False
-       
-        logger.info(f"Успішна аутентифікація для користувача: {email}")
+
+        if current_app.config['LOGIN_RATE_LIMIT_ENABLED']:
+            _login_limiter('EMAIL').reset(email.strip().lower())
+        if needs_rehash(user.password_hash):
+            _rehash_password(user, password)
+        logger.info("Успішна аутентифікація для користувача: %s", email)
         return user, True, None, not user.password_changed
-       
+
+    except LoginThrottled:
+        raise
+    except Exception as e:
+        logger.error("Помилка під час аутентифікації: %s", e)
+        return None, False, "Помилка аутентифікації", False
+
+def issue_access_token(user):
+    """
+    Створює access-токен з даними, потрібними для авторизації без звернення до БД.
+
+    Args:
+        user (User): Користувач
+
+    Returns:
+        str: JWT з роллю, ім'ям, аеропортом, ознакою зміни пароля та версією токена
+    """
+    return create_access_token(
+        identity=str(user.id),
+        additional_claims={
+            'role': user.role.value,
+            'name': user.name,
+            'airport_id': user.airport_id,
+            'password_changed': user.password_changed,
+            'ver': user.token_version
+        }
+    )
+
+def issue_refresh_token(user):
+    """
+    Створює refresh-токен. Він містить лише версію токенів: решту claims
+    access-токена під час оновлення беремо з БД.
+
+    Args:
+        user (User): Користувач
+
+    Returns:
+        str: Refresh JWT
+    """
+    return create_refresh_token(identity=str(user.id), additional_claims={'ver': user.token_version})
+
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+def revoke_token(jwt_payload):
+    """
+    Додає токен до списку відкликаних (без commit).
+
+    Args:
+        jwt_payload (dict): Розкодований JWT
+    """
+    if db.session.get(RevokedToken, jwt_payload['jti']) is not None:
+        return
+    db.session.add(RevokedToken(
+        jti=jwt_payload['jti'],
+        user_id=int(jwt_payload['sub']),
+        token_type=jwt_payload.get('type', 'access'),
+        revoked_at=_utcnow(),
+        expires_at=datetime.fromtimestamp(jwt_payload['exp'], timezone.utc).replace(tzinfo=None)
+    ))
+
+def rotate_refresh_token(jwt_payload):
+    """
+    Видає нову пару токенів в обмін на refresh-токен і відкликає використаний.
+
+    Args:
+        jwt_payload (dict): Розкодований refresh JWT
+
+    Returns:
+        tuple: ((access_token, refresh_token), success: bool, error_message: str)
+    """
+    try:
+        user = db.session.get(User, int(jwt_payload['sub']))
+        if not user:
+            return None, False, "Користувача не знайдено"
+        revoke_token(jwt_payload)
+        db.session.commit()
+        logger.info("Оновлено токени користувача %s", user.id)
+        return (issue_access_token(user), issue_refresh_token(user)), True, None
+    except IntegrityError:
+        # Паралельний запит уже відкликав цей токен — у межах пільгового вікна це не помилка
+        db.session.rollback()
+        user = db.session.get(User, int(jwt_payload['sub']))
+        return (issue_access_token(user), issue_refresh_token(user)), True, None
+    except Exception as e:
+        db.session.rollback()
+        logger.error("Помилка оновлення токенів: %s", e)
+        return None, False, "Не вдалося оновити сесію"
+
+def revoke_refresh_token(jwt_payload):
+    """
+    Відкликає refresh-токен під час виходу із системи.
+
+    Returns:
+        tuple: (success: bool, error_message: str)
+    """
+    try:
+        revoke_token(jwt_payload)
+        db.session.commit()
+        logger.info("Відкликано refresh-токен користувача %s", jwt_payload['sub'])
+        return True, None
+    except Exception as e:
+        db.session.rollback()
+        logger.error("Помилка відкликання refresh-токена: %s", e)
+        return False, "Не вдалося відкликати токен"
+
+def purge_revoked_tokens():
+    """
+    Видаляє записи відкликаних токенів, термін дії яких уже минув.
+
+    Returns:
+        int: Кількість видалених записів
+    """
+    result = db.session.execute(delete(RevokedToken).where(RevokedToken.expires_at < _utcnow()))
+    db.session.commit()
+    return result.rowcount
+
+def _revoke_all_user_tokens(user_id):
+    db.session.execute(
+        update(User).where(User.id == user_id).values(token_version=User.token_version + 1)
+    )
+    db.session.commit()
+    invalidate_token_version(user_id)
+
+def get_token_version(user_id):
+    """
+    Повертає поточну версію токенів користувача з кешу або БД.
+
+    Args:
+        user_id (int): ID користувача
+
+    Returns:
+        int | None: Версія токенів або None, якщо користувача не існує
+    """
+    version = token_versions.get(user_id)
+    if version is None:
+        version = db.session.query(User.token_version).filter(User.id == user_id).scalar()
+        if version is not None:
+            token_versions.set(user_id, version, ttl=current_app.config['TOKEN_VERSION_CACHE_TTL'])
+    return version
+
+def invalidate_token_version(user_id):
+    """Скидає кешовану версію токенів після її зміни в БД."""
+    token_versions.pop(user_id)
+
+def is_token_revoked(jwt_payload):
+    """
+    Перевіряє, чи відкликано токен: користувача видалено, версія в токені
+    не збігається з поточною (пароль змінено після видачі токена) або
+    refresh-токен уже використано.
+
+    Повторне використання відкликаного refresh-токена поза пільговим вікном
+    REFRESH_REUSE_GRACE означає ймовірну крадіжку: тоді відкликаються всі
+    токени користувача.
+
+    Args:
+        jwt_payload (dict): Розкодований JWT
+
+    Returns:
+        bool: True, якщо токен недійсний
+    """
+    try:
+        user_id = int(jwt_payload['sub'])
+        current_version = get_token_version(user_id)
+        if current_version is None or jwt_payload.get('ver') != current_version:
+            return True
+        if jwt_payload.get('type') != 'refresh':
+            return False
+        revoked = db.session.get(RevokedToken, jwt_payload['jti'])
+        if revoked is None:
+            return False
+        if (_utcnow() - revoked.revoked_at).total_seconds() <= current_app.config['REFRESH_REUSE_GRACE']:
+            # Кілька вкладок оновили токен одночасно
+            return False
+        logger.warning("Повторне використання refresh-токена користувача %s, відкликаємо всі токени", user_id)
+        _revoke_all_user_tokens(user_id)
+        return True
     except Exception as e:
-        logger.error(f"Помилка під час аутентифікації: {e}")
-        return None, False, "Помилка аутентифікації", False
\ No newline at end of file
+        db.session.rollback()
+        logger.error("Помилка перевірки версії токена: %s", e)
+        return True
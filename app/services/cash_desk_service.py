@@ -1,5 +1,12 @@
 from models import Shift, ShiftStatus, db, CashDesk, CashDeskAccount, Transaction, TransactionType, Airport
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from sqlalchemy import select, update
+from db_retry import retry_on_conflict
+from metrics import cash_withdrawals, cash_withdrawn_amount
+from services.archive_service import account_balances_at
+from read_models import CashDeskRow, CashDeskAccountRow, BalanceRow
+from pagination import SortKey, paginate
 import logging
 logger = logging.getLogger(__name__)
 
@@ -13,7 +20,7 @@ def create_cash_desk(name, airport_id, is_active=True):
         cash_desk = CashDesk(name=name.strip(), airport_id=airport_id, is_active=is_active)
         db.session.add(cash_desk)
         db.session.commit()
-        logger.info(f"Створено касу: {name}")
+        logger.info("Створено касу: %s", name)
         return {
             'id': cash_desk.id,
             'name': cash_desk.name,
@@ -22,7 +29,7 @@ def create_cash_desk(name, airport_id, is_active=True):
         }, True, None
     except Exception as e:
         db.session.rollback()
-        logger.error(f"Помилка створення каси: {e}")
+        logger.error("Помилка створення каси: %s", e)
         return None, False, "Не вдалося створити касу"
 
 def create_cash_desk_account(cash_desk_id, currency_code):
@@ -35,7 +42,7 @@ def create_cash_desk_account(cash_desk_id, currency_code):
         account = CashDeskAccount(cash_desk_id=cash_desk_id, currency_code=currency_code.strip(), balance=0.0)
         db.session.add(account)
         db.session.commit()
-        logger.info(f"Створено рахунок {currency_code} для каси {cash_desk_id}")
+        logger.info("Створено рахунок %s для каси %s", currency_code, cash_desk_id)
         return {
             'id': account.id,
             'cash_desk_id': account.cash_desk_id,
@@ -44,26 +51,40 @@ def create_cash_desk_account(cash_desk_id, currency_code):
         }, True, None
     except Exception as e:
         db.session.rollback()
-        logger.error(f"Помилка створення рахунку: {e}")
+        logger.error("Помилка створення рахунку: %s", e)
         return None, False, "Не вдалося створити рахунок"
 
-def get_all_cash_desks():
+CASH_DESK_SORT_KEYS = {
+    'id': SortKey(CashDesk.id, 'id', 'За датою створення'),
+    'name': SortKey(CashDesk.name, 'name', 'За назвою'),
+}
+
+def list_cash_desks(page_request):
+    """
+    Сторінка списку кас: пошук за початком назви, сортування за CASH_DESK_SORT_KEYS.
+
+    Args:
+        page_request (PageRequest): Пошук, сортування, курсор і розмір сторінки
+
+    Returns:
+        tuple: (page: Page, success: bool, error_message: str)
+    """
     try:
-        cash_desks = CashDesk.query.all()
-        cash_desks_list = [
-            {
-                'id': cd.id,
-                'name': cd.name,
-                'airport_id': cd.airport_id,
-                'airport_name': cd.airport.name if cd.airport else 'Не вказано',
-                'is_active': cd.is_active
-            } for cd in cash_desks
-        ]
-        logger.info(f"Отримано {len(cash_desks_list)} кас")
-        return cash_desks_list, True, None
+        query = (
+            select(CashDesk.id, CashDesk.name, CashDesk.airport_id, Airport.name, CashDesk.is_active)
+            .outerjoin(Airport, CashDesk.airport_id == Airport.id)
+        )
+        if page_request.q:
+            query = query.where(CashDesk.name.startswith(page_request.q, autoescape=True))
+        page = paginate(db.session, query, CashDesk.id, CASH_DESK_SORT_KEYS, page_request, lambda rows: [
+            CashDeskRow(desk_id, name, airport_id, airport_name or 'Не вказано', is_active)
+            for desk_id, name, airport_id, airport_name, is_active in rows
+        ])
+        logger.info("Отримано %s кас (q=%r, sort=%s)", len(page.items), page_request.q, page_request.sort_param)
+        return page, True, None
     except Exception as e:
-        logger.error(f"Помилка отримання кас: {e}")
-        return [], False, "Не вдалося отримати каси"
+        logger.error("Помилка отримання кас: %s", e)
+        return None, False, "Не вдалося отримати каси"
 
 def update_cash_desk(cash_desk_id, name, airport_id, is_active):
     try:
@@ -79,77 +100,125 @@ def update_cash_desk(cash_desk_id, name, airport_id, is_active):
         cash_desk.airport_id = airport_id
         cash_desk.is_active = is_active
         db.session.commit()
-        logger.info(f"Оновлено касу {cash_desk_id}")
+        logger.info("Оновлено касу %s", cash_desk_id)
         return True, None
     except Exception as e:
         db.session.rollback()
-        logger.error(f"Помилка оновлення каси: {e}")
+        logger.error("Помилка оновлення каси: %s", e)
         return False, "Не вдалося оновити касу"
 
 def get_cash_desk_accounts(cash_desk_id):
     try:
-        cash_desk = CashDesk.query.get(cash_desk_id)
-        if not cash_desk:
+        if db.session.execute(select(CashDesk.id).where(CashDesk.id == cash_desk_id)).first() is None:
             return [], False, "Касу не знайдено"
-        accounts = CashDeskAccount.query.filter_by(cash_desk_id=cash_desk_id).all()
         accounts_list = [
-            {
-                'id': account.id,
-                'cash_desk_id': account.cash_desk_id,
-                'currency_code': account.currency_code,
-                'balance': float(account.balance),
-                'last_updated': account.last_updated.isoformat()
-            } for account in accounts
+            CashDeskAccountRow(*row) for row in db.session.execute(
+                select(
+                    CashDeskAccount.id, CashDeskAccount.cash_desk_id, CashDeskAccount.currency_code,
+                    CashDeskAccount.balance, CashDeskAccount.last_updated
+                )
+                .where(CashDeskAccount.cash_desk_id == cash_desk_id)
+                .order_by(CashDeskAccount.currency_code)
+            )
         ]
-        logger.info(f"Отримано {len(accounts_list)} рахунків для каси {cash_desk_id}")
+        logger.info("Отримано %s рахунків для каси %s", len(accounts_list), cash_desk_id)
         return accounts_list, True, None
     except Exception as e:
-        logger.error(f"Помилка отримання рахунків для каси {cash_desk_id}: {e}")
+        logger.error("Помилка отримання рахунків для каси %s: %s", cash_desk_id, e)
         return [], False, "Не вдалося отримати рахунки"
 
+def _account_query(cash_desk_id, currency_code):
+    # Рахунок каси у валюті (індекс ix_cash_desk_account_desk_currency)
+    return (
+        select(CashDeskAccount)
+        .where(CashDeskAccount.cash_desk_id == cash_desk_id, CashDeskAccount.currency_code == currency_code)
+        .limit(1)
+    )
+
+def find_cash_desk_account(cash_desk_id, currency_code):
+    """
+    Рахунок каси у валюті для продажу, повернення і зняття.
+
+    Returns:
+        CashDeskAccount | None: None, якщо рахунку немає
+    """
+    return db.session.execute(_account_query(cash_desk_id, currency_code)).scalar()
+
+def apply_balance_delta(account_id, delta):
+    """
+    Атомарно змінює баланс рахунку каси одним UPDATE без читання в Python:
+    паралельні продажі й зняття на тій самій касі не втрачають оновлень і не
+    блокують одне одного довше, ніж триває сам UPDATE. Commit робить викликач.
+
+    Args:
+        account_id (int): ID рахунку каси
+        delta (Decimal): Зміна балансу (від'ємна для зняття й повернення)
+
+    Returns:
+        Row | None: (balance, version) після зміни або None, якщо баланс став би від'ємним
+    """
+    return db.session.execute(
+        update(CashDeskAccount)
+        .where(CashDeskAccount.id == account_id, CashDeskAccount.balance + delta >= 0)
+        .values(
+            balance=CashDeskAccount.balance + delta,
+            version=CashDeskAccount.version + 1,
+            # Час UTC з Python, як і раніше: CURRENT_TIMESTAMP у MSSQL — локальний час сервера
+            last_updated=datetime.now(timezone.utc)
+        )
+        .returning(CashDeskAccount.balance, CashDeskAccount.version)
+        .execution_options(synchronize_session=False)
+    ).first()
+
 def withdraw_from_cash_desk(shift_id, currency_code, amount):
     try:
-        from decimal import Decimal
-        amount = Decimal(str(amount))
-       
-        # Перевірка зміни
-        shift = Shift.query.get(shift_id)
-        if not shift or shift.status != ShiftStatus.OPEN:
-            return None, False, "Зміна не відкрита"
-       
-        # Перевірка рахунку каси
-        account = CashDeskAccount.query.filter_by(cash_desk_id=shift.cash_desk_id, currency_code=currency_code).first()
-        if not account:
-            return None, False, f"Рахунок у валюті {currency_code} не знайдено"
-        if amount <= 0:
-            return None, False, "Сума зняття має бути більше 0"
-        if account.balance < amount:
-            return None, False, "Недостатньо коштів на рахунку"
-       
-        account.balance -= amount
-        account.last_updated = datetime.now()
-        transaction = Transaction(
-            shift_id=shift_id,
-            account_id=account.id,
-            type=TransactionType.WITHDRAWAL,
-            amount=-amount,
-            currency_code=currency_code,
-            description="Зняття готівки"
-        )
-        db.session.add(transaction)
-        db.session.commit()
-        logger.info(f"Знято {amount} {currency_code} з каси {shift.cash_desk_id}")
-        return {
-            'cash_desk_id': shift.cash_desk_id,
-            'currency_code': currency_code,
-            'amount': float(amount),
-            'new_balance': float(account.balance)
-        }, True, None
+        return _withdraw_from_cash_desk(shift_id, currency_code, amount)
     except Exception as e:
         db.session.rollback()
-        logger.error(f"Помилка зняття з каси {shift.cash_desk_id}: {e}")
+        logger.error("Помилка зняття для зміни %s: %s", shift_id, e)
         return None, False, "Не вдалося виконати зняття"
 
+@retry_on_conflict
+def _withdraw_from_cash_desk(shift_id, currency_code, amount):
+    amount = Decimal(str(amount))
+
+    # Перевірка зміни
+    shift = Shift.query.get(shift_id)
+    if not shift or shift.status != ShiftStatus.OPEN:
+        return None, False, "Зміна не відкрита"
+
+    # Перевірка рахунку каси
+    account = find_cash_desk_account(shift.cash_desk_id, currency_code)
+    if not account:
+        return None, False, f"Рахунок у валюті {currency_code} не знайдено"
+    if amount <= 0:
+        return None, False, "Сума зняття має бути більше 0"
+
+    # Перевірка достатності коштів — умова самого UPDATE
+    updated = apply_balance_delta(account.id, -amount)
+    if updated is None:
+        db.session.rollback()
+        return None, False, "Недостатньо коштів на рахунку"
+    transaction = Transaction(
+        shift_id=shift_id,
+        account_id=account.id,
+        type=TransactionType.WITHDRAWAL,
+        amount=-amount,
+        currency_code=currency_code,
+        description="Зняття готівки"
+    )
+    db.session.add(transaction)
+    db.session.commit()
+    cash_withdrawals.labels(currency_code).inc()
+    cash_withdrawn_amount.labels(currency_code).inc(float(amount))
+    logger.info("Знято %s %s з каси %s", amount, currency_code, shift.cash_desk_id)
+    return {
+        'cash_desk_id': shift.cash_desk_id,
+        'currency_code': currency_code,
+        'amount': float(amount),
+        'new_balance': float(updated.balance)
+    }, True, None
+
 def get_cash_desk_balances_by_date(airport_id, cash_desk_id, date1, date2=None):
     """Отримує баланси кас за одну або дві дати."""
     try:
@@ -159,45 +228,33 @@ def get_cash_desk_balances_by_date(airport_id, cash_desk_id, date1, date2=None):
             return [], False, "Аеропорт не знайдено"
         # Визначаємо каси для запиту
         if cash_desk_id:
-            cash_desks = [CashDesk.query.get(cash_desk_id)]
-            if not cash_desks[0]:
+            desks_filter = CashDesk.id == cash_desk_id
+            if db.session.execute(select(CashDesk.id).where(desks_filter)).first() is None:
                 return [], False, "Касу не знайдено"
         else:
-            cash_desks = CashDesk.query.filter_by(airport_id=airport_id, is_active=True).all()
-            if not cash_desks:
-                return [], False, "Каси не знайдені для цього аеропорту"
+            desks_filter = (CashDesk.airport_id == airport_id) & CashDesk.is_active.is_(True)
+        # Рахунки всіх кас одним запитом
+        accounts = db.session.execute(
+            select(CashDeskAccount.id, CashDesk.id, CashDesk.name, CashDeskAccount.currency_code)
+            .join(CashDesk, CashDeskAccount.cash_desk_id == CashDesk.id)
+            .where(desks_filter)
+            .order_by(CashDesk.id, CashDeskAccount.currency_code)
+        ).all()
+        if not accounts and not cash_desk_id and db.session.execute(select(CashDesk.id).where(desks_filter).limit(1)).first() is None:
+            return [], False, "Каси не знайдені для цього аеропорту"
+        account_ids = [account_id for account_id, _, _, _ in accounts]
+        # Баланси на кінець дати (живі транзакції + архів або вхідний баланс) — згрупованими запитами
+        balances_date1 = account_balances_at(account_ids, datetime.combine(date1, datetime.max.time()))
+        balances_date2 = account_balances_at(account_ids, datetime.combine(date2, datetime.max.time())) if date2 else None
         balances = []
-        for cash_desk in cash_desks:
-            accounts = CashDeskAccount.query.filter_by(cash_desk_id=cash_desk.id).all()
-            for account in accounts:
-                # Отримуємо баланс на кінець date1
-                balance_date1 = db.session.query(
-                    db.func.sum(Transaction.amount)
-                ).filter(
-                    Transaction.account_id == account.id,
-                    Transaction.created_at <= datetime.combine(date1, datetime.max.time())
-                ).scalar() or 0.0
-                balance_date2 = None
-                difference = None
-                if date2:
-                    # Отримуємо баланс на кінець date2
-                    balance_date2 = db.session.query(
-                        db.func.sum(Transaction.amount)
-                    ).filter(
-                        Transaction.account_id == account.id,
-                        Transaction.created_at <= datetime.combine(date2, datetime.max.time())
-                    ).scalar() or 0.0
-                    difference = balance_date1 - balance_date2
-                balances.append({
-                    'cash_desk_id': cash_desk.id,
-                    'cash_desk_name': cash_desk.name,
-                    'currency_code': account.currency_code,
-                    'balance_date1': round(float(balance_date1), 2),
-                    'balance_date2': round(float(balance_date2), 2) if balance_date2 is not None else None,
-                    'difference': round(float(difference), 2) if difference is not None else None
-                })
-        logger.info(f"Отримано баланси для {len(balances)} рахунків кас аеропорту {airport_id}")
+        for account_id, desk_id, desk_name, currency_code in accounts:
+            row = BalanceRow(desk_id, desk_name, currency_code, balances_date1[account_id])
+            if balances_date2 is not None:
+                row.balance_date2 = balances_date2[account_id]
+                row.difference = row.balance_date1 - row.balance_date2
+            balances.append(row)
+        logger.info("Отримано баланси для %s рахунків кас аеропорту %s", len(balances), airport_id)
         return balances, True, None
     except Exception as e:
-        logger.error(f"Помилка отримання балансів для аеропорту {airport_id}: {e}")
+        logger.error("Помилка отримання балансів для аеропорту %s: %s", airport_id, e)
         return [], False, f"Не вдалося отримати баланси: {e}"
\ No newline at end of file
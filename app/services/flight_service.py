@@ -1,7 +1,12 @@
 from models import Flight, FlightFare, Airport
+from sqlalchemy import select
+from sqlalchemy.orm import aliased
 from sqlalchemy.exc import IntegrityError
 from datetime import datetime, timezone
 from database import db
+from read_models import AirportCode, AirportRef, FareView, FlightRef, FlightView
+from pagination import SortKey, paginate
+from services.quote_service import invalidate_flight_fares
 import logging
 
 logger = logging.getLogger(__name__)
@@ -63,7 +68,7 @@ def create_flight(flight_number, origin_airport_id, destination_airport_id, depa
         )
         db.session.add(flight)
         db.session.commit()
-        logger.info(f"Створено рейс: {flight_number}")
+        logger.info("Створено рейс: %s", flight_number)
         return {
             'id': flight.id,
             'flight_number': flight.flight_number,
@@ -76,11 +81,11 @@ def create_flight(flight_number, origin_airport_id, destination_airport_id, depa
         }, True, None
     except IntegrityError:
         db.session.rollback()
-        logger.error(f"Помилка створення рейсу: Номер рейсу {flight_number} уже існує")
+        logger.error("Помилка створення рейсу: Номер рейсу %s уже існує", flight_number)
         return {}, False, "Номер рейсу вже існує"
     except Exception as e:
         db.session.rollback()
-        logger.error(f"Помилка створення рейсу: {e}")
+        logger.error("Помилка створення рейсу: %s", e)
         return {}, False, "Не вдалося створити рейс"
 
 def create_flight_fare(flight_id, name, base_price, base_currency, seat_limit):
@@ -121,7 +126,8 @@ def create_flight_fare(flight_id, name, base_price, base_currency, seat_limit):
         )
         db.session.add(fare)
         db.session.commit()
-        logger.info(f"Створено тариф {name} для рейсу {flight_id}")
+        invalidate_flight_fares(flight_id)
+        logger.info("Створено тариф %s для рейсу %s", name, flight_id)
         return {
             'id': fare.id,
             'flight_id': fare.flight_id,
@@ -133,42 +139,162 @@ def create_flight_fare(flight_id, name, base_price, base_currency, seat_limit):
         }, True, None
     except Exception as e:
         db.session.rollback()
-        logger.error(f"Помилка створення тарифу: {e}")
+        logger.error("Помилка створення тарифу: %s", e)
         return {}, False, "Не вдалося створити тариф"
 
+def _flights_select():
+    # Рейси з аеропортами; порядок колонок — як у _build_flights
+    origin = aliased(Airport)
+    destination = aliased(Airport)
+    return (
+        select(
+            Flight.id, Flight.flight_number,
+            origin.id, origin.code, origin.name,
+            destination.id, destination.code, destination.name,
+            Flight.departure_time, Flight.arrival_time, Flight.aircraft_model, Flight.seat_capacity
+        )
+        .join(origin, Flight.origin_airport_id == origin.id)
+        .join(destination, Flight.destination_airport_id == destination.id)
+    )
+
+def _fares_query(flight_ids=None):
+    # Тарифи рейсів (індекс ix_flight_fare_flight) або всі тарифи, якщо flight_ids не задано
+    query = select(
+        FlightFare.flight_id, FlightFare.id, FlightFare.name, FlightFare.base_price,
+        FlightFare.base_currency, FlightFare.seat_limit, FlightFare.seats_sold
+    ).order_by(FlightFare.id)
+    if flight_ids is not None:
+        query = query.where(FlightFare.flight_id.in_(flight_ids))
+    return query
+
+def _flights_search(q):
+    # Рейси списку з пошуком за початком номера рейсу
+    query = _flights_select()
+    if q:
+        query = query.where(Flight.flight_number.startswith(q, autoescape=True))
+    return query
+
+def _flights_from_airport_query(airport_id):
+    # Рейси з аеропорту: номер і коди аеропортів (індекс ix_flight_origin_airport)
+    origin = aliased(Airport)
+    destination = aliased(Airport)
+    return (
+        select(Flight.id, Flight.flight_number, origin.code, destination.code)
+        .join(origin, Flight.origin_airport_id == origin.id)
+        .join(destination, Flight.destination_airport_id == destination.id)
+        .where(Flight.origin_airport_id == airport_id)
+        .order_by(Flight.id)
+    )
+
+def _build_flights(rows, all_fares=False):
+    """
+    Рядки _flights_select → FlightView з тарифами. Тарифи вибираються одним
+    запитом: усі (all_fares) або лише для рейсів з rows.
+    """
+    flights = {
+        row[0]: FlightView(
+            row[0], row[1], AirportRef(row[2], row[3], row[4]), AirportRef(row[5], row[6], row[7]),
+            row[8], row[9], row[10], row[11]
+        ) for row in rows
+    }
+    if flights:
+        for flight_id, *fare in db.session.execute(_fares_query(None if all_fares else list(flights))):
+            flight = flights.get(flight_id)
+            if flight is not None:
+                flight.fares.append(FareView(*fare))
+    return list(flights.values())
+
 def get_all_flights():
     """
-    Отримує список усіх рейсів.
-    
+    Отримує список усіх рейсів з тарифами двома запитами колонок
+    (рейси з аеропортами і всі тарифи) замість ледачого завантаження
+    аеропортів і тарифів для кожного рейсу.
+
+    Returns:
+        tuple: (flights_list: list[FlightView], success: bool, error_message: str)
+    """
+    try:
+        rows = db.session.execute(_flights_select().order_by(Flight.id)).all()
+        flights_list = _build_flights(rows, all_fares=True)
+        logger.info("Отримано %s рейсів", len(flights_list))
+        return flights_list, True, None
+    except Exception as e:
+        logger.error("Помилка отримання рейсів: %s", e)
+        return [], False, "Не вдалося отримати рейси"
+
+FLIGHT_SORT_KEYS = {
+    'id': SortKey(Flight.id, 'id', 'За датою створення'),
+    'flight_number': SortKey(Flight.flight_number, 'flight_number', 'За номером рейсу'),
+    'departure_time': SortKey(Flight.departure_time, 'departure_time', 'За часом відправлення'),
+}
+
+def list_flights(page_request):
+    """
+    Сторінка списку рейсів з тарифами: пошук за початком номера рейсу,
+    сортування за FLIGHT_SORT_KEYS.
+
+    Args:
+        page_request (PageRequest): Пошук, сортування, курсор і розмір сторінки
+
+    Returns:
+        tuple: (page: Page, success: bool, error_message: str)
+    """
+    try:
+        page = paginate(db.session, _flights_search(page_request.q), Flight.id, FLIGHT_SORT_KEYS, page_request, _build_flights)
+        logger.info("Отримано %s рейсів (q=%r, sort=%s)", len(page.items), page_request.q, page_request.sort_param)
+        return page, True, None
+    except Exception as e:
+        logger.error("Помилка отримання рейсів: %s", e)
+        return None, False, "Не вдалося отримати рейси"
+
+def get_flight_details(flight_id):
+    """
+    Рейс з аеропортами і тарифами.
+
+    Returns:
+        tuple: (flight: FlightView | None, success: bool, error_message: str)
+    """
+    try:
+        flights = _build_flights(db.session.execute(_flights_select().where(Flight.id == flight_id)).all())
+        if not flights:
+            return None, False, "Рейс не знайдено"
+        return flights[0], True, None
+    except Exception as e:
+        logger.error("Помилка отримання рейсу %s: %s", flight_id, e)
+        return None, False, "Не вдалося отримати рейс"
+
+def get_airports():
+    """
+    Отримує аеропорти для випадаючих списків.
+
+    Returns:
+        tuple: (airports: list[AirportRef], success: bool, error_message: str)
+    """
+    try:
+        rows = db.session.execute(select(Airport.id, Airport.code, Airport.name).order_by(Airport.id))
+        return [AirportRef(*row) for row in rows], True, None
+    except Exception as e:
+        logger.error("Помилка отримання аеропортів: %s", e)
+        return [], False, "Не вдалося отримати аеропорти"
+
+def get_flights_from_airport(airport_id):
+    """
+    Отримує рейси з аеропорту: номер і коди аеропортів одним запитом колонок.
+
+    Args:
+        airport_id (int): ID аеропорту відправлення
+
     Returns:
-        tuple: (flights_list: list, success: bool, error_message: str)
+        tuple: (flights_list: list[FlightRef], success: bool, error_message: str)
     """
     try:
-        flights = Flight.query.all()
+        rows = db.session.execute(_flights_from_airport_query(airport_id))
         flights_list = [
-            {
-                'id': flight.id,
-                'flight_number': flight.flight_number,
-                'origin_airport': {'id': flight.origin_airport.id, 'code': flight.origin_airport.code, 'name': flight.origin_airport.name},
-                'destination_airport': {'id': flight.destination_airport.id, 'code': flight.destination_airport.code, 'name': flight.destination_airport.name},
-                'departure_time': flight.departure_time.isoformat(),
-                'arrival_time': flight.arrival_time.isoformat(),
-                'aircraft_model': flight.aircraft_model,
-                'seat_capacity': flight.seat_capacity,
-                'fares': [
-                    {
-                        'id': fare.id,
-                        'name': fare.name,
-                        'base_price': float(fare.base_price),
-                        'base_currency': fare.base_currency,
-                        'seat_limit': fare.seat_limit,
-                        'seats_sold': fare.seats_sold
-                    } for fare in flight.fares
-                ]
-            } for flight in flights
+            FlightRef(flight_id, flight_number, AirportCode(origin_code), AirportCode(destination_code))
+            for flight_id, flight_number, origin_code, destination_code in rows
         ]
-        logger.info(f"Отримано {len(flights_list)} рейсів")
+        logger.info("Отримано %s рейсів для аеропорту %s", len(flights_list), airport_id)
         return flights_list, True, None
     except Exception as e:
-        logger.error(f"Помилка отримання рейсів: {e}")
-        return [], False, "Не вдалося отримати рейси"
\ No newline at end of file
+        logger.error("Помилка отримання рейсів для аеропорту %s: %s", airport_id, e)
+        return [], False, "Не вдалося отримати рейси"
@@ -0,0 +1,146 @@
+import logging
+from decimal import Decimal, ROUND_HALF_UP
+from flask import current_app
+from sqlalchemy import select, func
+from models import db, FlightFare, ExchangeRate
+from cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+_CENT = Decimal('0.01')
+
+_fares = None
+_rates = None
+
+def _caches():
+    # Розмір і TTL беруться з конфігурації при першому зверненні
+    global _fares, _rates
+    if _fares is None:
+        ttl = current_app.config['QUOTE_CACHE_TTL']
+        _fares = TTLCache('quote_fares', maxsize=current_app.config['QUOTE_CACHE_SIZE'], ttl=ttl)
+        _rates = TTLCache('quote_rates', maxsize=256, ttl=ttl)
+    return _fares, _rates
+
+def price_in_currency(base_price, rate):
+    """
+    Ціна в іншій валюті, округлена до копійок (ROUND_HALF_UP). Той самий
+    розрахунок використовує продаж квитка, тож ціна в котируванні збігається
+    з фактично списаною.
+
+    Args:
+        base_price (Decimal): Ціна в базовій валюті тарифу
+        rate (Decimal): Курс base -> target
+
+    Returns:
+        Decimal: Ціна з двома знаками після коми
+    """
+    return (Decimal(str(base_price)) * Decimal(str(rate))).quantize(_CENT, rounding=ROUND_HALF_UP)
+
+def get_flight_fares(flight_id):
+    """
+    Тарифи рейсу з кешу процесу (без seats_sold, який змінюється з кожним продажем).
+
+    Returns:
+        list: [(id, name, base_price: Decimal, base_currency)]
+    """
+    fares_cache, _ = _caches()
+    fares = fares_cache.get(flight_id)
+    if fares is None:
+        fares = [
+            (row.id, row.name, Decimal(str(row.base_price)), row.base_currency)
+            for row in db.session.execute(
+                select(FlightFare.id, FlightFare.name, FlightFare.base_price, FlightFare.base_currency)
+                .where(FlightFare.flight_id == flight_id)
+                .order_by(FlightFare.id)
+            )
+        ]
+        fares_cache.set(flight_id, fares)
+    return fares
+
+def _latest_rate_query(base_currency, target_currency):
+    # Останній курс пари з індексу ix_exchange_rate_pair_valid, без сортування
+    return (
+        select(ExchangeRate.rate)
+        .where(ExchangeRate.base_currency == base_currency, ExchangeRate.target_currency == target_currency)
+        .order_by(ExchangeRate.valid_at.desc())
+        .limit(1)
+    )
+
+def get_latest_exchange_rate(base_currency, target_currency):
+    """
+    Актуальний курс пари валют напряму з БД (індекс ix_exchange_rate_pair_valid).
+    Використовується продажем: списана сума не залежить від кешу воркера.
+
+    Returns:
+        Decimal | None: None, якщо курсу немає
+    """
+    if base_currency == target_currency:
+        return Decimal('1')
+    rate = db.session.execute(_latest_rate_query(base_currency, target_currency)).scalar()
+    return Decimal(str(rate)) if rate is not None else None
+
+def _rates_version():
+    # Курси лише додаються (імпорт CSV), тож MAX(id) змінюється з кожним імпортом
+    return db.session.execute(select(func.max(ExchangeRate.id))).scalar()
+
+def get_exchange_rate(base_currency, target_currency, version=None):
+    """
+    Актуальний курс пари валют з кешу процесу (для котирувань). Ключ кешу
+    містить версію таблиці курсів, тож після імпорту курси одразу читаються
+    заново, і котирування збігається з сумою продажу.
+
+    Args:
+        version: Результат _rates_version(); None — прочитати з БД
+
+    Returns:
+        Decimal | None: None, якщо курсу немає
+    """
+    if base_currency == target_currency:
+        return Decimal('1')
+    _, rates_cache = _caches()
+    if version is None:
+        version = _rates_version()
+    key = (base_currency, target_currency, version)
+    rate = rates_cache.get(key)
+    if rate is None:
+        # Відсутній курс теж кешується (False) до наступного імпорту курсів
+        rate = get_latest_exchange_rate(base_currency, target_currency) or False
+        rates_cache.set(key, rate)
+    return rate or None
+
+def invalidate_flight_fares(flight_id):
+    """Видаляє тарифи рейсу з кешу після їх зміни."""
+    fares_cache, _ = _caches()
+    fares_cache.pop(flight_id)
+
+def get_flight_quote(flight_id, currencies):
+    """
+    Ціни всіх тарифів рейсу в кожній валюті каси.
+
+    Args:
+        flight_id (int): ID рейсу
+        currencies (list): Коди валют рахунків каси
+
+    Returns:
+        tuple: (quote: dict, success: bool, error_message: str)
+    """
+    try:
+        quote_fares = []
+        version = _rates_version()
+        for fare_id, name, base_price, base_currency in get_flight_fares(flight_id):
+            prices = {}
+            for currency in currencies:
+                rate = get_exchange_rate(base_currency, currency, version)
+                # Ціни як рядки: Decimal без втрат через float у JSON
+                prices[currency] = str(price_in_currency(base_price, rate)) if rate is not None else None
+            quote_fares.append({
+                'id': fare_id,
+                'name': name,
+                'base_price': str(base_price.quantize(_CENT)),
+                'base_currency': base_currency,
+                'prices': prices
+            })
+        return {'flight_id': flight_id, 'currencies': list(currencies), 'fares': quote_fares}, True, None
+    except Exception as e:
+        logger.error("Помилка розрахунку котирування для рейсу %s: %s", flight_id, e)
+        return None, False, "Не вдалося розрахувати ціни"
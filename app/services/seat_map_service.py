@@ -0,0 +1,189 @@
+import re
+import base64
+import threading
+import logging
+from flask import current_app
+from sqlalchemy import select
+from models import db, Flight, Ticket, TicketStatus
+from cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Літери місць у ряду за моделлю літака (I пропускається, як у нумерації авіакомпаній)
+SEAT_LAYOUTS = {
+    'Boeing 737': 'ABCDEF',
+    'Boeing 777': 'ABCDEFGHJK',
+    'Airbus A320': 'ABCDEF',
+    'Airbus A330': 'ABCDEFGH',
+    'Embraer E175': 'ABCD',
+    'Bombardier CRJ900': 'ABCD',
+}
+DEFAULT_SEAT_LETTERS = 'ABCDEF'
+
+_seat_pattern = re.compile(r'^\s*(\d{1,3})\s*([A-Za-z])\s*$')
+
+class SeatLayout:
+    """
+    Схема салону: місця нумеруються рядами ("12C"), індекс місця —
+    (ряд - 1) * кількість_літер + позиція_літери. Останній ряд може бути неповним.
+
+    Args:
+        letters (str): Літери місць у ряду
+        capacity (int): Кількість місць (Flight.seat_capacity)
+    """
+    __slots__ = ('letters', 'capacity')
+
+    def __init__(self, letters, capacity):
+        self.letters = letters
+        self.capacity = capacity
+
+    @classmethod
+    def for_flight(cls, aircraft_model, seat_capacity):
+        return cls(SEAT_LAYOUTS.get(aircraft_model, DEFAULT_SEAT_LETTERS), seat_capacity)
+
+    @property
+    def rows(self):
+        return -(-self.capacity // len(self.letters))
+
+    def index(self, seat_number):
+        """
+        Args:
+            seat_number (str): Номер місця, напр. "12C"
+
+        Returns:
+            int | None: Індекс місця або None, якщо такого місця в салоні немає
+        """
+        match = _seat_pattern.match(seat_number or '')
+        if not match:
+            return None
+        position = self.letters.find(match.group(2).upper())
+        if position < 0:
+            return None
+        index = (int(match.group(1)) - 1) * len(self.letters) + position
+        return index if 0 <= index < self.capacity else None
+
+    def label(self, index):
+        return f"{index // len(self.letters) + 1}{self.letters[index % len(self.letters)]}"
+
+class SeatMap:
+    """
+    Зайнятість місць рейсу як бітова карта: біт i встановлено — місце з
+    індексом i продано. Перевірка та зміна місця — O(1).
+    """
+    __slots__ = ('flight_id', 'aircraft_model', 'layout', 'bits', '_lock')
+
+    def __init__(self, flight_id, aircraft_model, layout):
+        self.flight_id = flight_id
+        self.aircraft_model = aircraft_model
+        self.layout = layout
+        self.bits = bytearray((layout.capacity + 7) // 8)
+        self._lock = threading.Lock()
+
+    def is_occupied(self, index):
+        return bool(self.bits[index >> 3] & (1 << (index & 7)))
+
+    def set(self, index, occupied):
+        with self._lock:
+            if occupied:
+                self.bits[index >> 3] |= 1 << (index & 7)
+            else:
+                self.bits[index >> 3] &= ~(1 << (index & 7)) & 0xFF
+
+    def free_count(self):
+        return self.layout.capacity - sum(bin(byte).count('1') for byte in self.bits)
+
+    def to_dict(self):
+        return {
+            'flight_id': self.flight_id,
+            'aircraft_model': self.aircraft_model,
+            'letters': self.layout.letters,
+            'rows': self.layout.rows,
+            'capacity': self.layout.capacity,
+            'free_count': self.free_count(),
+            # Біт i байта i // 8 (молодший біт першим) — місце з індексом i зайняте
+            'occupied': base64.b64encode(bytes(self.bits)).decode('ascii')
+        }
+
+_seat_maps = None
+
+def _cache():
+    # Розмір і TTL беруться з конфігурації при першому зверненні
+    global _seat_maps
+    if _seat_maps is None:
+        _seat_maps = TTLCache(
+            'seat_map',
+            maxsize=current_app.config['SEAT_MAP_CACHE_SIZE'],
+            ttl=current_app.config['SEAT_MAP_CACHE_TTL']
+        )
+    return _seat_maps
+
+def _sold_seats_query(flight_id):
+    # Місця проданих квитків рейсу; читається з індексу ix_ticket_flight_seat_status
+    return select(Ticket.seat_number).where(Ticket.flight_id == flight_id, Ticket.status == TicketStatus.SOLD)
+
+def _load_seat_map(flight_id):
+    flight = db.session.execute(
+        select(Flight.aircraft_model, Flight.seat_capacity).where(Flight.id == flight_id)
+    ).first()
+    if flight is None:
+        return None
+    seat_map = SeatMap(flight_id, flight.aircraft_model, SeatLayout.for_flight(flight.aircraft_model, flight.seat_capacity))
+    seat_numbers = db.session.execute(_sold_seats_query(flight_id)).scalars()
+    for seat_number in seat_numbers:
+        index = seat_map.layout.index(seat_number)
+        if index is None:
+            logger.debug("Місце %s рейсу %s поза схемою салону", seat_number, flight_id)
+            continue
+        seat_map.set(index, True)
+    return seat_map
+
+def get_seat_map(flight_id):
+    """
+    Повертає карту місць рейсу з кешу процесу або будує її одним запитом.
+
+    Кеш кожного воркера оновлюється його власними продажами та поверненнями,
+    а зміни інших воркерів підхоплюються після SEAT_MAP_CACHE_TTL. Подвійному
+    продажу запобігає фільтрований унікальний індекс ix_ticket_flight_seat_sold.
+
+    Args:
+        flight_id (int): ID рейсу
+
+    Returns:
+        SeatMap | None: None, якщо рейс не знайдено
+    """
+    cache = _cache()
+    seat_map = cache.get(flight_id)
+    if seat_map is None:
+        seat_map = _load_seat_map(flight_id)
+        if seat_map is not None:
+            cache.set(flight_id, seat_map)
+    return seat_map
+
+def mark_seat(flight_id, seat_number, occupied):
+    """Оновлює карту місць у кеші після закомітованого продажу або повернення."""
+    seat_map = _cache().get(flight_id)
+    if seat_map is None:
+        return
+    index = seat_map.layout.index(seat_number)
+    if index is not None:
+        seat_map.set(index, occupied)
+
+def invalidate_seat_map(flight_id):
+    """Видаляє карту рейсу з кешу (наприклад, після конфлікту з іншим воркером)."""
+    _cache().pop(flight_id)
+
+def get_flight_seats(flight_id):
+    """
+    Карта місць рейсу для API.
+
+    Returns:
+        tuple: (seat_map: dict, success: bool, error_message: str)
+    """
+    try:
+        seat_map = get_seat_map(flight_id)
+        if seat_map is None:
+            return None, False, "Рейс не знайдено"
+        return seat_map.to_dict(), True, None
+    except Exception as e:
+        logger.error("Помилка отримання карти місць рейсу %s: %s", flight_id, e)
+        return None, False, "Не вдалося отримати карту місць"
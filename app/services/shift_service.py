@@ -1,8 +1,18 @@
-from models import Shift, CashDesk, Role, User, ShiftStatus
+from models import Shift, CashDesk, Role, User, ShiftStatus, Transaction
+from sqlalchemy import select
 from datetime import datetime, timezone
 import logging
 logger = logging.getLogger(__name__)
 
+def shift_transactions_query(shift_id, limit=20):
+    """Останні транзакції зміни для панелі касира (індекс ix_transaction_shift_created)."""
+    return (
+        select(Transaction)
+        .where(Transaction.shift_id == shift_id)
+        .order_by(Transaction.created_at.desc())
+        .limit(limit)
+    )
+
 def get_available_cash_desks(airport_id):
     """
     Отримує список активних кас без відкритих змін для аеропорту.
@@ -22,10 +32,10 @@ def get_available_cash_desks(airport_id):
             for desk in active_cash_desks
             if desk.id not in open_cash_desk_ids
         ]
-        logger.info(f"Отримано {len(available_cash_desks)} вільних кас для аеропорту {airport_id}")
+        logger.info("Отримано %s вільних кас для аеропорту %s", len(available_cash_desks), airport_id)
         return available_cash_desks, True, None
     except Exception as e:
-        logger.error(f"Помилка отримання вільних кас для аеропорту {airport_id}: {e}")
+        logger.error("Помилка отримання вільних кас для аеропорту %s: %s", airport_id, e)
         return [], False, "Не вдалося отримати список кас"
 
 def open_shift(user_id, cash_desk_id):
@@ -62,11 +72,11 @@ def open_shift(user_id, cash_desk_id):
         )
         Shift.query.session.add(new_shift)
         Shift.query.session.commit()
-        logger.info(f"User {user_id} opened shift {new_shift.id} on cash desk {cash_desk_id}")
+        logger.info("User %s opened shift %s on cash desk %s", user_id, new_shift.id, cash_desk_id)
         return {'shift_id': new_shift.id, 'cash_desk_name': cash_desk.name}, True, None
     except Exception as e:
         Shift.query.session.rollback()
-        logger.error(f"Error opening shift for user {user_id}: {e}")
+        logger.error("Error opening shift for user %s: %s", user_id, e)
         return {}, False, "Не вдалося відкрити зміну"
 
 def close_shift(user_id):
@@ -86,9 +96,9 @@ def close_shift(user_id):
         open_shift.status = ShiftStatus.CLOSED
         open_shift.closed_at = datetime.now(timezone.utc)
         Shift.query.session.commit()
-        logger.info(f"User {user_id} closed shift {open_shift.id}")
+        logger.info("User %s closed shift %s", user_id, open_shift.id)
         return {'shift_id': open_shift.id}, True, None
     except Exception as e:
         Shift.query.session.rollback()
-        logger.error(f"Error closing shift for user {user_id}: {e}")
+        logger.error("Error closing shift for user %s: %s", user_id, e)
         return {}, False, "Не вдалося закрити зміну"
\ No newline at end of file
@@ -1,185 +1,258 @@
-from models import CashDesk, db, Ticket, TicketStatus, Flight, FlightFare, Shift, ShiftStatus, CashDeskAccount, Transaction, TransactionType, ExchangeRate
-from datetime import datetime, timezone, timedelta
+from models import Airport, CashDesk, db, Ticket, TicketArchive, TicketStatus, Flight, FlightFare, Shift, ShiftStatus, Transaction, TransactionType
+from datetime import datetime, timedelta
 from decimal import Decimal
+from metrics import tickets_sold, tickets_refunded
+from read_models import SoldTicketRow
+from services.archive_service import tickets_archive_horizon
+from services.cash_desk_service import apply_balance_delta, find_cash_desk_account
+from db_retry import retry_on_conflict
+from services.quote_service import get_latest_exchange_rate, price_in_currency
+from services.seat_map_service import get_seat_map, mark_seat, invalidate_seat_map
+from sqlalchemy import select, update
+from sqlalchemy.orm import aliased
+from sqlalchemy.exc import IntegrityError
 import logging
 logger = logging.getLogger(__name__)
 
 def sell_ticket(shift_id, flight_id, flight_fare_id, passenger_name, seat_number, currency_code):
     try:
-        # Перевірка вхідних даних
-        if not all([shift_id, flight_id, flight_fare_id, passenger_name, seat_number, currency_code]):
-            return None, False, "Усі поля є обов’язковими"
-        shift = Shift.query.get(shift_id)
-        if not shift or shift.status != ShiftStatus.OPEN:
-            return None, False, "Зміна не відкрита"
-        flight = Flight.query.get(flight_id)
-        if not flight:
-            return None, False, "Рейс не знайдено"
-        flight_fare = FlightFare.query.get(flight_fare_id)
-        if not flight_fare or flight_fare.flight_id != flight_id:
-            return None, False, "Тариф не знайдено або не відповідає рейсу"
-        # Перевірка доступності місця
-        if Ticket.query.filter_by(flight_id=flight_id, seat_number=seat_number, status=TicketStatus.SOLD).first():
-            return None, False, f"Місце {seat_number} уже зайнято"
-        # Перевірка ліміту місць
-        if flight_fare.seats_sold >= flight_fare.seat_limit:
-            return None, False, f"Ліміт місць для тарифу {flight_fare.name} вичерпано"
-        # Перевірка наявності рахунку в касі
-        cash_desk_account = CashDeskAccount.query.filter_by(
-            cash_desk_id=shift.cash_desk_id, currency_code=currency_code
-        ).first()
-        if not cash_desk_account:
-            return None, False, f"Рахунок у валюті {currency_code} не знайдено для каси"
-        # Обчислення ціни в базовій валюті (USD)
-        price_in_base = Decimal(str(flight_fare.base_price))
-        exchange_rate = Decimal('1.0')
-        price = price_in_base
-        if currency_code != flight_fare.base_currency:
-            exchange = ExchangeRate.query.filter_by(
-                base_currency=flight_fare.base_currency,
-                target_currency=currency_code
-            ).order_by(ExchangeRate.valid_at.desc()).first()
-            if not exchange:
-                return None, False, f"Курс обміну з {flight_fare.base_currency} на {currency_code} не знайдено"
-            exchange_rate = Decimal(str(exchange.rate))
-            price = price_in_base * exchange_rate
-        # Створення квитка
-        ticket = Ticket(
-            flight_id=flight_id,
-            flight_fare_id=flight_fare_id,
-            shift_id=shift_id,
-            passenger_name=passenger_name.strip(),
-            seat_number=seat_number.strip(),
-            price=price,
-            currency_code=currency_code,
-            price_in_base=price_in_base,
-            exchange_rate=exchange_rate,
-            status=TicketStatus.SOLD
-        )
-        flight_fare.seats_sold += 1
-        cash_desk_account.balance += price
-        cash_desk_account.last_updated = datetime.now(timezone.utc)
-        # Створення транзакції
-        transaction = Transaction(
-            shift_id=shift_id,
-            account_id=cash_desk_account.id,
-            type=TransactionType.SALE,
-            amount=price,
-            currency_code=currency_code,
-            reference_type='ticket',
-            reference_id=ticket.id,
-            description=f"Продаж квитка для пасажира {passenger_name}"
-        )
-        db.session.add(ticket)
-        db.session.add(transaction)
-        db.session.commit()
-        logger.info(f"Продано квиток {ticket.id} для рейсу {flight.flight_number}")
-        return {
-            'id': ticket.id,
-            'flight_id': ticket.flight_id,
-            'flight_number': flight.flight_number,
-            'passenger_name': ticket.passenger_name,
-            'seat_number': ticket.seat_number,
-            'price': float(ticket.price),
-            'currency_code': ticket.currency_code,
-            'sold_at': ticket.sold_at.isoformat()
-        }, True, None
+        return _sell_ticket(shift_id, flight_id, flight_fare_id, passenger_name, seat_number, currency_code)
     except Exception as e:
         db.session.rollback()
-        logger.error(f"Помилка продажу квитка: {e}")
+        logger.error("Помилка продажу квитка: %s", e)
         return None, False, f"Не вдалося продати квиток: {e}"
 
+@retry_on_conflict
+def _sell_ticket(shift_id, flight_id, flight_fare_id, passenger_name, seat_number, currency_code):
+    # Перевірка вхідних даних
+    if not all([shift_id, flight_id, flight_fare_id, passenger_name, seat_number, currency_code]):
+        return None, False, "Усі поля є обов’язковими"
+    shift = Shift.query.get(shift_id)
+    if not shift or shift.status != ShiftStatus.OPEN:
+        return None, False, "Зміна не відкрита"
+    flight = Flight.query.get(flight_id)
+    if not flight:
+        return None, False, "Рейс не знайдено"
+    flight_fare = FlightFare.query.get(flight_fare_id)
+    if not flight_fare or flight_fare.flight_id != flight_id:
+        return None, False, "Тариф не знайдено або не відповідає рейсу"
+    # Перевірка місця за картою салону: O(1) за бітовою картою в кеші, без запиту до tickets
+    seat_map = get_seat_map(flight_id)
+    seat_index = seat_map.layout.index(seat_number)
+    if seat_index is None:
+        return None, False, f"Місця {seat_number} немає в салоні {flight.aircraft_model}"
+    seat_number = seat_map.layout.label(seat_index)
+    if seat_map.is_occupied(seat_index):
+        return None, False, f"Місце {seat_number} уже зайнято"
+    # Перевірка ліміту місць
+    if flight_fare.seats_sold >= flight_fare.seat_limit:
+        return None, False, f"Ліміт місць для тарифу {flight_fare.name} вичерпано"
+    # Перевірка наявності рахунку в касі
+    cash_desk_account = find_cash_desk_account(shift.cash_desk_id, currency_code)
+    if not cash_desk_account:
+        return None, False, f"Рахунок у валюті {currency_code} не знайдено для каси"
+    # Обчислення ціни за тим самим курсом і округленням, що й котирування /quote;
+    # курс читається з БД, а не з кешу воркера: після імпорту курсів усі воркери списують однаково
+    price_in_base = Decimal(str(flight_fare.base_price))
+    exchange_rate = get_latest_exchange_rate(flight_fare.base_currency, currency_code)
+    if exchange_rate is None:
+        return None, False, f"Курс обміну з {flight_fare.base_currency} на {currency_code} не знайдено"
+    price = price_in_currency(price_in_base, exchange_rate)
+    # Місце в тарифі резервується атомарно: перевірка вище могла застаріти
+    if not _change_seats_sold(flight_fare_id, 1):
+        db.session.rollback()
+        return None, False, f"Ліміт місць для тарифу {flight_fare.name} вичерпано"
+    apply_balance_delta(cash_desk_account.id, price)
+    # Створення квитка
+    ticket = Ticket(
+        flight_id=flight_id,
+        flight_fare_id=flight_fare_id,
+        shift_id=shift_id,
+        passenger_name=passenger_name.strip(),
+        seat_number=seat_number,
+        price=price,
+        currency_code=currency_code,
+        price_in_base=price_in_base,
+        exchange_rate=exchange_rate,
+        status=TicketStatus.SOLD
+    )
+    db.session.add(ticket)
+    # flush, щоб транзакція отримала ID квитка; тут же спрацьовує унікальний індекс місця,
+    # якщо місце щойно продав інший воркер, чия карта ще не потрапила в наш кеш
+    try:
+        db.session.flush()
+    except IntegrityError as e:
+        db.session.rollback()
+        if not _is_seat_conflict(e):
+            raise
+        invalidate_seat_map(flight_id)
+        return None, False, f"Місце {seat_number} уже зайнято"
+    # Створення транзакції
+    transaction = Transaction(
+        shift_id=shift_id,
+        account_id=cash_desk_account.id,
+        type=TransactionType.SALE,
+        amount=price,
+        currency_code=currency_code,
+        reference_type='ticket',
+        reference_id=ticket.id,
+        description=f"Продаж квитка для пасажира {passenger_name}"
+    )
+    db.session.add(transaction)
+    db.session.commit()
+    mark_seat(flight_id, seat_number, True)
+    tickets_sold.labels(flight.origin_airport_id, currency_code).inc()
+    logger.info("Продано квиток %s для рейсу %s", ticket.id, flight.flight_number)
+    return {
+        'id': ticket.id,
+        'flight_id': ticket.flight_id,
+        'flight_number': flight.flight_number,
+        'passenger_name': ticket.passenger_name,
+        'seat_number': ticket.seat_number,
+        'price': float(ticket.price),
+        'currency_code': ticket.currency_code,
+        'sold_at': ticket.sold_at.isoformat()
+    }, True, None
+
+def _is_seat_conflict(error):
+    # Порушення ix_ticket_flight_seat_sold: MSSQL називає індекс, SQLite — колонки
+    message = str(error.orig)
+    return 'ix_ticket_flight_seat_sold' in message or 'tickets.flight_id, tickets.seat_number' in message
+
+def _change_seats_sold(flight_fare_id, delta):
+    """Атомарно змінює seats_sold тарифу в межах [0, seat_limit]. Повертає False, якщо межу досягнуто."""
+    condition = FlightFare.seats_sold + delta <= FlightFare.seat_limit if delta > 0 else FlightFare.seats_sold + delta >= 0
+    result = db.session.execute(
+        update(FlightFare)
+        .where(FlightFare.id == flight_fare_id, condition)
+        .values(seats_sold=FlightFare.seats_sold + delta)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount > 0
+
 def refund_ticket(ticket_id):
     try:
-        ticket = Ticket.query.get(ticket_id)
-        if not ticket:
-            return None, False, "Квиток не знайдено"
-        if ticket.status != TicketStatus.SOLD:
-            return None, False, "Квиток не може бути повернутий"
-        shift = Shift.query.get(ticket.shift_id)
-        if not shift or shift.status != ShiftStatus.OPEN:
-            return None, False, "Зміна не відкрита"
-        flight_fare = FlightFare.query.get(ticket.flight_fare_id)
-        if not flight_fare:
-            return None, False, "Тариф не знайдено"
-        cash_desk_account = CashDeskAccount.query.filter_by(
-            cash_desk_id=shift.cash_desk_id, currency_code=ticket.currency_code
-        ).first()
-        if not cash_desk_account:
-            return None, False, f"Рахунок у валюті {ticket.currency_code} не знайдено для каси"
-        if cash_desk_account.balance < ticket.price:
-            return None, False, "Недостатньо коштів на рахунку каси для повернення"
-        ticket.status = TicketStatus.REFUNDED
-        flight_fare.seats_sold -= 1
-        cash_desk_account.balance -= ticket.price
-        cash_desk_account.last_updated = datetime.now(timezone.utc)
-        transaction = Transaction(
-            shift_id=shift.id,
-            account_id=cash_desk_account.id,
-            type=TransactionType.REFUND,
-            amount=-Decimal(str(ticket.price)),
-            currency_code=ticket.currency_code,
-            reference_type='ticket',
-            reference_id=ticket.id,
-            description=f"Повернення квитка для пасажира {ticket.passenger_name}"
-        )
-        db.session.add(transaction)
-        db.session.commit()
-        logger.info(f"Повернено квиток {ticket.id} для рейсу {ticket.flight.flight_number}")
-        return {
-            'ticket_id': ticket.id,
-            'passenger_name': ticket.passenger_name,
-            'amount': float(ticket.price),
-            'currency_code': ticket.currency_code,
-            'status': ticket.status.value
-        }, True, None
+        return _refund_ticket(ticket_id)
     except Exception as e:
         db.session.rollback()
-        logger.error(f"Помилка повернення квитка {ticket_id}: {e}")
+        logger.error("Помилка повернення квитка %s: %s", ticket_id, e)
         return None, False, f"Не вдалося повернути квиток: {e}"
 
+@retry_on_conflict
+def _refund_ticket(ticket_id):
+    ticket = Ticket.query.get(ticket_id)
+    if not ticket:
+        return None, False, "Квиток не знайдено"
+    if ticket.status != TicketStatus.SOLD:
+        return None, False, "Квиток не може бути повернутий"
+    shift = Shift.query.get(ticket.shift_id)
+    if not shift or shift.status != ShiftStatus.OPEN:
+        return None, False, "Зміна не відкрита"
+    flight_fare = FlightFare.query.get(ticket.flight_fare_id)
+    if not flight_fare:
+        return None, False, "Тариф не знайдено"
+    cash_desk_account = find_cash_desk_account(shift.cash_desk_id, ticket.currency_code)
+    if not cash_desk_account:
+        return None, False, f"Рахунок у валюті {ticket.currency_code} не знайдено для каси"
+    # Статус змінюється умовним UPDATE, тож паралельне повернення того самого квитка не пройде
+    result = db.session.execute(
+        update(Ticket)
+        .where(Ticket.id == ticket.id, Ticket.status == TicketStatus.SOLD)
+        .values(status=TicketStatus.REFUNDED)
+        .execution_options(synchronize_session=False)
+    )
+    if not result.rowcount:
+        db.session.rollback()
+        return None, False, "Квиток не може бути повернутий"
+    price = Decimal(str(ticket.price))
+    if apply_balance_delta(cash_desk_account.id, -price) is None:
+        db.session.rollback()
+        return None, False, "Недостатньо коштів на рахунку каси для повернення"
+    _change_seats_sold(flight_fare.id, -1)
+    transaction = Transaction(
+        shift_id=shift.id,
+        account_id=cash_desk_account.id,
+        type=TransactionType.REFUND,
+        amount=-price,
+        currency_code=ticket.currency_code,
+        reference_type='ticket',
+        reference_id=ticket.id,
+        description=f"Повернення квитка для пасажира {ticket.passenger_name}"
+    )
+    db.session.add(transaction)
+    db.session.commit()
+    mark_seat(ticket.flight_id, ticket.seat_number, False)
+    tickets_refunded.labels(ticket.flight.origin_airport_id, ticket.currency_code).inc()
+    logger.info("Повернено квиток %s для рейсу %s", ticket.id, ticket.flight.flight_number)
+    return {
+        'ticket_id': ticket.id,
+        'passenger_name': ticket.passenger_name,
+        'amount': float(ticket.price),
+        'currency_code': ticket.currency_code,
+        'status': ticket.status.value
+    }, True, None
+
+def shift_tickets_query(shift_id):
+    """Продані квитки зміни для форми повернення (індекс ix_ticket_shift_status)."""
+    return select(Ticket).where(Ticket.shift_id == shift_id, Ticket.status == TicketStatus.SOLD)
+
+def _sold_tickets_query(model, criteria):
+    """
+    Будує запит проданих квитків за критеріями для живої або архівної таблиці.
+    Вибираються лише колонки рядка звіту (порядок — як у SoldTicketRow).
+    """
+    origin = aliased(Airport)
+    destination = aliased(Airport)
+    query = (
+        select(
+            model.id, Flight.flight_number, origin.code, destination.code, model.passenger_name,
+            FlightFare.name, model.seat_number, model.price, model.currency_code, CashDesk.name, model.sold_at
+        )
+        .join(Flight, model.flight_id == Flight.id)
+        .join(origin, Flight.origin_airport_id == origin.id)
+        .join(destination, Flight.destination_airport_id == destination.id)
+        .join(FlightFare, model.flight_fare_id == FlightFare.id)
+        .join(Shift, model.shift_id == Shift.id)
+        .join(CashDesk, Shift.cash_desk_id == CashDesk.id)
+        .where(model.status == TicketStatus.SOLD)
+    )
+    start_time = None
+    if 'flight_id' in criteria:
+        query = query.where(model.flight_id == criteria['flight_id'])
+    if 'airport_id' in criteria:
+        query = query.where(Flight.origin_airport_id == criteria['airport_id'])
+    elif 'cash_desk_id' in criteria:
+        query = query.where(Shift.cash_desk_id == criteria['cash_desk_id'])
+    elif 'day' in criteria:
+        start_time = datetime.combine(criteria['day'], datetime.min.time())
+        end_time = start_time + timedelta(days=1)
+        query = query.where(model.sold_at >= start_time, model.sold_at < end_time)
+    elif 'month' in criteria:
+        start_time = datetime.combine(criteria['month'], datetime.min.time())
+        next_month = (start_time.replace(day=28) + timedelta(days=4)).replace(day=1)
+        query = query.where(model.sold_at >= start_time, model.sold_at < next_month)
+    elif 'start_date' in criteria and 'end_date' in criteria:
+        start_time = datetime.combine(criteria['start_date'], datetime.min.time())
+        end_time = datetime.combine(criteria['end_date'], datetime.max.time())
+        query = query.where(model.sold_at >= start_time, model.sold_at <= end_time)
+    return query, start_time
+
 def get_sold_tickets_by_criteria(criteria):
-    """Отримує продані квитки за заданими критеріями."""
+    """
+    Отримує продані квитки за заданими критеріями.
+
+    Архівна таблиця запитується, лише якщо період починається не пізніше
+    найновішого архівованого квитка або період не задано.
+    """
     try:
-        query = Ticket.query.filter_by(status=TicketStatus.SOLD)
-        if 'flight_id' in criteria:
-            query = query.filter_by(flight_id=criteria['flight_id'])
-        if 'airport_id' in criteria:
-            query = query.join(Flight).filter(Flight.origin_airport_id == criteria['airport_id'])
-        elif 'cash_desk_id' in criteria:
-            query = query.join(Shift).filter(Shift.cash_desk_id == criteria['cash_desk_id'])
-        elif 'day' in criteria:
-            start_time = datetime.combine(criteria['day'], datetime.min.time())
-            end_time = start_time + timedelta(days=1)
-            query = query.filter(Ticket.sold_at >= start_time, Ticket.sold_at < end_time)
-        elif 'month' in criteria:
-            start_time = datetime.combine(criteria['month'], datetime.min.time())
-            next_month = (start_time.replace(day=28) + timedelta(days=4)).replace(day=1)
-            query = query.filter(Ticket.sold_at >= start_time, Ticket.sold_at < next_month)
-        elif 'start_date' in criteria and 'end_date' in criteria:
-            start_time = datetime.combine(criteria['start_date'], datetime.min.time())
-            end_time = datetime.combine(criteria['end_date'], datetime.max.time())
-            query = query.filter(Ticket.sold_at >= start_time, Ticket.sold_at <= end_time)
-        tickets = query.all()
-        tickets_list = [
-            {
-                'id': ticket.id,
-                'flight': {
-                    'flight_number': ticket.flight.flight_number,
-                    'origin_airport': {'code': ticket.flight.origin_airport.code},
-                    'destination_airport': {'code': ticket.flight.destination_airport.code}
-                },
-                'passenger_name': ticket.passenger_name,
-                'flight_fare': {'name': ticket.flight_fare.name},
-                'seat_number': ticket.seat_number,
-                'price': float(ticket.price),
-                'currency_code': ticket.currency_code,
-                'shift': {'cash_desk': {'name': ticket.shift.cash_desk.name}},
-                'sold_at': ticket.sold_at
-            } for ticket in tickets
-        ]
-        logger.info(f"Отримано {len(tickets_list)} проданих квитків за критеріями: {criteria}")
+        query, start_time = _sold_tickets_query(Ticket, criteria)
+        tickets_list = [SoldTicketRow(*row) for row in db.session.execute(query)]
+        horizon = tickets_archive_horizon()
+        if horizon is not None and (start_time is None or start_time <= horizon):
+            archive_query = _sold_tickets_query(TicketArchive, criteria)[0]
+            tickets_list += [SoldTicketRow(*row) for row in db.session.execute(archive_query)]
+        logger.info("Отримано %s проданих квитків за критеріями: %s", len(tickets_list), criteria)
         return tickets_list, True, None
     except Exception as e:
-        logger.error(f"Помилка отримання квитків: {e}")
+        logger.error("Помилка отримання квитків: %s", e)
         return [], False, f"Не вдалося отримати квитки: {e}"
\ No newline at end of file
@@ -1,6 +1,11 @@
-from models import User, Role, Airport, CashDesk, Shift
+from models import User, Role, Airport, CashDesk, Shift, ShiftStatus
+from sqlalchemy import select, func, or_
 from sqlalchemy.exc import IntegrityError
-import bcrypt
+from database import db
+from read_models import UserRow
+from pagination import SortKey, paginate
+from services.auth_service import invalidate_token_version
+from passwords import check_password, hash_password
 import logging
 logger = logging.getLogger(__name__)
 
@@ -26,7 +31,7 @@ def create_user(name, email, password, role_name, airport_id=None):
             return None, False, "Для касира потрібно вказати аеропорт"
         if role_name != 'cashier' and airport_id:
             return None, False, "Аеропорт можна вказати лише для касира"
-        password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        password_hash = hash_password(password)
         user = User(
             name=name,
             email=email,
@@ -37,15 +42,15 @@ def create_user(name, email, password, role_name, airport_id=None):
         )
         User.query.session.add(user)
         User.query.session.commit()
-        logger.info(f"Створено користувача: {email}")
+        logger.info("Створено користувача: %s", email)
         return user, True, None
     except IntegrityError:
         User.query.session.rollback()
-        logger.error(f"Помилка створення користувача: Електронна пошта {email} вже існує")
+        logger.error("Помилка створення користувача: Електронна пошта %s вже існує", email)
         return None, False, "Електронна пошта вже існує"
     except Exception as e:
         User.query.session.rollback()
-        logger.error(f"Помилка створення користувача: {e}")
+        logger.error("Помилка створення користувача: %s", e)
         return None, False, "Не вдалося створити користувача"
 
 def change_user_password(user_id, new_password, admin_id):
@@ -63,20 +68,23 @@ def change_user_password(user_id, new_password, admin_id):
     try:
         user = User.query.get(user_id)
         if not user:
-            logger.warning(f"Користувача {user_id} не знайдено для адміністратора {admin_id}")
+            logger.warning("Користувача %s не знайдено для адміністратора %s", user_id, admin_id)
             return False, "Користувача не знайдено"
         if not new_password or len(new_password) < 6:
-            logger.warning(f"Невірна довжина пароля для користувача {user_id} від адміністратора {admin_id}")
+            logger.warning("Невірна довжина пароля для користувача %s від адміністратора %s", user_id, admin_id)
             return False, "Пароль має містити принаймні 6 символів"
-        password_hash = bcrypt.hashpw(new_password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        password_hash = hash_password(new_password)
         user.password_hash = password_hash
         user.password_changed = False
+        # Усі раніше видані токени користувача стають недійсними
+        user.token_version = User.token_version + 1
         User.query.session.commit()
-        logger.info(f"Адміністратор {admin_id} змінив пароль для користувача {user.email} (ID: {user_id})")
+        invalidate_token_version(user_id)
+        logger.info("Адміністратор %s змінив пароль для користувача %s (ID: %s)", admin_id, user.email, user_id)
         return True, None
     except Exception as e:
         User.query.session.rollback()
-        logger.error(f"Помилка зміни пароля для користувача {user_id} адміністратором {admin_id}: {e}")
+        logger.error("Помилка зміни пароля для користувача %s адміністратором %s: %s", user_id, admin_id, e)
         return False, "Не вдалося змінити пароль"
 
 def change_user_password_by_user(user_id, current_password, new_password):
@@ -94,50 +102,61 @@ def change_user_password_by_user(user_id, current_password, new_password):
     try:
         user = User.query.get(user_id)
         if not user:
-            logger.warning(f"Користувача {user_id} не знайдено")
+            logger.warning("Користувача %s не знайдено", user_id)
             return False, "Користувача не знайдено"
-        if not bcrypt.checkpw(current_password.encode('utf-8'), user.password_hash.encode('utf-8')):
-            logger.warning(f"Невірний поточний пароль для користувача {user_id}")
+        if not check_password(current_password, user.password_hash):
+            logger.warning("Невірний поточний пароль для користувача %s", user_id)
             return False, "Невірний поточний пароль"
         if not new_password or len(new_password) < 6:
-            logger.warning(f"Невірна довжина нового пароля для користувача {user_id}")
+            logger.warning("Невірна довжина нового пароля для користувача %s", user_id)
             return False, "Новий пароль має містити принаймні 6 символів"
-        password_hash = bcrypt.hashpw(new_password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        password_hash = hash_password(new_password)
         user.password_hash = password_hash
         user.password_changed = True
+        user.token_version = User.token_version + 1
         User.query.session.commit()
-        logger.info(f"Користувач {user.email} (ID: {user_id}) змінив свій пароль")
+        invalidate_token_version(user_id)
+        logger.info("Користувач %s (ID: %s) змінив свій пароль", user.email, user_id)
         return True, None
     except Exception as e:
         User.query.session.rollback()
-        logger.error(f"Помилка зміни пароля користувачем {user_id}: {e}")
+        logger.error("Помилка зміни пароля користувачем %s: %s", user_id, e)
         return False, "Не вдалося змінити пароль"
 
-def get_all_users():
+USER_SORT_KEYS = {
+    'id': SortKey(User.id, 'id', 'За датою створення'),
+    'name': SortKey(User.name, 'name', "За ім'ям"),
+    'email': SortKey(User.email, 'email', 'За email'),
+}
+
+def _users_query(q):
+    # Колонки рядка списку користувачів з пошуком за початком email або імені
+    query = select(User.id, User.name, User.email, User.role, User.created_at, User.password_changed, User.airport_id)
+    if q:
+        query = query.where(or_(User.email.startswith(q, autoescape=True), User.name.startswith(q, autoescape=True)))
+    return query
+
+def list_users(page_request):
     """
-    Отримує список всіх користувачів.
-  
+    Сторінка списку користувачів: пошук за початком email або імені,
+    сортування за USER_SORT_KEYS.
+
+    Args:
+        page_request (PageRequest): Пошук, сортування, курсор і розмір сторінки
+
     Returns:
-        tuple: (users_list: list, success: bool, error_message: str)
+        tuple: (page: Page, success: bool, error_message: str)
     """
     try:
-        users = User.query.all()
-        users_list = [
-            {
-                'id': user.id,
-                'name': user.name,
-                'email': user.email,
-                'role': user.role.value,
-                'created_at': user.created_at.isoformat(),
-                'password_changed': user.password_changed,
-                'airport_id': user.airport_id
-            } for user in users
-        ]
-        logger.info(f"Отримано {len(users_list)} користувачів")
-        return users_list, True, None
+        page = paginate(db.session, _users_query(page_request.q), User.id, USER_SORT_KEYS, page_request, lambda rows: [
+            UserRow(user_id, name, email, role.value, created_at, password_changed, airport_id)
+            for user_id, name, email, role, created_at, password_changed, airport_id in rows
+        ])
+        logger.info("Отримано %s користувачів (q=%r, sort=%s)", len(page.items), page_request.q, page_request.sort_param)
+        return page, True, None
     except Exception as e:
-        logger.error(f"Помилка отримання користувачів: {e}")
-        return [], False, "Не вдалося отримати користувачів"
+        logger.error("Помилка отримання користувачів: %s", e)
+        return None, False, "Не вдалося отримати користувачів"
 
 def get_user_by_id(user_id):
     """
@@ -152,12 +171,12 @@ def get_user_by_id(user_id):
     try:
         user = User.query.get(user_id)
         if not user:
-            logger.warning(f"Користувача {user_id} не знайдено")
+            logger.warning("Користувача %s не знайдено", user_id)
             return None, False, "Користувача не знайдено"
-        logger.info(f"Отримано користувача {user_id}")
+        logger.info("Отримано користувача %s", user_id)
         return user, True, None
     except Exception as e:
-        logger.error(f"Помилка отримання користувача {user_id}: {e}")
+        logger.error("Помилка отримання користувача %s: %s", user_id, e)
         return None, False, f"Не вдалося отримати користувача: {str(e)}"
 
 def get_admin_dashboard_stats():
@@ -168,26 +187,38 @@ def get_admin_dashboard_stats():
         tuple: (stats: dict, success: bool, error_message: str)
     """
     try:
+        # Каси і відкриті зміни по аеропортах — двома згрупованими запитами, а не двома на аеропорт
+        desk_counts = dict(db.session.execute(
+            select(CashDesk.airport_id, func.count(CashDesk.id)).group_by(CashDesk.airport_id)
+        ).all())
+        open_shift_counts = dict(db.session.execute(
+            select(CashDesk.airport_id, func.count(Shift.id))
+            .join(CashDesk, Shift.cash_desk_id == CashDesk.id)
+            .where(Shift.status == ShiftStatus.OPEN)
+            .group_by(CashDesk.airport_id)
+        ).all())
+        airports = db.session.execute(
+            select(Airport.id, Airport.code, Airport.name, Airport.location).order_by(Airport.id)
+        ).all()
         stats = {
-            'airport_count': Airport.query.count(),
-            'active_cash_desk_count': CashDesk.query.filter_by(is_active=True).count(),
-            'open_shift_count': Shift.query.filter_by(status='open').count(),
+            'airport_count': len(airports),
+            'active_cash_desk_count': db.session.scalar(
+                select(func.count(CashDesk.id)).where(CashDesk.is_active.is_(True))
+            ),
+            'open_shift_count': sum(open_shift_counts.values()),
             'airports': [
                 {
                     'id': airport.id,
                     'code': airport.code,
                     'name': airport.name,
                     'location': airport.location,
-                    'cash_desk_count': CashDesk.query.filter_by(airport_id=airport.id).count(),
-                    'open_shift_count': Shift.query.join(CashDesk).filter(
-                        CashDesk.airport_id == airport.id,
-                        Shift.status == 'open'
-                    ).count()
-                } for airport in Airport.query.all()
+                    'cash_desk_count': desk_counts.get(airport.id, 0),
+                    'open_shift_count': open_shift_counts.get(airport.id, 0)
+                } for airport in airports
             ]
         }
         logger.info("Отримано статистику для дашборду адміністратора")
         return stats, True, None
     except Exception as e:
-        logger.error(f"Помилка отримання статистики для дашборду: {e}")
+        logger.error("Помилка отримання статистики для дашборду: %s", e)
         return {}, False, "Не вдалося отримати статистику"
\ No newline at end of file
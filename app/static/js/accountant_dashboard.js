@@ -0,0 +1,25 @@
+document.getElementById('airport_id').addEventListener('change', function() {
+    const airportId = this.value;
+    const cashDeskSelect = document.getElementById('cash_desk_id');
+
+    // Очищаємо список кас
+    cashDeskSelect.innerHTML = '<option value="">Усі каси</option>';
+
+    if (airportId) {
+        fetch('/cash_desks/by_airport/' + airportId, {
+            headers: {
+                'Authorization': 'Bearer ' + document.cookie.replace(/(?:(?:^|.*;\s*)js_access_token\s*=\s*([^;]*).*$)|^.*$/, '$1')
+            }
+        })
+        .then(response => response.json())
+        .then(data => {
+            data.forEach(cashDesk => {
+                const option = document.createElement('option');
+                option.value = cashDesk.id;
+                option.textContent = cashDesk.name;
+                cashDeskSelect.appendChild(option);
+            });
+        })
+        .catch(error => console.error('Помилка завантаження кас:', error));
+    }
+});
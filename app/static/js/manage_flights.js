@@ -0,0 +1,14 @@
+document.getElementById('origin_airport_id').addEventListener('change', function() {
+    const destination = document.getElementById('destination_airport_id');
+    if (this.value === destination.value) {
+        alert('Аеропорт відправлення та призначення не можуть бути однаковими');
+        this.value = '';
+    }
+});
+document.getElementById('destination_airport_id').addEventListener('change', function() {
+    const origin = document.getElementById('origin_airport_id');
+    if (this.value === origin.value) {
+        alert('Аеропорт відправлення та призначення не можуть бути однаковими');
+        this.value = '';
+    }
+});
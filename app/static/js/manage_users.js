@@ -0,0 +1,9 @@
+document.getElementById('role').addEventListener('change', function() {
+    const airportGroup = document.querySelector('.airport-group');
+    if (this.value === 'cashier') {
+        airportGroup.classList.remove('hidden');
+    } else {
+        airportGroup.classList.add('hidden');
+        document.getElementById('airport_id').value = '';
+    }
+});
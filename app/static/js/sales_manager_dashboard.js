@@ -0,0 +1,25 @@
+document.getElementById('airport_id').addEventListener('change', function() {
+    const airportId = this.value;
+    const flightSelect = document.getElementById('flight_id');
+
+    // Очищаємо список рейсів
+    flightSelect.innerHTML = '<option value="">Виберіть рейс</option>';
+
+    if (airportId) {
+        fetch('/flights/by_airport/' + airportId, {
+            headers: {
+                'Authorization': 'Bearer ' + document.cookie.replace(/(?:(?:^|.*;\s*)js_access_token\s*=\s*([^;]*).*$)|^.*$/, '$1')
+            }
+        })
+        .then(response => response.json())
+        .then(data => {
+            data.forEach(flight => {
+                const option = document.createElement('option');
+                option.value = flight.id;
+                option.textContent = `${flight.flight_number} (${flight.origin_airport.code} → ${flight.destination_airport.code})`;
+                flightSelect.appendChild(option);
+            });
+        })
+        .catch(error => console.error('Помилка завантаження рейсів:', error));
+    }
+});
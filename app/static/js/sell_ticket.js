@@ -0,0 +1,135 @@
+function getCookie(name) {
+    const value = `; ${document.cookie}`;
+    console.log('Cookies:', document.cookie);
+    const parts = value.split(`; ${name}=`);
+    if (parts.length === 2) {
+        const token = parts.pop().split(';').shift();
+        console.log(`Found ${name}:`, token);
+        return token;
+    }
+    console.error(`Cookie ${name} not found`);
+    return null;
+}
+
+document.getElementById('flight_id').addEventListener('change', function() {
+    const flightId = this.value;
+    const fareSelect = document.getElementById('flight_fare_id');
+    const priceDisplay = document.getElementById('price');
+    const currencyDisplay = document.getElementById('currency');
+    const errorDisplay = document.getElementById('error');
+
+    fareSelect.innerHTML = '<option value="">Виберіть тариф</option>';
+    priceDisplay.textContent = '0.00';
+    currencyDisplay.textContent = '';
+    errorDisplay.textContent = '';
+
+    if (flightId) {
+        const token = getCookie('js_access_token');
+        if (!token) {
+            console.error('No JWT token found in cookies (js_access_token)');
+            errorDisplay.textContent = 'Помилка: Токен авторизації не знайдено. Будь ласка, увійдіть знову.';
+            return;
+        }
+
+        loadSeats(flightId, token);
+
+        // Одне котирування на рейс: ціни всіх тарифів у кожній валюті каси, пораховані на сервері
+        fetch(`/quote?flight_id=${flightId}`, {
+            method: 'GET',
+            headers: {
+                'Authorization': `Bearer ${token}`,
+                'Content-Type': 'application/json'
+            }
+        })
+        .then(response => {
+            if (!response.ok) {
+                throw new Error(`HTTP error! Status: ${response.status}`);
+            }
+            return response.json();
+        })
+        .then(data => {
+            if (data.fares.length === 0) {
+                errorDisplay.textContent = 'Тарифи для цього рейсу не знайдено';
+            } else {
+                data.fares.forEach(fare => {
+                    const option = document.createElement('option');
+                    option.value = fare.id;
+                    option.textContent = `${fare.name} (${fare.base_price} ${fare.base_currency})`;
+                    option.dataset.prices = JSON.stringify(fare.prices);
+                    fareSelect.appendChild(option);
+                });
+            }
+        })
+        .catch(error => {
+            console.error('Error fetching quote:', error);
+            errorDisplay.textContent = `Помилка завантаження тарифів: ${error.message}`;
+        });
+    }
+});
+
+// Карта місць: біт i (молодший біт першим) у base64-рядку occupied — місце i зайняте
+function loadSeats(flightId, token) {
+    const seatSelect = document.getElementById('seat_number');
+    const errorDisplay = document.getElementById('error');
+    seatSelect.innerHTML = '<option value="">Завантаження місць...</option>';
+
+    fetch(`/flights/${flightId}/seats`, {
+        headers: {
+            'Authorization': `Bearer ${token}`,
+            'Content-Type': 'application/json'
+        }
+    })
+    .then(response => {
+        if (!response.ok) {
+            throw new Error(`HTTP error! Status: ${response.status}`);
+        }
+        return response.json();
+    })
+    .then(data => {
+        const occupied = atob(data.occupied);
+        const letters = data.letters;
+        seatSelect.innerHTML = `<option value="">Виберіть місце (вільних: ${data.free_count})</option>`;
+        for (let index = 0; index < data.capacity; index++) {
+            if (occupied.charCodeAt(index >> 3) & (1 << (index & 7))) {
+                continue;
+            }
+            const label = `${Math.floor(index / letters.length) + 1}${letters[index % letters.length]}`;
+            const option = document.createElement('option');
+            option.value = label;
+            option.textContent = label;
+            seatSelect.appendChild(option);
+        }
+    })
+    .catch(error => {
+        console.error('Error fetching seats:', error);
+        seatSelect.innerHTML = '<option value="">Місця недоступні</option>';
+        errorDisplay.textContent = `Помилка завантаження місць: ${error.message}`;
+    });
+}
+
+document.getElementById('flight_fare_id').addEventListener('change', updatePrice);
+document.getElementById('currency_code').addEventListener('change', updatePrice);
+
+function updatePrice() {
+    const fareSelect = document.getElementById('flight_fare_id');
+    const currencySelect = document.getElementById('currency_code');
+    const priceDisplay = document.getElementById('price');
+    const currencyDisplay = document.getElementById('currency');
+    const errorDisplay = document.getElementById('error');
+
+    priceDisplay.textContent = '0.00';
+    currencyDisplay.textContent = '';
+    errorDisplay.textContent = '';
+
+    if (fareSelect.value && currencySelect.value) {
+        const selectedOption = fareSelect.options[fareSelect.selectedIndex];
+        const price = JSON.parse(selectedOption.dataset.prices)[currencySelect.value];
+        if (price) {
+            priceDisplay.textContent = price;
+            currencyDisplay.textContent = currencySelect.value;
+        } else {
+            priceDisplay.textContent = 'Н/Д';
+            errorDisplay.textContent = 'Курс обміну не знайдено';
+        }
+    }
+}
@@ -0,0 +1,45 @@
+import os
+import time
+import logging
+from jinja2 import FileSystemBytecodeCache
+
+logger = logging.getLogger(__name__)
+
+def init_templates(app):
+    """
+    Налаштовує Jinja для продакшену: байткод шаблонів кешується на диску
+    (JINJA_BYTECODE_CACHE_DIR, спільний для воркерів), автоперезавантаження
+    лише за TEMPLATES_AUTO_RELOAD, а всі шаблони компілюються під час старту
+    (JINJA_PRECOMPILE), тож перший запит після деплою не чекає на компіляцію.
+
+    Ключ кешу містить контрольну суму джерела шаблону, тож змінені шаблони
+    перекомпільовуються без очищення каталогу. Викликається після реєстрації
+    фільтрів і розширень: вони потрібні вже під час компіляції.
+    """
+    cache_dir = app.config['JINJA_BYTECODE_CACHE_DIR']
+    if cache_dir:
+        cache_dir = os.path.join(app.root_path, cache_dir)
+        os.makedirs(cache_dir, exist_ok=True)
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(cache_dir)
+    app.jinja_env.auto_reload = app.config['TEMPLATES_AUTO_RELOAD']
+    if app.config['JINJA_PRECOMPILE']:
+        precompile_templates(app)
+
+def precompile_templates(app):
+    """
+    Компілює всі HTML-шаблони в кеш середовища Jinja.
+
+    Returns:
+        int: Кількість скомпільованих шаблонів
+    """
+    started = time.perf_counter()
+    compiled = 0
+    for name in app.jinja_env.list_templates(extensions=['html']):
+        try:
+            app.jinja_env.get_template(name)
+            compiled += 1
+        except Exception as e:
+            # Зламаний шаблон не блокує старт: помилка повториться під час рендеру
+            logger.error("Не вдалося скомпілювати шаблон %s: %s", name, e)
+    logger.info("Скомпільовано %s шаблонів за %.0f мс", compiled, (time.perf_counter() - started) * 1000)
+    return compiled
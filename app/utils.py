@@ -1,6 +1,7 @@
 from datetime import datetime
 import logging
 from flask import current_app
+from fragment_cache import skip_fragment_cache
 
 logger = logging.getLogger(__name__)
 
@@ -22,10 +23,10 @@ def datetimeformat(value, format='%d.%m.%Y %H:%M'):
             dt = datetime.fromisoformat(value.replace('Z', '+00:00'))
             return dt.strftime(format)
         else:
-            logger.error(f"Invalid type for datetimeformat: {type(value)}")
+            logger.error("Invalid type for datetimeformat: %s", type(value))
             return str(value)
     except ValueError as e:
-        logger.error(f"Error formatting datetime: {value}, error: {e}")
+        logger.error("Error formatting datetime: %s, error: %s", value, e)
         return str(value)
 
 def transaction_type_ua(value):
@@ -66,11 +67,41 @@ def floatformat(value, precision=2):
     try:
         return f"{float(value):.{precision}f}"
     except (ValueError, TypeError):
-        logger.error(f"Error formatting float: {value}")
+        logger.error("Error formatting float: %s", value)
         return str(value)
 
+def catalogue_airports():
+    """
+    Аеропорти для випадаючих списків у шаблонах. Викликається всередині
+    блоку {% cache %}, тож читає БД лише при промаху кешу фрагмента.
+
+    Returns:
+        list: Аеропорти (AirportRef) або порожній список у разі помилки
+    """
+    from services.flight_service import get_airports
+    airports, success, _ = get_airports()
+    if not success:
+        skip_fragment_cache()
+    return airports
+
+def admin_dashboard_stats():
+    """
+    Статистика аеропортів для панелі адміністратора (всередині {% cache %}).
+
+    Returns:
+        dict: Статистика або порожній dict у разі помилки
+    """
+    from services.user_service import get_admin_dashboard_stats
+    stats, success, _ = get_admin_dashboard_stats()
+    if not success:
+        skip_fragment_cache()
+    return stats
+
 # Реєстрація фільтрів у Flask
 def register_filters(app):
     app.jinja_env.filters['datetimeformat'] = datetimeformat
     app.jinja_env.filters['transaction_type_ua'] = transaction_type_ua
-    app.jinja_env.filters['floatformat'] = floatformat
\ No newline at end of file
+    app.jinja_env.filters['floatformat'] = floatformat
+    # Ліниві джерела даних для кешованих фрагментів шаблонів
+    app.jinja_env.globals['catalogue_airports'] = catalogue_airports
+    app.jinja_env.globals['admin_dashboard_stats'] = admin_dashboard_stats
\ No newline at end of file
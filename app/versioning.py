@@ -0,0 +1,128 @@
+import hashlib
+import logging
+from functools import wraps
+from flask import request, current_app
+from sqlalchemy import select, func
+from json_provider import BACKEND
+from models import db, Airport, Flight, FlightFare, Ticket, TicketStatus, Transaction, ExchangeRate, User
+
+logger = logging.getLogger(__name__)
+
+# Збільшується, коли змінюється формат JSON-відповідей: старі ETag клієнтів стають недійсними
+REPRESENTATION_VERSION = 1
+
+def _count_max(model, *criteria):
+    # COUNT і MAX(id) ловлять вставку та видалення рядків
+    return [
+        select(func.count(model.id)).where(*criteria).scalar_subquery(),
+        select(func.max(model.id)).where(*criteria).scalar_subquery(),
+    ]
+
+def _stamp(*columns):
+    # Усі агрегати — одним запитом без FROM, кожен як скалярний підзапит
+    return tuple(db.session.execute(select(*columns)).one())
+
+def flights_stamp(**_):
+    """
+    Версія списку всіх рейсів з тарифами (/flights).
+
+    seats_sold змінюється лише разом із вставкою транзакції (продаж або
+    повернення), тож MAX(transactions.id) — дешевий лічильник змін
+    проданих місць за первинним ключем.
+    """
+    return _stamp(
+        *_count_max(Flight),
+        *_count_max(FlightFare),
+        select(func.max(Transaction.id)).scalar_subquery()
+    )
+
+def flight_fares_stamp(flight_id, **_):
+    """
+    Версія тарифів рейсу (/flights/<id>/fares): продаж додає квиток,
+    повернення збільшує кількість повернених квитків рейсу. Обидва
+    агрегати читаються з індексу ix_ticket_flight_seat_status.
+    """
+    return _stamp(
+        *_count_max(FlightFare, FlightFare.flight_id == flight_id),
+        select(func.max(Ticket.id)).where(Ticket.flight_id == flight_id).scalar_subquery(),
+        select(func.count(Ticket.id)).where(
+            Ticket.flight_id == flight_id, Ticket.status == TicketStatus.REFUNDED
+        ).scalar_subquery()
+    )
+
+def flights_by_airport_stamp(airport_id, **_):
+    """Версія рейсів з аеропорту (/flights/by_airport/<id>); рейси не редагуються, лише додаються."""
+    return _stamp(*_count_max(Flight, Flight.origin_airport_id == airport_id))
+
+def exchange_rate_stamp(**_):
+    """Версія курсу пари валют з параметрів запиту (/exchange_rates); курси лише додаються."""
+    return _stamp(*_count_max(
+        ExchangeRate,
+        ExchangeRate.base_currency == request.args.get('base_currency'),
+        ExchangeRate.target_currency == request.args.get('target_currency')
+    ))
+
+def users_stamp(**_):
+    """
+    Версія списку користувачів (/users): зміна пароля збільшує token_version
+    і разом з ним password_changed, тож SUM(token_version) ловить оновлення.
+    """
+    return _stamp(*_count_max(User), select(func.sum(User.token_version)).scalar_subquery())
+
+def catalogue_stamp():
+    """
+    Версія довідників для кешу фрагментів шаблонів: аеропорти, рейси і
+    тарифи. Вони лише додаються, тож COUNT і MAX(id) ловлять кожну зміну.
+    """
+    return _stamp(*_count_max(Airport), *_count_max(Flight), *_count_max(FlightFare))
+
+def make_etag(stamp):
+    """
+    Сильний ETag для поточного запиту: адреса з параметрами, версія формату,
+    JSON-енкодер і версія даних.
+
+    Args:
+        stamp (tuple): Результат функції версії
+
+    Returns:
+        str: ETag без лапок
+    """
+    key = f"{REPRESENTATION_VERSION}|{BACKEND}|{request.full_path}|{stamp!r}"
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+def conditional(stamp_func):
+    """
+    Декоратор GET-ендпоінта: рахує ETag з версії таблиць і, якщо клієнт
+    надіслав той самий ETag в If-None-Match, відповідає 304 ще до запитів
+    до даних. Інакше викликає view і додає ETag до успішної відповіді.
+
+    Версія рахується до view: якщо дані змінились між ними, ETag буде
+    старішим за тіло, і наступний запит просто отримає повну відповідь.
+    Декоратор ставиться під перевіркою доступу (requires_role, jwt_required).
+
+    Args:
+        stamp_func (callable): Отримує аргументи view, повертає кортеж версії
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method != 'GET':
+                return view(*args, **kwargs)
+            try:
+                etag = make_etag(stamp_func(**kwargs))
+            except Exception as e:
+                # Без версії ендпоінт працює як раніше, лише без 304
+                logger.error("Помилка обчислення версії для %s: %s", request.endpoint, e)
+                db.session.rollback()
+                return view(*args, **kwargs)
+            if request.if_none_match.contains_weak(etag):
+                response = current_app.response_class(status=304)
+            else:
+                response = current_app.make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        return wrapper
+    return decorator